@@ -0,0 +1,193 @@
+import os
+import json
+import time
+import random
+import asyncio
+import logging
+from email.utils import parsedate_to_datetime
+from http_client import HttpError
+
+RETRYABLE_STATUSES = {408, 409, 429, 500, 502, 503, 504}
+
+
+class TruncatedResponseError(Exception):
+    """
+    The completion stopped at max_tokens (finish_reason "length"); content holds the partial text.
+    """
+
+    def __init__(self, message, content=""):
+        super().__init__(message)
+        self.content = content
+
+
+class AdaptiveConcurrencyLimiter:
+    """
+    Bounds in-flight requests with a limit that adapts to the service: it grows by one while
+    the rate-limit headers show headroom and shrinks when they run low or a request is throttled.
+    """
+
+    def __init__(self, initial=4, minimum=1, maximum=16, name="Azure OpenAI"):
+        self.name = name
+        self.minimum = minimum
+        self.maximum = maximum
+        self.limit = max(minimum, min(initial, maximum))
+        self.in_flight = 0
+        self._condition = asyncio.Condition()
+
+    async def __aenter__(self):
+        async with self._condition:
+            while self.in_flight >= self.limit:
+                await self._condition.wait()
+            self.in_flight += 1
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        async with self._condition:
+            self.in_flight -= 1
+            self._condition.notify_all()
+
+    def _set_limit(self, limit, reason):
+        limit = max(self.minimum, min(int(limit), self.maximum))
+        if limit != self.limit:
+            logging.info(f"{self.name} concurrency {self.limit} -> {limit} ({reason})")
+            self.limit = limit
+
+    def observe(self, remaining_requests, remaining_tokens, request_tokens):
+        """
+        Adjust the limit from the remaining request/token quota reported after a response.
+        """
+        if remaining_requests is None and remaining_tokens is None:
+            return
+        if remaining_requests is not None and remaining_requests < self.limit:
+            self._set_limit(remaining_requests, f"{remaining_requests} requests left in window")
+        elif remaining_tokens is not None and remaining_tokens < request_tokens * self.limit:
+            self._set_limit(remaining_tokens // max(request_tokens, 1), f"{remaining_tokens} tokens left in window")
+        elif ((remaining_requests is None or remaining_requests > 2 * self.limit)
+              and (remaining_tokens is None or remaining_tokens > 2 * request_tokens * self.limit)):
+            self._set_limit(self.limit + 1, "quota headroom")
+
+    def throttled(self):
+        self._set_limit(self.limit // 2, "throttled")
+
+
+class AzureOpenAIClient:
+    """
+    Async Azure OpenAI chat-completions client shared by all companies. Requests run under an
+    adaptive concurrency limit per deployment (each has its own quota) and are retried with exponential backoff on throttling, server
+    errors and transport failures, honouring Retry-After.
+    """
+
+    def __init__(self, http, endpoint=None, api_key=None, api_version=None, initial_concurrency=4,
+                 max_concurrency=16, max_retries=5, base_delay=1.0, max_delay=60.0, timeout=120, cache=None):
+        self.http = http
+        # Optional LlmCache; identical requests are answered from it without calling Azure
+        self.cache = cache
+        self.endpoint = endpoint or os.getenv("AZURE_OPENAI_ENDPOINT")
+        self.api_key = api_key or os.getenv("AZURE_OPENAI_API_KEY")
+        self.api_version = api_version or os.getenv("AZURE_API_VERSION")
+        self.initial_concurrency = initial_concurrency
+        self.max_concurrency = max_concurrency
+        self.limiters = {}
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.timeout = timeout
+
+    def limiter_for(self, deployment):
+        limiter = self.limiters.get(deployment)
+        if limiter is None:
+            limiter = self.limiters[deployment] = AdaptiveConcurrencyLimiter(
+                initial=self.initial_concurrency, maximum=self.max_concurrency, name=f"Azure OpenAI {deployment}"
+            )
+        return limiter
+
+    def url_for(self, deployment):
+        return f"{self.endpoint}/openai/deployments/{deployment}/chat/completions?api-version={self.api_version}"
+
+    @staticmethod
+    def retry_after(headers):
+        """
+        Seconds to wait from retry-after-ms / Retry-After (seconds or an HTTP date), or None.
+        """
+        try:
+            if headers.get("retry-after-ms"):
+                return float(headers["retry-after-ms"]) / 1000
+            value = headers.get("retry-after")
+            if not value:
+                return None
+            try:
+                return float(value)
+            except ValueError:
+                return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+        except (TypeError, ValueError):
+            return None
+
+    @staticmethod
+    def _header_int(headers, name):
+        try:
+            return int(headers.get(name))
+        except (TypeError, ValueError):
+            return None
+
+    async def chat(self, deployment, messages, cacheable=None, **params):
+        """
+        Send a chat completion and return the assistant message content.
+        Raises HttpError once retries are exhausted or on a non-retryable status, and
+        TruncatedResponseError if the completion hit max_tokens.
+        Responses are cached unless cacheable(content) rejects them (e.g. unparseable JSON).
+        """
+        cache_key = None
+        if self.cache is not None:
+            cache_key = self.cache.key(self.endpoint, deployment, messages, params)
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                return cached
+
+        content = await self._request(deployment, messages, **params)
+        if cache_key and (cacheable is None or cacheable(content)):
+            self.cache.put(cache_key, content)
+        return content
+
+    async def _request(self, deployment, messages, **params):
+        payload = {"messages": messages, **params}
+        headers = {"Content-Type": "application/json", "api-key": self.api_key}
+        # Rough request size (prompt plus requested completion) for quota checks
+        request_tokens = len(json.dumps(messages)) // 4 + params.get("max_tokens", 1000)
+
+        limiter = self.limiter_for(deployment)
+        for attempt in range(self.max_retries + 1):
+            wait = None
+            async with limiter:
+                try:
+                    response = await self.http.post(self.url_for(deployment), headers=headers, json=payload,
+                                                    timeout=self.timeout)
+                except HttpError as e:
+                    error = e
+                else:
+                    if response.status == 429:
+                        limiter.throttled()
+                    else:
+                        limiter.observe(
+                            self._header_int(response.headers, "x-ratelimit-remaining-requests"),
+                            self._header_int(response.headers, "x-ratelimit-remaining-tokens"),
+                            request_tokens,
+                        )
+                    if response.status not in RETRYABLE_STATUSES:
+                        response.raise_for_status()
+                        choice = response.json()["choices"][0]
+                        content = (choice["message"].get("content") or "").strip()
+                        if choice.get("finish_reason") == "length":
+                            raise TruncatedResponseError(
+                                f"Azure OpenAI response truncated at max_tokens={params.get('max_tokens')}", content
+                            )
+                        return content
+                    wait = self.retry_after(response.headers)
+                    error = HttpError(f"HTTP {response.status} from Azure OpenAI", status=response.status,
+                                      url=response.url, response=response)
+
+            if attempt == self.max_retries:
+                raise error
+            if wait is None:
+                wait = min(self.max_delay, self.base_delay * 2 ** attempt) * random.uniform(0.5, 1.0)
+            logging.warning(f"Azure OpenAI request failed ({error}); retry {attempt + 1}/{self.max_retries} in {wait:.1f}s")
+            await asyncio.sleep(wait)
@@ -0,0 +1,195 @@
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from urllib.parse import urlparse
+from playwright.async_api import async_playwright
+
+try:
+    import psutil
+except ImportError:  # Memory based recycling is skipped without psutil
+    psutil = None
+
+
+class BrowserPool:
+    """
+    Long-lived Chromium instance shared by all scrapes, handing out reusable pages.
+    Each page has its own browser context, and idle pages are only reused for the same domain so
+    cookies and storage never carry over between sites.
+    """
+
+    def __init__(self, max_tabs=4, max_tabs_per_domain=2, recycle_after_pages=200,
+                 max_memory_mb=2048, memory_check_interval=5, headless=True,
+                 user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko)"):
+        self.max_tabs = max_tabs
+        self.max_tabs_per_domain = max_tabs_per_domain
+        self.recycle_after_pages = recycle_after_pages
+        self.max_memory_mb = max_memory_mb
+        self.memory_check_interval = memory_check_interval
+        self.headless = headless
+        self.user_agent = user_agent
+
+        self._playwright = None
+        self._driver_pids = set()
+        self._browser = None
+        # [(domain, page), ...] oldest first; at most max_tabs are kept
+        self._idle_pages = []
+        self._active_pages = 0
+        self._pages_since_launch = 0
+        self._recycle_pending = False
+        self._condition = asyncio.Condition()
+        self._tab_semaphore = asyncio.Semaphore(max_tabs)
+        self._domain_semaphores = {}
+
+    @asynccontextmanager
+    async def page(self, url):
+        """
+        Borrow a page for the given URL, respecting the global and per-domain tab caps.
+        """
+        domain = urlparse(url).netloc.lower()
+        domain_semaphore = self._domain_semaphores.setdefault(
+            domain, asyncio.Semaphore(self.max_tabs_per_domain)
+        )
+        async with domain_semaphore:
+            async with self._tab_semaphore:
+                page = await self._acquire_page(domain)
+                try:
+                    yield page
+                finally:
+                    await self._release_page(page, domain)
+
+    async def close(self):
+        """
+        Close all pages, the browser and the Playwright driver.
+        """
+        async with self._condition:
+            await self._shutdown_browser()
+            if self._playwright:
+                await self._playwright.stop()
+                self._playwright = None
+                self._driver_pids = set()
+        logging.info("Browser pool closed.")
+
+    async def _acquire_page(self, domain):
+        async with self._condition:
+            if self._browser and self._should_recycle():
+                self._recycle_pending = True
+            # Let in-flight pages finish before swapping the browser out
+            while self._recycle_pending and self._active_pages > 0:
+                await self._condition.wait()
+            if self._recycle_pending:
+                logging.info(f"Recycling browser after {self._pages_since_launch} pages.")
+                await self._shutdown_browser()
+                self._recycle_pending = False
+                self._condition.notify_all()
+            if self._browser is None:
+                await self._launch_browser()
+            self._active_pages += 1
+            self._pages_since_launch += 1
+            page = None
+            for index in range(len(self._idle_pages) - 1, -1, -1):
+                if self._idle_pages[index][0] == domain:
+                    page = self._idle_pages.pop(index)[1]
+                    break
+
+        try:
+            if page is None or page.is_closed():
+                context = await self._browser.new_context(user_agent=self.user_agent)
+                page = await context.new_page()
+            return page
+        except Exception:
+            async with self._condition:
+                self._active_pages -= 1
+                self._condition.notify_all()
+            raise
+
+    async def _release_page(self, page, domain):
+        reusable = not page.is_closed()
+        if reusable:
+            try:
+                # Drop the rendered DOM so idle tabs don't hold on to memory
+                await page.goto("about:blank")
+            except Exception as e:
+                logging.warning(f"Discarding browser page that failed to reset: {e}")
+                reusable = False
+
+        async with self._condition:
+            self._active_pages -= 1
+            if reusable and not self._recycle_pending:
+                self._idle_pages.append((domain, page))
+                # Close the least recently used idle pages beyond the tab cap
+                while len(self._idle_pages) > self.max_tabs:
+                    await self._close_page(self._idle_pages.pop(0)[1])
+            else:
+                await self._close_page(page)
+            self._condition.notify_all()
+
+    def _should_recycle(self):
+        if self.recycle_after_pages and self._pages_since_launch >= self.recycle_after_pages:
+            return True
+        if (self.max_memory_mb and psutil is not None and self._pages_since_launch
+                and self._pages_since_launch % self.memory_check_interval == 0):
+            memory_mb = self._browser_memory_mb()
+            if memory_mb > self.max_memory_mb:
+                logging.info(f"Browser memory at {memory_mb:.0f} MB exceeds {self.max_memory_mb} MB.")
+                return True
+        return False
+
+    def _browser_memory_mb(self):
+        """
+        Resident memory of the Playwright driver and its Chromium processes. Other children of this
+        process (e.g. OCR workers) are not counted.
+        """
+        total = 0
+        for pid in self._driver_pids:
+            try:
+                driver = psutil.Process(pid)
+                processes = [driver] + driver.children(recursive=True)
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                continue
+            for process in processes:
+                try:
+                    total += process.memory_info().rss
+                except (psutil.NoSuchProcess, psutil.AccessDenied):
+                    continue
+        return total / (1024 * 1024)
+
+    @staticmethod
+    def _find_driver_pids():
+        """
+        PIDs of the Playwright driver processes started by this process.
+        """
+        pids = set()
+        for child in psutil.Process().children():
+            try:
+                if "run-driver" in " ".join(child.cmdline()):
+                    pids.add(child.pid)
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                continue
+        return pids
+
+    async def _launch_browser(self):
+        if self._playwright is None:
+            self._playwright = await async_playwright().start()
+            if psutil is not None:
+                self._driver_pids = self._find_driver_pids()
+        self._browser = await self._playwright.chromium.launch(headless=self.headless)
+        self._pages_since_launch = 0
+        logging.info("Launched shared Chromium browser.")
+
+    async def _shutdown_browser(self):
+        for _, page in self._idle_pages:
+            await self._close_page(page)
+        self._idle_pages = []
+        if self._browser:
+            try:
+                await self._browser.close()
+            except Exception as e:
+                logging.warning(f"Error closing browser: {e}")
+            self._browser = None
+
+    @staticmethod
+    async def _close_page(page):
+        try:
+            await page.context.close()
+        except Exception as e:
+            logging.warning(f"Error closing browser context: {e}")
@@ -0,0 +1,70 @@
+import os
+import json
+import time
+import shutil
+import hashlib
+import logging
+from data_manager import DataManager
+
+
+class CheckpointStore:
+    """
+    Durable per-company stage checkpoints under logs/checkpoints/<company>/<stage>.json.
+    Each file is written atomically and carries its stage, format version and an input
+    fingerprint, so a torn, stale or mismatched checkpoint is ignored instead of trusted.
+    """
+
+    VERSION = 1
+
+    def __init__(self, company_name, base_dir=os.path.join("logs", "checkpoints")):
+        safe_name = "".join(c if c.isalnum() or c in "-_" else "_" for c in company_name.strip().lower())
+        self.directory = os.path.join(base_dir, safe_name)
+
+    @staticmethod
+    def fingerprint(*parts):
+        """
+        Stable hash of the inputs a stage depends on.
+        """
+        payload = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def path(self, stage):
+        return os.path.join(self.directory, f"{stage}.json")
+
+    def load(self, stage, fingerprint=None):
+        """
+        Return the data saved for stage, or None if there is no valid checkpoint.
+        """
+        path = self.path(stage)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, "r", encoding="utf-8") as file:
+                envelope = json.load(file)
+        except (json.JSONDecodeError, OSError) as e:
+            logging.warning(f"Ignoring unreadable checkpoint {path}: {e}")
+            return None
+        if (not isinstance(envelope, dict) or envelope.get("stage") != stage
+                or envelope.get("version") != self.VERSION or "data" not in envelope):
+            logging.warning(f"Ignoring invalid checkpoint {path}")
+            return None
+        if fingerprint is not None and envelope.get("fingerprint") != fingerprint:
+            logging.info(f"Checkpoint {path} is stale (inputs changed).")
+            return None
+        return envelope["data"]
+
+    def save(self, stage, data, fingerprint=None):
+        envelope = {
+            "stage": stage,
+            "version": self.VERSION,
+            "fingerprint": fingerprint,
+            "saved_at": time.time(),
+            "data": data,
+        }
+        DataManager.atomic_write_json(self.path(stage), envelope, indent=None)
+        logging.info(f"Checkpoint saved: {self.path(stage)}")
+
+    def clear(self):
+        if os.path.isdir(self.directory):
+            shutil.rmtree(self.directory, ignore_errors=True)
+            logging.info(f"Cleared checkpoints in {self.directory}")
@@ -1,22 +1,56 @@
 import os      
-import time      
 import logging      
-import requests      
 import json      
 import asyncio      
+from contextlib import aclosing
+from urllib.parse import urlparse
 from data_manager import DataManager      
 from web_scraper import WebScraper      
 from crawler import Crawler      
-from openai import OpenAI
+from checkpoint_store import CheckpointStore
+from text_extractor import TextExtractor
+from near_duplicates import NearDuplicateFilter
+from token_chunker import TokenChunker
+from azure_openai_client import AzureOpenAIClient, TruncatedResponseError
+from llm_cache import LlmCache
+from passage_index import PassageIndex
+from http_client import HttpError
+from rate_limiter import TokenBucket
+from openai import AsyncOpenAI
 from dotenv import load_dotenv  
   
 load_dotenv()  
   
 class CompanyProcessor:      
-    def __init__(self):      
+    def __init__(self, ocr_workers=None, ocr_enabled=True, dedup_threshold=0.8,
+                 perplexity_requests_per_minute=50, perplexity_concurrency=5, perplexity_max_retries=4,
+                 perplexity_cache_ttl=7 * 24 * 3600):      
         self.data_manager = DataManager()      
-        self.web_scraper = WebScraper()      
+        self.web_scraper = WebScraper(ocr_workers=ocr_workers, ocr_enabled=ocr_enabled)      
+        self.text_extractor = TextExtractor()
+        self.near_duplicate_filter = NearDuplicateFilter(threshold=dedup_threshold)
+        # Sized for gpt-4o-mini: 128k context, 16k output
+        self.token_chunker = TokenChunker()
+        # Competitive analysis is map-reduced: data chunks of up to ~40k tokens are analysed
+        # concurrently for each group of keys, and the partial analyses merged per group
+        self.analysis_chunker = TokenChunker(counter=self.token_chunker.counter, max_output_tokens=4096, output_ratio=0.1,
+                                             text_fields=("cleaned_content",))
+        self.analysis_keys_per_group = 8
+        # Output allowance per key in a group; doubled up to the model's cap when a response is truncated
+        self.analysis_output_tokens_per_key = 1024
+        self.analysis_max_output_tokens = 16384
+        # Responses of repeated LLM requests (re-runs, unchanged chunks) are served from disk
+        self.llm_cache = LlmCache()
+        # One Azure OpenAI client for all companies so concurrency adapts to the shared quota
+        self.azure_client = AzureOpenAIClient(self.web_scraper.http, cache=self.llm_cache)
         self.inquiries_file = "inquiries.json"      
+        # Each inquiry sees only its best-matching cleaned-data passages, within a token budget
+        self.inquiry_passage_tokens = 256
+        self.inquiry_max_passages = 8
+        self.inquiry_context_tokens = 4000
+        # Pending inquiries answered per structured call (1 disables batching), and the data budget per call
+        self.inquiry_batch_size = 10
+        self.inquiry_batch_tokens = 16000
         self.inquiries = DataManager.load_inquiries(self.inquiries_file)      
         # Load Google API key and Custom Search Engine ID from environment variables      
         self.google_api_key = os.getenv("GOOGLE_API_KEY")      
@@ -29,6 +63,41 @@ class CompanyProcessor:
         # Load Perplexity API key    
         self.perplexity_api_key = os.getenv("PERPLEXITY_API_KEY")
         # print(f"Perplexity API Key Loaded: {self.perplexity_api_key}")
+        # One async Perplexity client; the SDK retries 429/5xx with backoff, honouring Retry-After
+        self.perplexity_client = AsyncOpenAI(
+            api_key=self.perplexity_api_key,
+            base_url="https://api.perplexity.ai",
+            max_retries=perplexity_max_retries,
+        ) if self.perplexity_api_key else None
+        self.perplexity_rate_limit = TokenBucket(rate=perplexity_requests_per_minute / 60, capacity=perplexity_concurrency)
+        self.perplexity_semaphore = asyncio.Semaphore(perplexity_concurrency)
+        # Perplexity answers from the web, so its cached answers expire
+        self.perplexity_cache_ttl = perplexity_cache_ttl
+
+    async def close(self):
+        """
+        Release shared resources such as the browser pool.
+        """
+        await self.web_scraper.close()
+        if self.perplexity_client is not None:
+            await self.perplexity_client.close()
+        self.llm_cache.close()
+
+    @staticmethod
+    def parse_json_response(result):
+        """
+        Parse a model response as JSON, ignoring any code fences around it.
+        """
+        if "```" in result:
+            result = result.replace("```json", "").replace("```", "").strip()
+        return json.loads(result)
+
+    @staticmethod
+    def is_json_response(result, expected_type=object):
+        try:
+            return isinstance(CompanyProcessor.parse_json_response(result), expected_type)
+        except json.JSONDecodeError:
+            return False
   
     def extract_questions(self, key_descriptions, company_name):    
         """    
@@ -61,50 +130,29 @@ class CompanyProcessor:
         screenshot_dir = os.path.join("screenshots", company_name.replace(' ', '_'))      
         os.makedirs(screenshot_dir, exist_ok=True)      
   
+        checkpoints = CheckpointStore(company_name)
+        cleaned_data = []
+
         if not existing_analysis:      
             try:      
-                # Fetch or search for the company website      
-                company_website = self.web_scraper.fetch_or_search_company_website(company_name, websites_dict)      
-                if company_website == "Website not found.":      
-                    logging.warning(f"Website not found for {company_name}.")      
+                # Fetch or search for the company website and crawl it
+                crawl_result = await self.run_stage(
+                    checkpoints, "crawl",
+                    lambda: self.crawl_company_website(company_name, websites_dict, screenshot_dir),
+                    is_valid=lambda result: bool(result["scraped_data"]),
+                )
+                company_website = crawl_result["company_website"]
+                scraped_data = crawl_result["scraped_data"]
+                if not scraped_data:
                     failed_companies["website"] = True      
-                    scraped_data = []      
-                else:      
-                    if not company_website.endswith('/'):      
-                        company_website += '/'      
-  
-                    crawler = Crawler(      
-                        base_url=company_website,      
-                        max_pages=20,      
-                        max_depth=2,      
-                        use_dynamic="playwright",      
-                        screenshot_dir=screenshot_dir,      
-                    )      
-  
-                    # Fetch sitemap URLs      
-                    sitemap_urls = crawler.fetch_sitemap_urls()      
-                    if sitemap_urls:      
-                        # Scrape content from the sitemap URLs      
-                        scraped_data = await crawler.scrape_sitemap_urls(sitemap_urls)      
-                        if not scraped_data:      
-                            logging.warning(      
-                                f"No data scraped from sitemap URLs for {company_name}. Falling back to recursive crawling.")      
-                            # Fall back to recursive crawling      
-                            scraped_data = await crawler.crawl_website_recursive()      
-                    else:      
-                        logging.warning(f"No sitemap URLs found for {company_name}. Falling back to recursive crawling.")      
-                        # Fall back to recursive crawling      
-                        scraped_data = await crawler.crawl_website_recursive()      
-                    if not scraped_data:      
-                        failed_companies["website"] = True      
   
                 # Fetch Bing News articles and add them to the combined data      
-                bing_news_data = self.fetch_bing_news(company_name)      
+                bing_news_data = await self.run_stage(checkpoints, "bing_news", lambda: self.fetch_bing_news(company_name))
                 if not bing_news_data:      
                     failed_companies["bing_news"] = True      
   
                 # Extract data from Elion.Health      
-                elion_data = await self.research_company_elion(company_name)      
+                elion_data = await self.run_stage(checkpoints, "elion", lambda: self.research_company_elion(company_name))
                 if isinstance(elion_data, list):      
                     elion_failed = False if elion_data else True      
                 else:      
@@ -114,15 +162,30 @@ class CompanyProcessor:
                     failed_companies["elion"] = True      
   
                 # Perform Google search and scrape results      
-                google_search_data = await self.perform_google_search_and_scrape(company_name, company_website)      
+                google_search_data = await self.run_stage(
+                    checkpoints, "google_search",
+                    lambda: self.perform_google_search_and_scrape(company_name, company_website),
+                )
                 if not google_search_data:      
                     failed_companies["google_search"] = True      
   
-                # Combine all data      
-                combined_data = scraped_data + bing_news_data + elion_data + google_search_data      
+                # Combine all data, reduced to main-content text so the LLM only sees what matters
+                combined_data = self.text_extractor.extract_sources(company_name, {
+                    "website": scraped_data,
+                    "bing_news": bing_news_data,
+                    "elion": elion_data,
+                    "google_search": google_search_data,
+                })
+                # Drop near-duplicate pages, repeated boilerplate paragraphs and OCR the page text covers
+                combined_data = self.near_duplicate_filter.filter_records(company_name, combined_data)
   
                 # Clean combined crawled data with LLM      
-                cleaned_data_result = self.clean_data_with_azure_openai(company_name, combined_data)      
+                cleaned_data_result = await self.run_stage(
+                    checkpoints, "cleaning",
+                    lambda: self.clean_data_with_azure_openai(company_name, combined_data),
+                    fingerprint=CheckpointStore.fingerprint(combined_data),
+                    is_valid=lambda result: bool(result.get("data")) and result.get("complete", True),
+                )
                 cleaned_data = cleaned_data_result.get("data", [])      
   
                 if not cleaned_data:    
@@ -144,33 +207,32 @@ class CompanyProcessor:
                 questions = self.extract_questions(key_descriptions, company_name)    
   
                 # Query Perplexity API for each question and collect responses    
-                responses = []    
-                for key_path, question in questions:    
-                    logging.info(f"Asking Perplexity API: {question}")    
-                    answer = self.query_perplexity(question)    
-                    # Append to cleaned_data format    
-                    response_entry = {    
-                        "url": f"Question: {question}",    
-                        "cleaned_content": answer    
-                    }    
-                    responses.append(response_entry)    
-  
-                    # Wait between requests to avoid rate limiting    
-                    time.sleep(2)    
-  
-                # Append responses to cleaned_data    
-                cleaned_data.extend(responses)    
+                # Only a complete set of answers is checkpointed, so failed questions are asked again next run
+                responses = await self.run_stage(
+                    checkpoints, "perplexity",
+                    lambda: self.query_perplexity_questions(questions),
+                    fingerprint=CheckpointStore.fingerprint(questions),
+                    is_valid=lambda result: all(entry.get("cleaned_content") for entry in result),
+                )
+  
+                # Append the answered questions to cleaned_data    
+                cleaned_data.extend(entry for entry in responses if entry.get("cleaned_content"))
   
                 # Now save the cleaned data (after appending responses)    
-                DataManager.append_to_json_file(      
-                    "logs/final_cleaned_data.json",      
+                DataManager.append_to_jsonl_file(      
+                    "logs/final_cleaned_data.jsonl",      
                     {"company_name": company_name, "cleaned_data": cleaned_data}      
                 )    
   
   
                 # Generate competitive analysis if there's any cleaned data      
                 if cleaned_data:      
-                    competitive_analysis = self.generate_competitive_analysis(company_name, company_website, cleaned_data)      
+                    competitive_analysis = await self.run_stage(
+                        checkpoints, "analysis",
+                        lambda: self.generate_competitive_analysis(company_name, company_website, cleaned_data),
+                        fingerprint=CheckpointStore.fingerprint(cleaned_data, key_descriptions),
+                        is_valid=lambda analysis: not str(analysis.get("analysis", "")).startswith("Error"),
+                    )
                 else:      
                     competitive_analysis = {      
                         "company_name": company_name,      
@@ -181,13 +243,10 @@ class CompanyProcessor:
                     logging.warning(f"No cleaned data available for {company_name} to generate competitive analysis.")      
   
             except Exception as e:      
+                # Leave the checkpoints in place and skip the results file so the next run resumes here
                 logging.error(f"An error occurred while processing {company_name}: {e}")      
-                competitive_analysis = {      
-                    "company_name": company_name,      
-                    "company_website": company_website,      
-                    "analysis": f"Error during processing: {e}",      
-                    "cleaned_data": []      
-                }      
+                failed_companies["processing"] = True
+                return failed_companies
         else:      
             # Load existing data      
             logging.info(f"Using existing analysis for {company_name}")      
@@ -204,26 +263,94 @@ class CompanyProcessor:
                 "cleaned_data": []      
             }      
   
-        # Process inquiries for the company      
-        existing_inquiry_answers = competitive_analysis.get("inquiry_answers", {})      
-        inquiry_answers = self.process_inquiries(company_name, cleaned_data, existing_inquiry_answers)      
+        # Process inquiries for the company, resuming from answers checkpointed by an interrupted run
+        inquiries_fingerprint = CheckpointStore.fingerprint(cleaned_data)
+        existing_inquiry_answers = checkpoints.load("inquiries", fingerprint=inquiries_fingerprint) or {}
+        existing_inquiry_answers.update(competitive_analysis.get("inquiry_answers", {}))
+        inquiry_answers = await self.process_inquiries(company_name, cleaned_data, existing_inquiry_answers)      
+        checkpoints.save("inquiries", inquiry_answers, fingerprint=inquiries_fingerprint)
   
         # Combine competitive_analysis and inquiry_answers      
         competitive_analysis["inquiry_answers"] = inquiry_answers      
   
         # Save the combined output to competitive_analysis.json      
         DataManager.update_json_file("logs/competitive_analysis.json", competitive_analysis, 'company_name')      
+        checkpoints.clear()
   
         return failed_companies      
 
-    def query_perplexity(self, question):
-        """Query the Perplexity API with the given question."""
+    async def run_stage(self, checkpoints, stage, compute, fingerprint=None, is_valid=bool):
+        """
+        Return the checkpointed result of a pipeline stage, or run compute() and checkpoint its result.
+        Results rejected by is_valid (e.g. empty scrapes) are not saved, so the stage is retried next run.
+        """
+        result = checkpoints.load(stage, fingerprint=fingerprint)
+        if result is not None:
+            logging.info(f"Resuming stage '{stage}' from checkpoint {checkpoints.path(stage)}")
+            return result
+        result = await compute()
+        if is_valid(result):
+            checkpoints.save(stage, result, fingerprint=fingerprint)
+        return result
+
+    async def crawl_company_website(self, company_name, websites_dict, screenshot_dir):
+        """
+        Find the company's website and crawl it via its sitemap, falling back to a recursive crawl.
+        """
+        company_website = await self.web_scraper.fetch_or_search_company_website(company_name, websites_dict)
+        if company_website == "Website not found.":
+            logging.warning(f"Website not found for {company_name}.")
+            return {"company_website": company_website, "scraped_data": []}
+
+        if not company_website.endswith('/'):
+            company_website += '/'
+
+        crawler = Crawler(
+            base_url=company_website,
+            max_pages=20,
+            max_depth=2,
+            use_dynamic="auto",
+            screenshot_dir=screenshot_dir,
+            scraper=self.web_scraper,
+        )
+
+        # Fetch sitemap URLs
+        sitemap_urls = await crawler.fetch_sitemap_urls()
+        if sitemap_urls:
+            # Scrape content from the sitemap URLs
+            scraped_data = await crawler.scrape_sitemap_urls(sitemap_urls)
+            if not scraped_data:
+                logging.warning(
+                    f"No data scraped from sitemap URLs for {company_name}. Falling back to recursive crawling.")
+                # Fall back to recursive crawling
+                scraped_data = await crawler.crawl_website_recursive()
+        else:
+            logging.warning(f"No sitemap URLs found for {company_name}. Falling back to recursive crawling.")
+            # Fall back to recursive crawling
+            scraped_data = await crawler.crawl_website_recursive()
+        return {"company_website": company_website, "scraped_data": scraped_data}
+
+    async def query_perplexity_questions(self, questions):
+        """
+        Ask Perplexity every (key_path, question) pair concurrently and return the answers in
+        cleaned_data format, in the order of questions. Failed questions have cleaned_content None.
+        """
+        answers = await asyncio.gather(*(self.query_perplexity(question) for _, question in questions))
+        # Append to cleaned_data format
+        return [
+            {
+                "url": f"Question: {question}",
+                "cleaned_content": answer
+            }
+            for (_, question), answer in zip(questions, answers)
+        ]
+
+    async def query_perplexity(self, question):
+        """Query the Perplexity API with the given question. Returns None if no answer could be fetched."""
         try:
-            if not self.perplexity_api_key:
+            if self.perplexity_client is None:
                 logging.error("Perplexity API key is not set in the environment variables.")
-                return "Perplexity API key not found."
-
-            client = OpenAI(api_key=self.perplexity_api_key, base_url="https://api.perplexity.ai")
+                return None
 
             messages = [
                 {
@@ -239,33 +366,40 @@ class CompanyProcessor:
                 },
             ]
 
-            # Make the API call
-            response = client.chat.completions.create(
-                model="llama-3.1-sonar-large-128k-online",
-                messages=messages,
-            )
+            model = "llama-3.1-sonar-large-128k-online"
+            cache_key = LlmCache.key(str(self.perplexity_client.base_url), model, messages)
+            cached = self.llm_cache.get(cache_key)
+            if cached is not None:
+                logging.info(f"Using cached Perplexity answer: {question}")
+                return cached
+
+            # Make the API call within the shared concurrency and request-rate limits
+            async with self.perplexity_semaphore:
+                await self.perplexity_rate_limit.take()
+                logging.info(f"Asking Perplexity API: {question}")
+                response = await self.perplexity_client.chat.completions.create(
+                    model=model,
+                    messages=messages,
+                )
 
             # Inspect the raw response for debugging
-            logging.info(f"Raw API response: {response}")
+            logging.debug(f"Raw API response: {response}")
 
             # Extract the assistant's reply
             if hasattr(response, "choices") and len(response.choices) > 0:
                 answer = response.choices[0].message.content  
-                return answer
+                if answer:
+                    self.llm_cache.put(cache_key, answer, ttl=self.perplexity_cache_ttl)
+                return answer or None
             else:
                 logging.warning("No choices available in the response.")
-                return "No answer available."
+                return None
 
         except Exception as e:
             logging.error(f"Perplexity API query failed for question: {question}. Error: {e}")
-            return f"Error in fetching response from Perplexity API: {e}"
-
-  
-        except Exception as e:  
-            logging.error(f"Perplexity API query failed for question: {question}. Error: {e}")  
-            return f"Error in fetching response from Perplexity API: {e}"  
+            return None
   
-    def fetch_bing_news(self, company_name):    
+    async def fetch_bing_news(self, company_name):
         """    
         Fetch Bing News articles for the company.    
         """    
@@ -283,38 +417,40 @@ class CompanyProcessor:
                 "q": f'"{company_name}"',    
                 "count": 10,    
                 "mkt": "en-US",    
-                "originalImg": True,    
+                "originalImg": "true",    
                 "safeSearch": "Moderate",    
             }    
-            response = requests.get(endpoint, headers=headers, params=params, timeout=10)    
+            response = await self.web_scraper.http.get(endpoint, headers=headers, params=params, timeout=10)
             response.raise_for_status()    
             search_results = response.json()    
   
             articles = search_results.get("value", [])    
             logging.info(f"Found {len(articles)} news articles for {company_name}.")    
   
-            for article in articles:    
-                url = article.get("url")    
-                if url:    
-                    content = self.fetch_full_article_content(url)    
-                    news_data.append({    
-                        "url": url,    
-                        "html_content": content,    
-                        "ocr_text": ""    
-                    })    
+            # Articles live on different hosts, so fetch them concurrently
+            urls = [article.get("url") for article in articles if article.get("url")]
+            contents = await asyncio.gather(*(self.fetch_full_article_content(url) for url in urls))
+            for url, content in zip(urls, contents):
+                news_data.append({    
+                    "url": url,    
+                    "html_content": content,    
+                    "ocr_text": ""    
+                })    
         except Exception as e:    
             logging.error(f"Error fetching Bing News for {company_name}: {e}")    
   
         return news_data    
   
-    def fetch_full_article_content(self, url):    
+    async def fetch_full_article_content(self, url):
         """    
         Fetch the full content of an article from the given URL.    
         Retrieves the full HTML content.    
         """    
         try:    
             headers = {"User-Agent": "Mozilla/5.0"}    
-            response = requests.get(url, headers=headers, timeout=10)    
+            response = await self.web_scraper.http.get(
+                url, headers=headers, timeout=10, cache_source="article", polite=True
+            )
             response.raise_for_status()    
             content = response.text    
             if not content:    
@@ -332,16 +468,16 @@ class CompanyProcessor:
         logging.info(f"Researching {company_name} on Elion.Health")    
         try:    
             sitemap_url = 'https://elion.health/sitemap-products.xml'    
-            response = requests.get(sitemap_url, headers={"User-Agent": "Mozilla/5.0"}, timeout=10)    
-            response.raise_for_status()    
-            urls = Crawler.parse_sitemap(response.text)    
+            elion_crawler = Crawler(base_url='https://elion.health/', scraper=self.web_scraper)
   
-            # Find the company's URL in the sitemap    
+            # Stream the sitemap and stop at the company's URL    
             company_url = None    
-            for url in urls:    
-                if company_name.lower().replace(' ', '-').replace('.', '') in url.lower():    
-                    company_url = url    
-                    break    
+            company_slug = company_name.lower().replace(' ', '-').replace('.', '')
+            async with aclosing(elion_crawler.iter_sitemap_entries([sitemap_url])) as entries:
+                async for entry in entries:
+                    if company_slug in entry['loc'].lower():
+                        company_url = entry['loc']
+                        break    
   
             if company_url:    
                 logging.info(f"Found company page on Elion.Health: {company_url}")    
@@ -353,17 +489,23 @@ class CompanyProcessor:
                 screenshot_dir = os.path.join("screenshots", "elion_health", company_name.replace(' ', '_'))    
                 os.makedirs(screenshot_dir, exist_ok=True)    
   
+                # Render each subpage while the previous screenshots are still being OCR'd
+                ocr_jobs = []
                 for url in all_urls:    
                     logging.info(f"Processing Elion.Health URL: {url}")    
                     page_content = await self.web_scraper.extract_dynamic_content_with_playwright_async(    
-                        url, screenshot_dir)    
+                        url, screenshot_dir, defer_ocr=True)    
                     if page_content:    
-                        content_data = {"url": url, "html_content": page_content[0], "ocr_text": page_content[1]}    
+                        content_data = {"url": url, "html_content": page_content[0], "ocr_text": ""}    
                         content.append(content_data)    
-                        DataManager.append_to_json_file(    
-                            f"logs/crawled_data_elion_{company_name.replace(' ', '_').lower()}.json", content_data)    
+                        ocr_jobs.append((content_data, page_content[1]))
                     else:    
                         logging.warning(f"No content extracted from {url}")    
+                for content_data, ocr_job in ocr_jobs:
+                    content_data["ocr_text"] = ocr_job if isinstance(ocr_job, str) else await ocr_job
+                    DataManager.append_to_jsonl_file(
+                        DataManager.crawl_log_filename(f"elion_{company_name.replace(' ', '_').lower()}"), content_data,
+                        compact_key="url")
                 return content if content else []    
             else:    
                 logging.warning(f"Company {company_name} not found in Elion.Health sitemap.")    
@@ -372,124 +514,147 @@ class CompanyProcessor:
             logging.error(f"Error extracting data for {company_name} on Elion.Health: {e}")    
             return []    
   
-    def clean_data_with_azure_openai(self, company_name, data, max_chunk_size=64000):    
+    async def clean_data_with_azure_openai(self, company_name, data):
         """    
         Clean the combined crawled data using Azure OpenAI.    
+        Records are packed into as few chunks as fit the model's context, leaving room for the
+        prompt and the cleaned output.
         """    
         try:    
             if not data:    
                 logging.warning(f"No data to clean for {company_name}. Skipping cleanup.")    
                 return {"company_name": company_name, "data": []}    
   
-            # Split data into chunks based on max_chunk_size    
-            chunks = []    
-            current_chunk = []    
-            current_chunk_size = 0    
-  
-            for entry in data:    
-                entry_size = len(json.dumps(entry))    
-                if current_chunk_size + entry_size > max_chunk_size:    
-                    chunks.append(current_chunk)    
-                    current_chunk = []    
-                    current_chunk_size = 0    
-                current_chunk.append(entry)    
-                current_chunk_size += entry_size    
-  
-            # Add the last chunk if not empty    
-            if current_chunk:    
-                chunks.append(current_chunk)    
-  
-            logging.info(f"Data for {company_name} split into {len(chunks)} chunks for processing.")    
-  
-            cleaned_chunks = []    
+            system_message = "You are a helpful assistant that returns only the requested JSON output."
+            prompt_template = (    
+                f"The following is crawled content from multiple pages of a website or sources about the company '{company_name}'. "    
+                f"Clean up the data, remove duplicate information, and ensure the content is well-structured and concise. Only include data directly related to '{company_name}'.\n\n"    
+                "{data}\n\n"    
+                "Return ONLY valid JSON and nothing else. The JSON should be an array of objects, "    
+                "each object must have two keys: 'url' and 'cleaned_content'. "    
+                "Do not include any commentary, explanations, markdown, or code fences. Just return JSON."    
+            )    
+            # Chat formatting adds a few tokens per message on top of the text itself
+            prompt_tokens = (self.token_chunker.counter.count(system_message)
+                             + self.token_chunker.counter.count(prompt_template.replace("{data}", "")) + 12)
+            chunks = self.token_chunker.chunk(data, prompt_tokens=prompt_tokens)
+
+            logging.info(f"Data for {company_name} packed into {len(chunks)} chunks for processing.")    
   
-            azure_endpoint = os.getenv("AZURE_OPENAI_ENDPOINT")    
-            api_key = os.getenv("AZURE_OPENAI_API_KEY")    
             deployment_name = os.getenv("AZURE_DEPLOYMENT_NAME_mini")    
-            api_version = os.getenv("AZURE_API_VERSION")    
-  
-            for idx, chunk in enumerate(chunks):    
-                prompt = (    
-                    f"The following is crawled content from multiple pages of a website or sources about the company '{company_name}'. "    
-                    "Clean up the data, remove duplicate information, and ensure the content is well-structured and concise. Only include data directly related to '{company_name}'.\n\n"    
-                    f"{json.dumps(chunk, indent=2)}\n\n"    
-                    "Return ONLY valid JSON and nothing else. The JSON should be an array of objects, "    
-                    "each object must have two keys: 'url' and 'cleaned_content'. "    
-                    "Do not include any commentary, explanations, markdown, or code fences. Just return JSON."    
-                )    
-  
-                headers = {"Content-Type": "application/json", "api-key": api_key}    
-                payload = {    
-                    "messages": [    
-                        {"role": "system", "content": "You are a helpful assistant that returns only the requested JSON output."},    
-                        {"role": "user", "content": prompt}    
-                    ],    
-                    "temperature": 0    
-                }    
   
+            async def clean_chunk(idx, chunk):
+                messages = [    
+                    {"role": "system", "content": system_message},    
+                    {"role": "user", "content": prompt_template.replace("{data}", TokenChunker.serialize(chunk))}    
+                ]    
+                result = ""
                 try:    
                     logging.info(f"Processing chunk {idx + 1}/{len(chunks)} for {company_name} using model: {deployment_name}...")    
-                    response = requests.post(    
-                        f"{azure_endpoint}/openai/deployments/{deployment_name}/chat/completions?api-version={api_version}",    
-                        headers=headers,    
-                        json=payload,    
-                        timeout=60,    
-                    )    
-                    response.raise_for_status()    
-                    result = response.json()["choices"][0]["message"]["content"].strip()    
-  
-                    # Attempt to fix code fences if any    
-                    if "```" in result:    
-                        result = result.replace("```json", "").replace("```", "").strip()    
-  
-                    if not (result.startswith("[") or result.startswith("{")):    
-                        logging.error(f"The assistant returned output that does not look like JSON for chunk {idx + 1}/{len(chunks)}. Response: {result}")    
-                        continue    
-  
-                    try:    
-                        cleaned_data = json.loads(result)    
-                        if not isinstance(cleaned_data, list):    
-                            logging.error(f"Expected a JSON array but got: {type(cleaned_data)} for chunk {idx+1}/{len(chunks)}")    
-                            continue    
-                        cleaned_chunks.append(cleaned_data)    
-                    except json.JSONDecodeError as e:    
-                        logging.error(f"JSON decode error for chunk {idx + 1}/{len(chunks)}: {e} - Response was: {result}")    
-                        continue    
+                    result = await self.azure_client.chat(
+                        deployment_name, messages, temperature=0, max_tokens=self.token_chunker.max_output_tokens,
+                        cacheable=lambda content: self.is_json_response(content, list),
+                    )
+                    cleaned_data = self.parse_json_response(result)
+                    if isinstance(cleaned_data, list):    
+                        return cleaned_data, True
+                    logging.error(f"Expected a JSON array but got: {type(cleaned_data)} for chunk {idx+1}/{len(chunks)}")    
+                except json.JSONDecodeError as e:    
+                    logging.error(f"JSON decode error for chunk {idx + 1}/{len(chunks)}: {e} - Response was: {result}")    
                 except Exception as e:    
                     logging.error(f"Error cleaning chunk {idx + 1}/{len(chunks)} for {company_name}: {e}")    
-                    continue    
   
-                # Wait 1 second between requests to avoid rate limiting    
-                time.sleep(1)    
+                # Keep the chunk's text rather than dropping it; the result is marked incomplete so the stage is not checkpointed
+                logging.warning(f"Keeping chunk {idx + 1}/{len(chunks)} for {company_name} uncleaned.")
+                return [
+                    {
+                        "url": record.get("url"),
+                        "cleaned_content": "\n\n".join(filter(None, [record.get("content"), record.get("ocr_text")])),
+                    }
+                    for record in chunk
+                ], False
+
+            # Chunks run concurrently; the shared client bounds and adapts how many are in flight
+            cleaned_chunks = await asyncio.gather(*(clean_chunk(idx, chunk) for idx, chunk in enumerate(chunks)))
   
             # Combine cleaned chunks into a single structure    
             final_cleaned_data = []    
-            for chunk in cleaned_chunks:    
+            for chunk, _ in cleaned_chunks:    
                 final_cleaned_data.extend(chunk)    
   
-            return {"company_name": company_name, "data": final_cleaned_data}    
+            return {
+                "company_name": company_name,
+                "data": final_cleaned_data,
+                "complete": all(cleaned for _, cleaned in cleaned_chunks),
+            }
   
         except Exception as e:    
             logging.error(f"Error cleaning data with Azure OpenAI for {company_name}: {e}")    
-            return {"company_name": company_name, "data": data}    
+            # The raw data is used for this run but marked incomplete so the stage is not checkpointed
+            return {"company_name": company_name, "data": data, "complete": False}    
   
-    def generate_competitive_analysis(self, company_name, company_website, cleaned_data, max_retries=3):    
+    async def generate_competitive_analysis(self, company_name, company_website, cleaned_data, max_retries=3):
         """    
-        Generate competitive analysis by processing all keys in a single prompt.    
+        Generate competitive analysis with a map-reduce over the cleaned data.
+        Keys are split into groups that run in parallel. For each group, every data chunk is analysed
+        concurrently (map) and the partial analyses are merged into the group's final JSON (reduce);
+        data that fits one chunk is analysed in a single call per group.
         Each key may have an associated description that is included in the prompt to guide the model.    
         """    
-        azure_endpoint = os.getenv("AZURE_OPENAI_ENDPOINT")    
-        api_key = os.getenv("AZURE_OPENAI_API_KEY")    
         deployment_name = os.getenv("AZURE_DEPLOYMENT_NAME")    
-        api_version = os.getenv("AZURE_API_VERSION")    
   
         # Load key descriptions from JSON file    
         key_descriptions = DataManager.load_json_file('key_descriptions_v6.json')    
   
         # List of keys to analyze (you can adjust this list as needed)    
         keys_to_analyze = list(key_descriptions.keys())    
-  
-        # Build the prompt    
+        key_groups = [
+            keys_to_analyze[start:start + self.analysis_keys_per_group]
+            for start in range(0, len(keys_to_analyze), self.analysis_keys_per_group)
+        ]
+
+        # Size the chunks for the largest group's prompt
+        prompt_tokens = max(
+            self.analysis_chunker.counter.count(
+                self.analysis_prompt(company_name, company_website, group, key_descriptions, "", "")
+            ) + 12
+            for group in key_groups
+        ) if key_groups else 0
+        chunks = self.analysis_chunker.chunk(
+            [entry for entry in cleaned_data if isinstance(entry, dict)], prompt_tokens=prompt_tokens
+        )
+        logging.info(
+            f"Generating analysis for {company_name}: {len(key_groups)} key groups x {len(chunks)} data chunks"
+        )
+
+        results = await asyncio.gather(*(
+            self.analyze_key_group(company_name, company_website, group, key_descriptions, chunks,
+                                   deployment_name, max_retries)
+            for group in key_groups
+        ))
+        if any(result is None for result in results):
+            # If all retries fail, return an error message    
+            return {    
+                "company_name": company_name,    
+                "company_website": company_website,    
+                "analysis": f"Error generating analysis after {max_retries} retries.",    
+                "cleaned_data": cleaned_data    
+            }    
+
+        analysis = {}
+        for result in results:
+            analysis.update(result)
+        analysis['company_name'] = company_name    
+        analysis['company_website'] = company_website    
+        # analysis['cleaned_data'] = cleaned_data  # Include cleaned data if needed    
+        return analysis
+
+    @staticmethod
+    def analysis_prompt(company_name, company_website, keys, key_descriptions, data_label, data, partial=False):
+        """
+        Build the analysis prompt for keys over data (serialized JSON). Partial prompts ask for the
+        facts in one chunk of the data rather than the final summary.
+        """
         prompt = (    
             "You are a helpful assistant that returns ONLY valid JSON.\n"    
             "Do not include any code fences, triple backticks, or markdown formatting.\n"    
@@ -498,143 +663,331 @@ class CompanyProcessor:
         )    
   
         # Add keys and their descriptions to the prompt    
-        for key in keys_to_analyze:    
+        for key in keys:    
             key_description = key_descriptions.get(key, "")    
             prompt += f"Key: {key}\n"    
             if key_description:    
                 prompt += f"Description: {key_description}\n"    
             prompt += "\n"    
   
+        if partial:
+            prompt += (
+                "The input data below is only one part of the data about the company. Extract everything it says "
+                "that is relevant to each key, keeping specific facts, figures, names and source URLs. "
+                "Use an empty string for keys this part does not cover.\n"
+            )
+        else:
+            prompt += "Input data is provided below. Combine and summarize it into the JSON object.\n"
         prompt += (    
-            "Input data is provided below. Combine and summarize it into the JSON object.\n"    
             f"Company Name: {company_name}\n"    
             f"Company Website: {company_website}\n"    
-            f"Cleaned Data:\n{json.dumps(cleaned_data, indent=2)}\n\n"    
+            f"{data_label}:\n{data}\n\n"    
             "Return the response in JSON format as:\n{\n"    
         )    
-        for key in keys_to_analyze:    
+        for key in keys:    
             prompt += f'  "{key}": "value",\n'    
         prompt = prompt.rstrip(',\n') + "\n}\n"  # Remove the last comma and close the JSON    
-  
-        # Log the generated prompt    
-        logging.info(f"Generated prompt for company '{company_name}':\n{prompt}")    
-  
+        return prompt
+
+    async def analyze_key_group(self, company_name, company_website, keys, key_descriptions, chunks,
+                                deployment_name, max_retries):
+        """
+        Map each data chunk to a partial analysis of keys, then reduce the partials to the final
+        values. Returns the group's analysis dict, or None if a call kept failing.
+        """
+        if len(chunks) <= 1:
+            prompt = self.analysis_prompt(company_name, company_website, keys, key_descriptions, "Cleaned Data",
+                                          TokenChunker.serialize(chunks[0] if chunks else []))
+            return await self.request_analysis(company_name, prompt, deployment_name, max_retries, len(keys))
+
+        partials = await asyncio.gather(*(
+            self.request_analysis(
+                company_name,
+                self.analysis_prompt(company_name, company_website, keys, key_descriptions,
+                                     f"Cleaned Data (part {number} of {len(chunks)})", TokenChunker.serialize(chunk),
+                                     partial=True),
+                deployment_name, max_retries, len(keys),
+            )
+            for number, chunk in enumerate(chunks, start=1)
+        ))
+        if any(partial is None for partial in partials):
+            return None
+
+        prompt_tokens = self.analysis_chunker.counter.count(
+            self.analysis_prompt(company_name, company_website, keys, key_descriptions, "", "")
+        ) + 12
+        while len(partials) > 1:
+            # Merge as many partials per call as fit; rounds repeat until one analysis is left
+            batches = self.analysis_chunker.chunk(partials, prompt_tokens=prompt_tokens)
+            if len(batches) == len(partials):
+                # Not even two partials fit one call; merge pairwise so every round still halves them
+                batches = [partials[start:start + 2] for start in range(0, len(partials), 2)]
+            logging.info(f"Merging {len(partials)} partial analyses for {company_name} in {len(batches)} calls")
+            partials = await asyncio.gather(*(
+                self.request_analysis(
+                    company_name,
+                    self.analysis_prompt(company_name, company_website, keys, key_descriptions,
+                                         "Partial analyses, each extracted from a different part of the data",
+                                         json.dumps(batch, ensure_ascii=False)),
+                    deployment_name, max_retries, len(keys),
+                )
+                for batch in batches
+            ))
+            if any(partial is None for partial in partials):
+                return None
+        return partials[0]
+
+    async def request_analysis(self, company_name, prompt, deployment_name, max_retries, key_count):
+        """
+        Request a JSON object for an analysis prompt covering key_count keys. Returns the parsed dict,
+        or None once retries fail.
+        """
+        max_tokens = min(self.analysis_max_output_tokens, self.analysis_output_tokens_per_key * key_count)
+        logging.debug(f"Analysis prompt for company '{company_name}':\n{prompt}")
+        messages = [
+            {"role": "system", "content": "You must return only valid JSON with no extra formatting."},
+            {"role": "user", "content": prompt}
+        ]
+
+        # The client has already retried throttling and transport errors; this loop only retries
+        # unparseable output, so a failed request is not sent again with the same prompt
         for attempt in range(max_retries):    
-            headers = {"Content-Type": "application/json", "api-key": api_key}    
-            payload = {    
-                "messages": [    
-                    {"role": "system", "content": "You must return only valid JSON with no extra formatting."},    
-                    {"role": "user", "content": prompt}    
-                ],    
-                "temperature": 0    
-            }    
-  
             try:    
-                response = requests.post(    
-                    f"{azure_endpoint}/openai/deployments/{deployment_name}/chat/completions?api-version={api_version}",    
-                    headers=headers,    
-                    json=payload,    
-                    timeout=60,    
-                )    
-                response.raise_for_status()    
-  
-                result = response.json()["choices"][0]["message"]["content"].strip()    
-  
-                # Remove code fences if any    
-                if "```" in result:    
-                    result = result.replace("```json", "").replace("```", "").strip()    
-  
-                # Parse the JSON result    
-                analysis = json.loads(result)    
-                analysis['company_name'] = company_name    
-                analysis['company_website'] = company_website    
-                # analysis['cleaned_data'] = cleaned_data  # Include cleaned data if needed    
-                return analysis  # Return the analysis if successful    
-            except (requests.exceptions.RequestException, json.JSONDecodeError) as e:    
-                logging.error(f"Error generating analysis for company '{company_name}': {e}")    
-                time.sleep(2)    
-  
-        # If all retries fail, return an error message    
-        return {    
-            "company_name": company_name,    
-            "company_website": company_website,    
-            "analysis": f"Error generating analysis after {max_retries} retries.",    
-            "cleaned_data": cleaned_data    
-        }    
-  
-    def process_inquiries(self, company_name, cleaned_data, existing_inquiry_answers=None):    
+                result = await self.azure_client.chat(
+                    deployment_name, messages, temperature=0, max_tokens=max_tokens,
+                    cacheable=lambda content: self.is_json_response(content, dict),
+                )
+                analysis = self.parse_json_response(result)
+                if isinstance(analysis, dict):
+                    return analysis
+                logging.error(f"Expected a JSON object for '{company_name}' analysis but got: {type(analysis)}")
+            except TruncatedResponseError as e:
+                # The same prompt and limit would be cut off again; only a larger limit can help
+                if max_tokens >= self.analysis_max_output_tokens:
+                    logging.error(f"Analysis for company '{company_name}' exceeds {max_tokens} output tokens: {e}")
+                    return None
+                max_tokens = min(self.analysis_max_output_tokens, max_tokens * 2)
+                logging.warning(f"Analysis for company '{company_name}' was truncated; retrying with max_tokens={max_tokens}")
+            except HttpError as e:
+                logging.error(f"Error generating analysis for company '{company_name}': {e}")
+                return None
+            except json.JSONDecodeError as e:
+                logging.error(f"Invalid JSON in analysis for company '{company_name}': {e}")
+        return None
+
+    def load_passage_index(self, company_name, cleaned_data):
+        """
+        Return the retrieval index over a company's cleaned data, reusing the one stored with the
+        company's results when the data is unchanged.
+        """
+        results_file = "logs/competitive_analysis.json"
+        fingerprint = CheckpointStore.fingerprint(cleaned_data, self.inquiry_passage_tokens, PassageIndex.VERSION)
+        index = PassageIndex.from_dict(
+            DataManager.load_company_attachment(results_file, company_name, "passage_index", fingerprint)
+        )
+        if index is not None:
+            logging.info(f"Using stored passage index for {company_name} ({len(index.passages)} passages)")
+            return index
+        index = PassageIndex.build(cleaned_data, self.token_chunker, self.inquiry_passage_tokens)
+        DataManager.save_company_attachment(results_file, company_name, "passage_index", index.to_dict(), fingerprint)
+        logging.info(f"Built passage index for {company_name}: {len(index.passages)} passages")
+        return index
+
+    async def process_inquiries(self, company_name, cleaned_data, existing_inquiry_answers=None):
         """    
         Process inquiries (questions) for the company using Azure OpenAI, cleaned data, and Bing web search results.    
-        Only process inquiries that are not in existing_inquiry_answers.    
+        Only process inquiries that are not in existing_inquiry_answers. Each inquiry is given the
+        cleaned-data passages most relevant to it rather than the whole corpus, and pending inquiries
+        are answered in batches of one structured call each.
         """    
         logging.info(f"Processing inquiries for {company_name}")    
-        answers = existing_inquiry_answers.copy() if existing_inquiry_answers else {}    
-        azure_endpoint = os.getenv("AZURE_OPENAI_ENDPOINT")    
-        api_key = os.getenv("AZURE_OPENAI_API_KEY")    
+        # Error text saved by earlier versions is not an answer; those questions are asked again
+        answers = {
+            question: answer for question, answer in (existing_inquiry_answers or {}).items()
+            if not (isinstance(answer, str) and answer.startswith("Error: "))
+        }
         deployment_name = os.getenv("AZURE_DEPLOYMENT_NAME")    
-        api_version = os.getenv("AZURE_API_VERSION")    
   
-        if not all([api_key, azure_endpoint, deployment_name]):    
+        if not all([self.azure_client.api_key, self.azure_client.endpoint, deployment_name]):    
             logging.error("Azure OpenAI credentials are not set properly in the environment variables.")    
             return answers    
   
+        pending = []
         for inquiry in self.inquiries:    
             question = inquiry.get("question")    
             if not question:    
                 continue    
-            if question in answers:    
+            if question in answers or question in pending:
                 logging.info(f"Inquiry already answered: {question}")    
                 continue    
-            logging.info(f"Processing inquiry: {question}")    
-  
-            # Perform Bing web search for the question related to the company    
-            search_query = f"{company_name} {question}"    
-            web_search_results = self.web_scraper.search_bing_web(search_query)    
-  
-            # Combine cleaned data and web search results    
-            combined_data = {    
-                "cleaned_data": cleaned_data,    
-                "web_search_results": web_search_results    
-            }    
-  
-            prompt = (    
-                f"You are a knowledgeable assistant. Based on the data provided, please answer the following question "    
-                f"about \"{company_name}\":\n\n"    
-                f"Question: {question}\n\n"    
-                f"Data:\n{json.dumps(combined_data, indent=2)}\n\n"    
-                "Please provide a concise and accurate answer."    
-            )    
-  
-            headers = {"Content-Type": "application/json", "api-key": api_key}    
-            payload = {    
-                "messages": [    
-                    {"role": "system", "content": "You are a helpful assistant."},    
-                    {"role": "user", "content": prompt}    
-                ],    
-                "temperature": 0.5,    
-                "max_tokens": 500    
-            }    
-  
-            try:    
-                response = requests.post(    
-                    f"{azure_endpoint}/openai/deployments/{deployment_name}/chat/completions?api-version={api_version}",    
-                    headers=headers,    
-                    json=payload,    
-                    timeout=60,    
-                )    
-                response.raise_for_status()    
-                result = response.json()["choices"][0]["message"]["content"].strip()    
-                answers[question] = result    
-                logging.info(f"Answer received for inquiry: {question}")    
-            except Exception as e:    
-                logging.error(f"Error processing inquiry '{question}' for company '{company_name}': {e}")    
-                answers[question] = f"Error: {e}"    
+            pending.append(question)
+        if not pending:
+            return answers
+
+        # Perform Bing web searches for the questions related to the company
+        web_search_results = await asyncio.gather(
+            *(self.web_scraper.search_bing_web(f"{company_name} {question}") for question in pending)
+        )
+        passage_index = self.load_passage_index(company_name, cleaned_data)
+        contexts = []
+        for question, web_results in zip(pending, web_search_results):
+            passages = passage_index.select(
+                f"{company_name} {question}", self.inquiry_max_passages, self.inquiry_context_tokens
+            )
+            logging.info(f"Selected {len(passages)} of {len(passage_index.passages)} passages for inquiry: {question}")
+            contexts.append((question, passages, web_results))
+
+        new_answers, failed = {}, set()
+        if self.inquiry_batch_size > 1:
+            batches = self.batch_inquiries(contexts)
+            logging.info(f"Answering {len(pending)} inquiries for {company_name} in {len(batches)} batched calls")
+            batch_answers = await asyncio.gather(
+                *(self.answer_inquiry_batch(company_name, batch, deployment_name) for batch in batches)
+            )
+            for batch, batch_answer in zip(batches, batch_answers):
+                if batch_answer is None:
+                    # The request itself failed after the client's retries; re-sending each question
+                    # would only add load, so they stay pending for the next run
+                    failed.update(question for question, _, _ in batch)
+                else:
+                    new_answers.update(batch_answer)
+
+        # Questions a batch answered but that did not parse (or were missing) are asked one at a time
+        unanswered = [context for context in contexts if context[0] not in new_answers and context[0] not in failed]
+        if unanswered and self.inquiry_batch_size > 1:
+            logging.warning(f"Falling back to single calls for {len(unanswered)} inquiries for {company_name}")
+        single_answers = await asyncio.gather(
+            *(self.answer_inquiry(company_name, question, passages, web_results, deployment_name)
+              for question, passages, web_results in unanswered)
+        )
+        for (question, _, _), answer in zip(unanswered, single_answers):
+            if answer is not None:
+                new_answers[question] = answer
+
+        # Unanswered questions are not stored, so they count as new inquiries on the next run
+        missing = [question for question in pending if question not in new_answers]
+        if missing:
+            logging.warning(f"{len(missing)} inquiries for {company_name} could not be answered and will be retried next run")
+        answers.update((question, new_answers[question]) for question in pending if question in new_answers)
+        return answers    
+
+    def batch_inquiries(self, contexts):
+        """
+        Group (question, passages, web_results) contexts into batches of at most inquiry_batch_size
+        questions whose combined distinct passages fit inquiry_batch_tokens.
+        """
+        counter = self.token_chunker.counter
+
+        def added_cost(context, batch_passages):
+            # Passages already in the batch are sent once, so only new ones add tokens
+            _, passages, web_results = context
+            new_passages = {(passage["url"], passage["text"]) for passage in passages} - batch_passages
+            return new_passages, (sum(counter.count(text) for _, text in new_passages)
+                                  + counter.count(json.dumps(web_results)))
+
+        batches, current, current_passages, current_tokens = [], [], set(), 0
+        for context in contexts:
+            new_passages, tokens = added_cost(context, current_passages)
+            if current and (len(current) >= self.inquiry_batch_size or current_tokens + tokens > self.inquiry_batch_tokens):
+                batches.append(current)
+                current, current_passages, current_tokens = [], set(), 0
+                new_passages, tokens = added_cost(context, current_passages)
+            current.append(context)
+            current_passages |= new_passages
+            current_tokens += tokens
+        if current:
+            batches.append(current)
+        return batches
+
+    async def answer_inquiry_batch(self, company_name, batch, deployment_name):
+        """
+        Answer several inquiries in one call that returns a JSON object keyed by question id.
+        Returns {question: answer} for the items that parsed; the rest are left to single calls.
+        Returns None if the request itself failed.
+        """
+        passages, seen = [], set()
+        for _, question_passages, _ in batch:
+            for passage in question_passages:
+                if (passage["url"], passage["text"]) not in seen:
+                    seen.add((passage["url"], passage["text"]))
+                    passages.append(passage)
+        combined_data = {
+            "cleaned_data": passages,
+            "web_search_results": {f"Q{number}": web_results for number, (_, _, web_results) in enumerate(batch, start=1)},
+        }
+        questions = "\n".join(f"Q{number}: {question}" for number, (question, _, _) in enumerate(batch, start=1))
+        prompt = (
+            f"You are a knowledgeable assistant. Based on the data provided, please answer each of the following "
+            f"questions about \"{company_name}\":\n\n"
+            f"{questions}\n\n"
+            f"Data:\n{json.dumps(combined_data, ensure_ascii=False)}\n\n"
+            "Return ONLY a JSON object that maps each question id (\"Q1\", \"Q2\", ...) to a concise and accurate "
+            "answer string. Do not include any commentary, markdown, or code fences."
+        )
+        messages = [
+            {"role": "system", "content": "You are a helpful assistant that returns only the requested JSON output."},
+            {"role": "user", "content": prompt}
+        ]
+
+        result = ""
+        try:
+            result = await self.azure_client.chat(
+                deployment_name, messages, temperature=0.5, max_tokens=min(500 * len(batch) + 100, 16384),
+                cacheable=lambda content: self.is_json_response(content, dict),
+            )
+            parsed = self.parse_json_response(result)
+        except (json.JSONDecodeError, TruncatedResponseError) as e:
+            logging.error(f"JSON decode error for batch of {len(batch)} inquiries for '{company_name}': {e} - Response was: {result}")
+            return {}
+        except Exception as e:
+            logging.error(f"Error processing batch of {len(batch)} inquiries for company '{company_name}': {e}")
+            return None
+        if not isinstance(parsed, dict):
+            logging.error(f"Expected a JSON object for batch of {len(batch)} inquiries but got: {type(parsed)}")
+            return {}
+
+        answers = {}
+        for number, (question, _, _) in enumerate(batch, start=1):
+            answer = parsed.get(f"Q{number}")
+            if isinstance(answer, str) and answer.strip():
+                answers[question] = answer.strip()
+                logging.info(f"Answer received for inquiry: {question}")
+        return answers
+
+    async def answer_inquiry(self, company_name, question, passages, web_results, deployment_name):
+        """
+        Answer a single inquiry. Returns None if the request failed.
+        """
+        logging.info(f"Processing inquiry: {question}")    
+        # Combine the relevant cleaned-data passages and web search results    
+        combined_data = {    
+            "cleaned_data": passages,    
+            "web_search_results": web_results    
+        }    
   
-            # Wait between requests to avoid rate limiting    
-            time.sleep(1)    
+        prompt = (    
+            f"You are a knowledgeable assistant. Based on the data provided, please answer the following question "    
+            f"about \"{company_name}\":\n\n"    
+            f"Question: {question}\n\n"    
+            f"Data:\n{json.dumps(combined_data, ensure_ascii=False)}\n\n"    
+            "Please provide a concise and accurate answer."    
+        )    
   
-        return answers    
+        messages = [    
+            {"role": "system", "content": "You are a helpful assistant."},    
+            {"role": "user", "content": prompt}    
+        ]    
   
+        try:    
+            answer = await self.azure_client.chat(
+                deployment_name, messages, temperature=0.5, max_tokens=500
+            )
+            logging.info(f"Answer received for inquiry: {question}")    
+            return answer
+        except Exception as e:    
+            logging.error(f"Error processing inquiry '{question}' for company '{company_name}': {e}")    
+            return None
+
     def add_inquiry(self, question):    
         """    
         Add a new inquiry to the list and save it.    
@@ -657,7 +1010,7 @@ class CompanyProcessor:
   
         logging.info(f"Performing Google search for {company_name}")    
         try:    
-            search_results = self.google_search_company(company_name)    
+            search_results = await self.google_search_company(company_name)
             if not search_results:    
                 logging.warning(f"No Google search results for {company_name}.")    
                 return []    
@@ -674,29 +1027,28 @@ class CompanyProcessor:
             # Limit to top 10 results    
             top_results = filtered_results[:10]    
   
-            # Scrape content from each URL    
+            # Scrape results concurrently; the per-host rate limiter keeps each site polite
+            urls = [result.get('link') for result in top_results if result.get('link')]
+            scraped_pages = await asyncio.gather(*(self.scrape_external_url(url) for url in urls))
+
             scraped_data = []    
-            for result in top_results:    
-                url = result.get('link')    
-                if url:    
-                    content, ocr_text = await self.scrape_external_url(url)    
-                    if content or ocr_text:    
-                        logging.info(f"Content extracted from: {url}")    
-                        scraped_data.append({"url": url, "html_content": content, "ocr_text": ocr_text})    
-                        DataManager.append_to_json_file(    
-                            f"logs/crawled_data_google_search_{company_name.replace(' ', '_').lower()}.json",    
-                            {"url": url, "html_content": content, "ocr_text": ocr_text}    
-                        )    
-                    else:    
-                        logging.warning(f"No content extracted from: {url}")    
-                    # Be polite to servers    
-                    await asyncio.sleep(1)    
+            for url, (content, ocr_text) in zip(urls, scraped_pages):
+                if content or ocr_text:    
+                    logging.info(f"Content extracted from: {url}")    
+                    scraped_data.append({"url": url, "html_content": content, "ocr_text": ocr_text})    
+                    DataManager.append_to_jsonl_file(
+                        DataManager.crawl_log_filename(f"google_search_{company_name.replace(' ', '_').lower()}"),
+                        {"url": url, "html_content": content, "ocr_text": ocr_text},
+                        compact_key="url",
+                    )    
+                else:    
+                    logging.warning(f"No content extracted from: {url}")    
             return scraped_data    
         except Exception as e:    
             logging.error(f"Error performing Google search and scraping for {company_name}: {e}")    
             return []    
   
-    def google_search_company(self, company_name):    
+    async def google_search_company(self, company_name):
         """    
         Use Google Custom Search API to search for the company name and return search results.    
         """    
@@ -708,7 +1060,7 @@ class CompanyProcessor:
                 "q": company_name,    
                 "num": 10,    
             }    
-            response = requests.get(endpoint, params=params, timeout=10)    
+            response = await self.web_scraper.http.get(endpoint, params=params, timeout=10)
             response.raise_for_status()    
             search_results = response.json()    
             items = search_results.get('items', [])    
@@ -724,7 +1076,7 @@ class CompanyProcessor:
         """    
         if not url:    
             return None    
-        parsed_url = requests.utils.urlparse(url)    
+        parsed_url = urlparse(url)
         return parsed_url.netloc.lower()    
   
     async def scrape_external_url(self, url):    
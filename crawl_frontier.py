@@ -0,0 +1,73 @@
+import heapq
+import re
+from urllib.parse import urlparse, urldefrag
+from url_utils import canonicalize_url
+
+# Path keywords that usually carry product positioning, and ones that rarely do
+HIGH_VALUE_KEYWORDS = {
+    "product": 10, "products": 10, "platform": 9, "features": 9, "feature": 9, "solutions": 8,
+    "solution": 8, "pricing": 8, "plans": 6, "integrations": 8, "integration": 8, "customers": 7,
+    "case-studies": 7, "case-study": 7, "how-it-works": 7, "about": 5, "about-us": 5, "security": 4,
+}
+LOW_VALUE_KEYWORDS = {
+    "careers": -10, "career": -10, "jobs": -10, "job": -10, "legal": -10, "privacy": -10,
+    "privacy-policy": -10, "terms": -10, "terms-of-service": -10, "cookies": -10, "cookie-policy": -10,
+    "tag": -8, "tags": -8, "category": -6, "author": -8, "archive": -8, "page": -6, "login": -8,
+    "signin": -8, "sign-in": -8, "blog": -4, "news": -2, "events": -3, "webinars": -3,
+}
+NON_HTML_EXTENSIONS = re.compile(r"\.(pdf|jpe?g|png|gif|svg|webp|zip|mp4|mp3|docx?|xlsx?|pptx?|css|js|xml|ico)$", re.I)
+
+
+def score_url(url, depth=0):
+    """
+    Default frontier score: higher for product/features/pricing/integrations/customers pages,
+    lower for careers, legal and blog-archive pages, and slightly lower for deep paths.
+    """
+    segments = [segment for segment in urlparse(url).path.lower().split("/") if segment]
+    if not segments:
+        return 20
+    score = 0
+    for segment in segments:
+        score += HIGH_VALUE_KEYWORDS.get(segment, 0) + LOW_VALUE_KEYWORDS.get(segment, 0)
+    # Paginated archives such as /blog/page/7
+    if any(segment.isdigit() for segment in segments):
+        score -= 4
+    return score - len(segments) - depth
+
+
+class CrawlFrontier:
+    """
+    Priority queue of (url, depth) that pops the highest scoring page first and never
+    enqueues the same canonical URL twice.
+    """
+
+    def __init__(self, score_fn=score_url, max_depth=None):
+        self.score_fn = score_fn
+        self.max_depth = max_depth
+        self._heap = []
+        self._enqueued = set()
+        self._counter = 0
+
+    def push(self, url, depth=0):
+        """
+        Enqueue url unless it (in canonical form) was seen before. Returns True if enqueued.
+        """
+        if NON_HTML_EXTENSIONS.search(urlparse(url).path):
+            return False
+        if self.max_depth is not None and depth > self.max_depth:
+            return False
+        canonical = canonicalize_url(url)
+        if canonical in self._enqueued:
+            return False
+        self._enqueued.add(canonical)
+        # Fetch the URL as linked (servers may be case-sensitive); the counter keeps BFS order among equal scores
+        heapq.heappush(self._heap, (-self.score_fn(canonical, depth), self._counter, urldefrag(url)[0], depth))
+        self._counter += 1
+        return True
+
+    def pop(self):
+        _, _, url, depth = heapq.heappop(self._heap)
+        return url, depth
+
+    def __len__(self):
+        return len(self._heap)
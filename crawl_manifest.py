@@ -0,0 +1,43 @@
+import os
+import json
+import time
+import logging
+from data_manager import DataManager
+
+
+class CrawlManifest:
+    """
+    Per-domain record of the last crawl (logs/manifests/<domain>.json): for each page, the
+    sitemap lastmod it was crawled at. Lets a refresh crawl skip pages whose lastmod is unchanged.
+    """
+
+    def __init__(self, domain, manifest_dir=os.path.join("logs", "manifests")):
+        self.domain = domain
+        self.filename = os.path.join(manifest_dir, f"{domain.replace('.', '_').replace(':', '_')}.json")
+        self.pages = {}
+        if os.path.exists(self.filename):
+            try:
+                with open(self.filename, "r", encoding="utf-8") as file:
+                    self.pages = json.load(file).get("pages", {})
+            except (json.JSONDecodeError, OSError) as e:
+                logging.error(f"Error loading crawl manifest {self.filename}: {e}")
+
+    def is_unchanged(self, url, lastmod):
+        """
+        True if url was crawled before at the same sitemap lastmod. Pages without lastmod
+        are always treated as changed.
+        """
+        previous = self.pages.get(url)
+        return bool(lastmod) and previous is not None and previous.get("lastmod") == lastmod
+
+    def record(self, url, sitemap_entry=None):
+        sitemap_entry = sitemap_entry or {}
+        self.pages[url] = {
+            "lastmod": sitemap_entry.get("lastmod"),
+            "changefreq": sitemap_entry.get("changefreq"),
+            "priority": sitemap_entry.get("priority"),
+            "crawled_at": time.time(),
+        }
+
+    def save(self):
+        DataManager.atomic_write_json(self.filename, {"domain": self.domain, "pages": self.pages})
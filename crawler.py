@@ -1,132 +1,192 @@
 import os  
+import heapq
 import logging  
-import requests  
 import asyncio  
 import json  
 from urllib.parse import urljoin, urlparse  
 from bs4 import BeautifulSoup  
-import xml.etree.ElementTree as ET  
+from contextlib import aclosing
 from data_manager import DataManager  
 from web_scraper import WebScraper  
+from crawl_manifest import CrawlManifest
+from sitemap_stream import SitemapStreamParser
+from crawl_frontier import CrawlFrontier, score_url, NON_HTML_EXTENSIONS
+from url_utils import canonicalize_url
   
 class Crawler:  
-    def __init__(self, base_url, max_pages=20, max_depth=3, use_dynamic="playwright", screenshot_dir="screenshots"):  
+    def __init__(self, base_url, max_pages=20, max_depth=3, use_dynamic="playwright", screenshot_dir="screenshots", scraper=None,
+                 sitemap_concurrency=4, sitemap_url_limit=None, max_sitemaps=50, sitemap_scan_limit=None,
+                 score_fn=score_url):
         self.base_url = base_url  
         self.max_pages = max_pages  
         self.max_depth = max_depth  
         self.use_dynamic = use_dynamic  
         self.screenshot_dir = screenshot_dir  
         os.makedirs(self.screenshot_dir, exist_ok=True)  
+        # Canonical forms of pages already crawled
         self.visited_urls = set()  
-        self.scraper = WebScraper()  
+        # Ranks candidate pages so the page budget goes to high-value pages first
+        self.score_fn = score_fn
+        # Reuse the caller's scraper so all crawls share one browser pool
+        self.scraper = scraper or WebScraper()
         parsed_base_url = urlparse(self.base_url)  
         self.base_domain = f"{parsed_base_url.scheme}://{parsed_base_url.netloc}"  
         self.parsed_base_url = parsed_base_url  
+        self.robots_txt = None
+        self.sitemap_concurrency = sitemap_concurrency
+        # Best-scoring sitemap URLs kept as crawl candidates (headroom for failed pages)
+        self.sitemap_url_limit = sitemap_url_limit or max_pages * 3
+        self.max_sitemaps = max_sitemaps
+        # Stop reading sitemaps after this many in-domain candidates have been scored
+        self.sitemap_scan_limit = sitemap_scan_limit or self.sitemap_url_limit * 10
+        # Sitemap metadata (lastmod, changefreq, priority) keyed by page URL
+        self.sitemap_entries = {}
+        self.manifest = CrawlManifest(parsed_base_url.netloc)
+        self.crawl_log_file = DataManager.crawl_log_filename(parsed_base_url.netloc.replace('.', '_'))
+        # Records whose screenshot OCR is still running in the scraper's OCR pool
+        self.pending_ocr = []
   
-    def fetch_sitemap_urls(self):  
+    async def fetch_sitemap_urls(self):
         """  
-        Attempt to fetch the sitemap from standard locations and parse it to extract URLs.  
+        Stream the sitemaps listed in robots.txt and at the standard locations concurrently (up to
+        max_sitemaps) and return the sitemap_url_limit best-scoring in-domain URLs, best first.
+        Reading stops once sitemap_scan_limit candidates have been scored; only the kept
+        candidates are held in memory, however large the sitemaps are.
         """  
         logging.info(f"Attempting to fetch sitemap for {self.base_url}")  
-        possible_sitemap_urls = [  
+        sitemap_urls = await self.fetch_sitemap_urls_from_robots()
+        sitemap_urls += [
             urljoin(self.base_domain, 'sitemap.xml'),  
             urljoin(self.base_domain, 'sitemap_index.xml'),  
             urljoin(self.base_domain, 'sitemap'),  
         ]  
-        headers = {"User-Agent": "Mozilla/5.0"}  
-  
-        for sitemap_url in possible_sitemap_urls:  
-            try:  
-                response = requests.get(sitemap_url, headers=headers, timeout=10)  
-                if response.status_code == 200:  
-                    content_type = response.headers.get('Content-Type', '')  
-                    if 'xml' in content_type or sitemap_url.endswith('.xml'):  
-                        logging.info(f"Sitemap found at: {sitemap_url}")  
-                        urls = self.parse_sitemap(response.text)  
-                        if urls:  
-                            return urls  
-                        else:  
-                            logging.warning(f"Sitemap at {sitemap_url} contains no URLs.")  
-            except Exception as e:  
-                logging.error(f"Error fetching sitemap from {sitemap_url}: {e}")  
-  
-        # Try to find sitemap in robots.txt  
-        sitemap_urls = self.fetch_sitemap_from_robots()  
-        if sitemap_urls:  
-            return sitemap_urls  
+
+        # Min-heap of (score, -order, canonical, url, entry): the worst candidate is evicted first, and among
+        # equal scores the one listed later in the sitemaps
+        best = []
+        # Canonical URLs currently in the heap, for deduplication
+        kept = set()
+        order = 0
+        async with aclosing(self.iter_sitemap_entries(sitemap_urls)) as entries:
+            async for entry in entries:
+                url = entry['loc']
+                if not url.startswith(self.base_domain) or NON_HTML_EXTENSIONS.search(urlparse(url).path):
+                    continue
+                canonical = canonicalize_url(url)
+                if canonical in kept:
+                    continue
+                candidate = (self.score_fn(canonical, 0), -order, canonical, url, entry)
+                order += 1
+                if len(best) < self.sitemap_url_limit:
+                    heapq.heappush(best, candidate)
+                    kept.add(canonical)
+                elif candidate[:2] > best[0][:2]:
+                    kept.discard(heapq.heapreplace(best, candidate)[2])
+                    kept.add(canonical)
+                if order >= self.sitemap_scan_limit:
+                    logging.info(f"Scored {order} sitemap URLs for {self.base_url}; not reading further")
+                    break
+
+        best.sort(key=lambda candidate: candidate[:2], reverse=True)
+        urls = [url for _, _, _, url, _ in best]
+        self.sitemap_entries.update((url, entry) for _, _, _, url, entry in best)
+        if not urls:
+            logging.warning(f"No sitemap found for {self.base_url}")  
+        else:
+            logging.info(f"Kept the {len(urls)} best of {order} URLs in sitemaps for {self.base_url}")
+        return urls
   
-        logging.warning(f"No sitemap found for {self.base_url}")  
-        return []  
-  
-    def fetch_sitemap_from_robots(self):  
-        """  
-        Parse the robots.txt file to find the sitemap URL.  
-        """  
-        robots_url = urljoin(self.base_domain, 'robots.txt')  
-        headers = {"User-Agent": "Mozilla/5.0"}  
-        try:  
-            response = requests.get(robots_url, headers=headers, timeout=10)  
-            if response.status_code == 200:  
-                for line in response.text.split('\n'):  
-                    if line.lower().startswith('sitemap:'):  
-                        sitemap_url = line.split(':', 1)[1].strip()  
-                        return self.parse_sitemap_url(sitemap_url)  
-        except Exception as e:  
-            logging.error(f"Error fetching robots.txt from {robots_url}: {e}")  
-        return []  
-  
-    @staticmethod  
-    def parse_sitemap(xml_content):  
-        """  
-        Parse the sitemap XML content and extract URLs.  
+    async def fetch_robots_txt(self):
+        """
+        Fetch robots.txt once per crawl and apply its Crawl-delay to the shared rate limiter.
+        """
+        if self.robots_txt is not None:
+            return self.robots_txt
+        self.robots_txt = ""
+        robots_url = urljoin(self.base_domain, 'robots.txt')
+        headers = {"User-Agent": "Mozilla/5.0"}
+        try:
+            response = await self.scraper.http.get(robots_url, headers=headers, timeout=10, cache_source="robots")
+            if response.status_code == 200:
+                self.robots_txt = response.text
+        except Exception as e:
+            logging.error(f"Error fetching robots.txt from {robots_url}: {e}")
+
+        crawl_delay = self.scraper.rate_limiter.parse_crawl_delay(self.robots_txt)
+        if crawl_delay:
+            self.scraper.rate_limiter.set_crawl_delay(self.parsed_base_url.netloc, crawl_delay)
+        return self.robots_txt
+
+    async def fetch_sitemap_urls_from_robots(self):
         """  
-        try:  
-            namespace = {'ns': 'http://www.sitemaps.org/schemas/sitemap/0.9'}  
-            root = ET.fromstring(xml_content)  
-            urls = []  
-  
-            if root.tag.endswith('sitemapindex'):  
-                sitemap_elements = root.findall('ns:sitemap', namespaces=namespace)  
-                if sitemap_elements:  
-                    logging.info(f"Found {len(sitemap_elements)} sitemaps in sitemap index.")  
-                else:  
-                    logging.warning("Sitemap index is empty.")  
-                for sitemap in sitemap_elements:  
-                    loc = sitemap.find('ns:loc', namespaces=namespace).text  
-                    urls.extend(Crawler.parse_sitemap_url(loc))  
-            elif root.tag.endswith('urlset'):  
-                url_elements = root.findall('ns:url', namespaces=namespace)  
-                if url_elements:  
-                    logging.info(f"Found {len(url_elements)} URLs in sitemap.")  
-                else:  
-                    logging.warning("Sitemap contains no URL entries.")  
-                for url_elem in url_elements:  
-                    loc = url_elem.find('ns:loc', namespaces=namespace).text  
-                    urls.append(loc)  
-            else:  
-                logging.warning("Unrecognized sitemap format.")  
-            return urls  
-        except Exception as e:  
-            logging.error(f"Error parsing sitemap: {e}")  
-            return []  
-  
-    @staticmethod  
-    def parse_sitemap_url(sitemap_url):  
-        """  
-        Fetch and parse the sitemap from a given URL.  
+        Return every sitemap URL listed in robots.txt.
         """  
-        headers = {"User-Agent": "Mozilla/5.0"}  
-        try:  
-            response = requests.get(sitemap_url, headers=headers, timeout=10)  
-            if response.status_code == 200:  
-                return Crawler.parse_sitemap(response.text)  
-        except Exception as e:  
-            logging.error(f"Error fetching sitemap from {sitemap_url}: {e}")  
-        return []  
+        sitemap_urls = []
+        for line in (await self.fetch_robots_txt()).split('\n'):
+            if line.strip().lower().startswith('sitemap:'):
+                sitemap_urls.append(line.split(':', 1)[1].strip())
+        return sitemap_urls
+  
+    async def stream_sitemap(self, sitemap_url):
+        """
+        Yield ('url', entry) and ('sitemap', loc) events from one sitemap while it downloads.
+        """
+        parser = SitemapStreamParser()
+        headers = {"User-Agent": "Mozilla/5.0"}
+        async for chunk in self.scraper.http.stream(sitemap_url, headers=headers, timeout=10, cache_source="sitemap"):
+            for event in parser.feed(chunk):
+                yield event
+        for event in parser.close():
+            yield event
+
+    async def iter_sitemap_entries(self, sitemap_urls):
+        """
+        Yield sitemap <url> entries from sitemap_urls and any child sitemaps they reference.
+        Up to sitemap_concurrency sitemaps download at once; closing the generator cancels them.
+        """
+        events = asyncio.Queue(maxsize=1000)
+        semaphore = asyncio.Semaphore(self.sitemap_concurrency)
+        seen_sitemaps = set()
+        tasks = set()
+
+        async def worker(sitemap_url):
+            try:
+                async with semaphore:
+                    async for event in self.stream_sitemap(sitemap_url):
+                        await events.put(event)
+            except asyncio.CancelledError:
+                # The consumer has stopped reading; putting 'done' on a full queue would block forever
+                raise
+            except Exception as e:
+                logging.debug(f"Skipping sitemap {sitemap_url}: {e}")
+            await events.put(('done', sitemap_url))
+
+        def schedule(sitemap_url):
+            if sitemap_url in seen_sitemaps or len(seen_sitemaps) >= self.max_sitemaps:
+                return False
+            seen_sitemaps.add(sitemap_url)
+            tasks.add(asyncio.create_task(worker(sitemap_url)))
+            return True
+
+        running = sum(1 for sitemap_url in sitemap_urls if schedule(sitemap_url))
+        try:
+            while running:
+                kind, item = await events.get()
+                if kind == 'done':
+                    running -= 1
+                elif kind == 'sitemap':
+                    running += schedule(item)
+                else:
+                    yield item
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
   
     async def scrape_sitemap_urls(self, urls):  
         """  
         Scrape full HTML content from the list of URLs provided by the sitemap.  
+        Pages whose sitemap lastmod matches the last crawl reuse their stored content.
         """  
         logging.info(f"Starting to scrape {len(urls)} URLs from sitemap.")  
   
@@ -136,33 +196,43 @@ class Crawler:
             logging.warning(f"No URLs found in sitemap for {self.base_url}")  
             return all_data  # Return empty data  
   
+        # Visit the highest scoring pages first; duplicates collapse onto their canonical URL
+        frontier = CrawlFrontier(score_fn=self.score_fn)
+        for url in urls:
+            if url.startswith(self.base_domain):
+                frontier.push(url)
+        urls = [frontier.pop()[0] for _ in range(len(frontier))]
+        stored_pages = self.load_unchanged_pages(urls)
+
         for url in urls:  
             if len(self.visited_urls) >= self.max_pages:  
                 logging.info(f"Reached max pages limit: {self.max_pages}")  
                 break  
-            if url in self.visited_urls:  
-                continue  
-            if not url.startswith(self.base_domain):  
+            if canonicalize_url(url) in self.visited_urls:
                 continue  
+            if url in stored_pages:
+                logging.info(f"Reusing stored content for unchanged page: {url}")
+                all_data.append(stored_pages[url])
+                self.visited_urls.add(canonicalize_url(url))
+                continue
             try:  
                 logging.info(f"Visiting URL from sitemap: {url}")  
                 content, ocr_text = await self.scrape_url(url)  
                 if content or ocr_text:  
                     logging.info(f"Content extracted from: {url}")  
-                    all_data.append({"url": url, "html_content": content, "ocr_text": ocr_text})  
-                    DataManager.append_to_json_file(  
-                        f"logs/crawled_data_{self.parsed_base_url.netloc.replace('.', '_')}.json",  
-                        {"url": url, "html_content": content, "ocr_text": ocr_text},  
-                    )  
+                    all_data.append(self.record_page(url, content, ocr_text))
+                    self.manifest.record(url, self.sitemap_entries.get(url))
                 else:  
                     logging.warning(f"No content extracted from: {url}")  
   
-                self.visited_urls.add(url)  
-                await asyncio.sleep(1)  # Delay to be polite to the server  
+                self.visited_urls.add(canonicalize_url(url))
   
             except Exception as e:  
                 logging.error(f"Error processing {url}: {e}")  
   
+        await self.wait_for_ocr()
+        self.manifest.save()
+  
         visited_log_file = os.path.join("logs", f"visited_urls_{self.parsed_base_url.netloc.replace('.', '_')}.log")  
         with open(visited_log_file, "w", encoding="utf-8") as file:  
             file.write("\n".join(self.visited_urls))  
@@ -170,17 +240,37 @@ class Crawler:
   
         return all_data  
   
+    def load_unchanged_pages(self, urls):
+        """
+        Return stored crawl records for the sitemap URLs within the page budget whose lastmod
+        is unchanged since the last crawl, keyed by URL.
+        """
+        candidates = [url for url in dict.fromkeys(urls) if url.startswith(self.base_domain)][:self.max_pages]
+        unchanged = {
+            url for url in candidates
+            if self.manifest.is_unchanged(url, self.sitemap_entries.get(url, {}).get('lastmod'))
+        }
+        if not unchanged:
+            return {}
+        stored_pages = {}
+        for record in DataManager.iter_jsonl_file(self.crawl_log_file, dedupe_key='url'):
+            if record.get('url') in unchanged:
+                stored_pages[record['url']] = record
+        logging.info(f"{len(stored_pages)} of {len(candidates)} sitemap pages are unchanged since the last crawl.")
+        return stored_pages
+
     async def crawl_website_recursive(self):  
         """  
         Recursively crawl a website and scrape full HTML content.  
         """  
         logging.info(f"Starting recursive crawl for {self.base_url}")  
-        to_visit = [(self.base_url, 0)]  
+        to_visit = CrawlFrontier(score_fn=self.score_fn, max_depth=self.max_depth)
+        to_visit.push(self.base_url, 0)
         all_data = []  
   
         while to_visit and len(self.visited_urls) < self.max_pages:  
-            current_url, depth = to_visit.pop(0)  
-            if current_url in self.visited_urls or depth > self.max_depth:  
+            current_url, depth = to_visit.pop()
+            if canonicalize_url(current_url) in self.visited_urls:
                 continue  
   
             try:  
@@ -188,30 +278,25 @@ class Crawler:
                 content, ocr_text = await self.scrape_url(current_url)  
                 if content or ocr_text:  
                     logging.info(f"Content extracted from: {current_url}")  
-                    all_data.append({"url": current_url, "html_content": content, "ocr_text": ocr_text})  
-                    DataManager.append_to_json_file(  
-                        f"logs/crawled_data_{self.parsed_base_url.netloc.replace('.', '_')}.json",  
-                        {"url": current_url, "html_content": content, "ocr_text": ocr_text},  
-                    )  
+                    all_data.append(self.record_page(current_url, content, ocr_text))
                 else:  
                     logging.warning(f"No content extracted from: {current_url}")  
   
-                self.visited_urls.add(current_url)  
+                self.visited_urls.add(canonicalize_url(current_url))
   
                 # Parse links for further crawling  
                 soup = BeautifulSoup(content, 'html.parser')  
                 if soup:  
                     for a_tag in soup.find_all('a', href=True):  
-                        link = urljoin(self.base_url, a_tag['href'])  
-                        if link not in self.visited_urls and link.startswith(self.base_domain):  
+                        link = urljoin(current_url, a_tag['href'])
+                        if link.startswith(self.base_domain) and to_visit.push(link, depth + 1):
                             logging.info(f"Enqueuing subpage: {link}")  
-                            to_visit.append((link, depth + 1))  
-  
-                await asyncio.sleep(1)  # Delay to be polite to the server  
   
             except Exception as e:  
                 logging.error(f"Error processing {current_url}: {e}")  
   
+        await self.wait_for_ocr()
+  
         visited_log_file = os.path.join("logs", f"visited_urls_{self.parsed_base_url.netloc.replace('.', '_')}.log")  
         with open(visited_log_file, "w", encoding="utf-8") as file:  
             file.write("\n".join(self.visited_urls))  
@@ -219,18 +304,79 @@ class Crawler:
   
         return all_data  
   
+    def record_page(self, url, content, ocr_text):
+        """
+        Build the crawl record for a scraped page and append it to the crawl log. When ocr_text is
+        still a pending OCR job, the record is completed and logged once the job finishes.
+        """
+        if isinstance(ocr_text, str):
+            record = {"url": url, "html_content": content, "ocr_text": ocr_text}
+            DataManager.append_to_jsonl_file(self.crawl_log_file, record, compact_key="url")
+            return record
+
+        record = {"url": url, "html_content": content, "ocr_text": ""}
+
+        async def attach_ocr_text(ocr_job):
+            record["ocr_text"] = await ocr_job
+            DataManager.append_to_jsonl_file(self.crawl_log_file, record, compact_key="url")
+
+        self.pending_ocr.append(asyncio.create_task(attach_ocr_text(ocr_text)))
+        return record
+
+    async def wait_for_ocr(self):
+        """
+        Wait until every deferred OCR job of this crawl has been attached to its record.
+        """
+        if self.pending_ocr:
+            logging.info(f"Waiting for {len(self.pending_ocr)} pending OCR jobs for {self.base_url}")
+            await asyncio.gather(*self.pending_ocr, return_exceptions=True)
+            self.pending_ocr = []
+
     async def scrape_url(self, url):  
         """  
         Scrape content from a single URL.  
+        use_dynamic="auto" tries a plain HTTP fetch first and escalates to Playwright only when
+        the page looks client-rendered; the outcome is remembered for the rest of the domain.
+        Rendered pages return their OCR as a pending job (see record_page).
         """  
+        if self.use_dynamic == "auto":
+            return await self.scrape_url_adaptive(url)
         if self.use_dynamic == "playwright":  
             content, ocr_text = await self.scraper.extract_dynamic_content_with_playwright_async(  
-                url, self.screenshot_dir  
+                url, self.screenshot_dir, defer_ocr=True
             )  
         else:  
-            headers = {"User-Agent": "Mozilla/5.0"}  
-            response = requests.get(url, headers=headers, timeout=10)  
-            response.raise_for_status()  
-            content = response.text  
+            content = await self.fetch_static_content(url)
             ocr_text = ""  
-        return content, ocr_text  
\ No newline at end of file
+        return content, ocr_text  
+
+    async def fetch_static_content(self, url):
+        headers = {"User-Agent": "Mozilla/5.0"}  
+        response = await self.scraper.http.get(url, headers=headers, timeout=10, cache_source="page", polite=True)
+        response.raise_for_status()  
+        return response.text
+
+    async def scrape_url_adaptive(self, url):
+        """
+        Static-first scrape with Playwright escalation for client-rendered pages.
+        """
+        domain = urlparse(url).netloc.lower()
+        decision = self.scraper.rendering_decisions.get(domain)
+        if decision != "playwright":
+            try:
+                content = await self.fetch_static_content(url)
+            except Exception as e:
+                # Blocked or failed static fetches fall back to the browser for this page only
+                logging.info(f"Static fetch failed for {url} ({e}); rendering with Playwright.")
+                content = None
+            if content and decision == "static":
+                return content, ""
+            if content:
+                needs_rendering, reason = self.scraper.looks_client_rendered(content)
+                self.scraper.rendering_decisions[domain] = "playwright" if needs_rendering else "static"
+                logging.info(
+                    f"Rendering mode for {domain}: {self.scraper.rendering_decisions[domain]} ({reason})"
+                )
+                if not needs_rendering:
+                    return content, ""
+        return await self.scraper.extract_dynamic_content_with_playwright_async(url, self.screenshot_dir, defer_ocr=True)
@@ -1,8 +1,43 @@
 import os  
 import json  
 import logging  
+import tempfile
+import threading
+from jsonl_store import JsonlWriter, JsonlReader
+from results_store import ResultsStore
   
 class DataManager:  
+    # Guards read-modify-write cycles when several companies finish at once
+    _lock = threading.RLock()
+    # Open append handles for JSONL files, keyed by filename
+    _jsonl_writers = {}
+    # Key field of JSONL files that are compacted on close (e.g. crawl logs by url), keyed by filename
+    _jsonl_compact_keys = {}
+    # Indexed stores behind keyed result files such as competitive_analysis.json
+    _results_stores = {}
+    # Gzip the per-page crawl logs (crawled_data_*.jsonl.gz)
+    compress_crawl_logs = False
+
+    @staticmethod
+    def atomic_write_json(filename, data, indent=4):
+        """
+        Write data to a temp file next to filename and rename it into place,
+        so readers never see a partially written file.
+        """
+        directory = os.path.dirname(filename) or "."
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp_", suffix=".json")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as file:
+                json.dump(data, file, indent=indent)
+                file.flush()
+                os.fsync(file.fileno())
+            os.replace(tmp_path, filename)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
     @staticmethod  
     def load_json_file(filename):  
         """  
@@ -22,30 +57,88 @@ class DataManager:
         """  
         Save data to a JSON file.  
         """  
-        with open(filename, "w", encoding="utf-8") as file:  
-            json.dump(data, file, indent=4)  
+        with DataManager._lock:
+            DataManager.atomic_write_json(filename, data)
         logging.info(f"Data saved to {filename}")  
   
     @staticmethod  
     def append_to_json_file(filename, entry):  
         """  
         Append an entry to a JSON file, creating the file if it doesn't exist.  
-        """  
-        existing_data = []  
-        if os.path.exists(filename):  
-            with open(filename, "r", encoding="utf-8") as file:  
-                try:  
-                    existing_data = json.load(file)  
-                except json.JSONDecodeError as e:  
-                    logging.error(f"Error decoding JSON from {filename}: {e}")  
-        else:  
-            logging.info(f"File {filename} does not exist. It will be created.")  
+        Files named *.jsonl / *.jsonl.gz are appended to without rewriting.
+        """  
+        if filename.endswith((".jsonl", ".jsonl.gz")):
+            DataManager.append_to_jsonl_file(filename, entry)
+            return
+        with DataManager._lock:
+            existing_data = []  
+            if os.path.exists(filename):  
+                with open(filename, "r", encoding="utf-8") as file:  
+                    try:  
+                        existing_data = json.load(file)  
+                    except json.JSONDecodeError as e:  
+                        logging.error(f"Error decoding JSON from {filename}: {e}")  
+            else:  
+                logging.info(f"File {filename} does not exist. It will be created.")  
   
-        existing_data.append(entry)  
+            existing_data.append(entry)  
   
-        with open(filename, "w", encoding="utf-8") as file:  
-            json.dump(existing_data, file, indent=4)  
+            DataManager.atomic_write_json(filename, existing_data)
         logging.info(f"Appended data to {filename}")  
+
+    @staticmethod
+    def crawl_log_filename(name):
+        """
+        Path of the per-source crawl log, e.g. logs/crawled_data_example_com.jsonl.
+        """
+        suffix = ".jsonl.gz" if DataManager.compress_crawl_logs else ".jsonl"
+        return os.path.join("logs", f"crawled_data_{name}{suffix}")
+
+    @staticmethod
+    def append_to_jsonl_file(filename, entry, compact_key=None):
+        """
+        Append one record to a JSONL file through a buffered, append-only handle.
+        With compact_key, the file is compacted to the latest record per key on close.
+        """
+        with DataManager._lock:
+            if compact_key:
+                DataManager._jsonl_compact_keys[filename] = compact_key
+            writer = DataManager._jsonl_writers.get(filename)
+            if writer is None:
+                writer = DataManager._jsonl_writers[filename] = JsonlWriter(filename)
+            writer.write(entry)
+        logging.debug(f"Appended record to {filename}")
+
+    @staticmethod
+    def iter_jsonl_file(filename, dedupe_key=None):
+        """
+        Lazily stream records from a JSONL file, keeping only the latest record per dedupe_key if given.
+        """
+        with DataManager._lock:
+            writer = DataManager._jsonl_writers.get(filename)
+            if writer and filename.endswith(".gz"):
+                # An open gzip member has no trailer yet; finish it so it can be read
+                writer.close()
+                del DataManager._jsonl_writers[filename]
+            elif writer:
+                writer.flush()
+        return JsonlReader(filename).iter_records(dedupe_key=dedupe_key)
+
+    @staticmethod
+    def close_jsonl_files():
+        """
+        Flush and close all open JSONL handles, compacting duplicates in files appended with a compact_key.
+        """
+        with DataManager._lock:
+            writers = DataManager._jsonl_writers
+            DataManager._jsonl_writers = {}
+            for filename, writer in writers.items():
+                writer.close()
+                compact_key = DataManager._jsonl_compact_keys.get(filename)
+                if compact_key:
+                    before, after = JsonlReader(filename).compact(key_field=compact_key)
+                    if before != after:
+                        logging.info(f"Compacted {filename}: {before} -> {after} records")
   
     @staticmethod  
     def load_processed_companies(output_filename):  
@@ -87,44 +180,54 @@ class DataManager:
             json.dump(inquiries, file, indent=4)  
         logging.info(f"Inquiries saved to {filename}")  
   
+    @staticmethod
+    def results_store(filename, key_field='company_name'):
+        """
+        Return the indexed store backing a keyed JSON result file, opening it on first use.
+        """
+        with DataManager._lock:
+            store = DataManager._results_stores.get(filename)
+            if store is None:
+                store = DataManager._results_stores[filename] = ResultsStore(filename, key_field=key_field)
+            return store
+
     @staticmethod  
     def load_company_analysis(filename, company_name):  
         """  
-        Load the analysis for a specific company from a JSON file.  
-        """  
-        if os.path.exists(filename):  
-            with open(filename, "r", encoding="utf-8") as file:  
-                try:  
-                    data = json.load(file)  
-                    for item in data:  
-                        if item.get('company_name', '').lower().strip() == company_name.lower():  
-                            return item  
-                except json.JSONDecodeError as e:  
-                    logging.error(f"Error decoding JSON from {filename}: {e}")  
-        return None  
-  
+        Load the analysis for a specific company from the results store behind a JSON file.
+        """  
+        with DataManager._lock:
+            return DataManager.results_store(filename).get(company_name)
+
+    @staticmethod
+    def load_company_attachment(filename, company_name, kind, fingerprint=None):
+        """
+        Load derived data (e.g. a retrieval index) stored alongside a company's results.
+        """
+        with DataManager._lock:
+            return DataManager.results_store(filename).get_attachment(company_name, kind, fingerprint)
+
+    @staticmethod
+    def save_company_attachment(filename, company_name, kind, data, fingerprint=None):
+        with DataManager._lock:
+            DataManager.results_store(filename).put_attachment(company_name, kind, data, fingerprint)
+
     @staticmethod  
     def update_json_file(filename, updated_entry, key_field='company_name'):  
         """  
-        Update an existing entry in a JSON file, or append it if it doesn't exist.  
-        """  
-        existing_data = []  
-        if os.path.exists(filename):  
-            with open(filename, "r", encoding="utf-8") as file:  
-                try:  
-                    existing_data = json.load(file)  
-                except json.JSONDecodeError as e:  
-                    logging.error(f"Error decoding JSON from {filename}: {e}")  
-                    existing_data = []  
-  
-        updated = False  
-        for idx, entry in enumerate(existing_data):  
-            if entry.get(key_field, '').lower().strip() == updated_entry.get(key_field, '').lower().strip():  
-                existing_data[idx] = updated_entry  
-                updated = True  
-                break  
-        if not updated:  
-            existing_data.append(updated_entry)  
-        with open(filename, "w", encoding="utf-8") as file:  
-            json.dump(existing_data, file, indent=4)  
-        logging.info(f"Updated data in {filename}")  
\ No newline at end of file
+        Update an existing entry in a keyed JSON file, or append it if it doesn't exist.
+        The entry is upserted into the results store; call export_results_files() to rewrite the JSON.
+        """  
+        with DataManager._lock:
+            DataManager.results_store(filename, key_field=key_field).upsert(updated_entry)
+        logging.info(f"Updated data in {filename}")  
+
+    @staticmethod
+    def export_results_files():
+        """
+        Rewrite every JSON result file whose store changed since the last export.
+        """
+        with DataManager._lock:
+            for store in DataManager._results_stores.values():
+                if store.dirty:
+                    store.export_json(DataManager.atomic_write_json)
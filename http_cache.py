@@ -0,0 +1,171 @@
+import os
+import json
+import time
+import hashlib
+import logging
+from data_manager import DataManager
+from url_utils import normalize_url
+
+
+class HttpCache:
+    """
+    On-disk cache of fetched and rendered pages. Metadata (headers, ETag, Last-Modified,
+    fetch time) is stored per normalized URL; bodies are stored content-addressed by
+    their SHA-256, so identical bodies served under several URLs are kept once.
+    prune() keeps the stored bodies under max_bytes by dropping the least recently fetched entries.
+    """
+
+    # Seconds an entry is served without revalidation, per source
+    DEFAULT_TTLS = {
+        "robots": 24 * 3600,
+        "sitemap": 6 * 3600,
+        "page": 24 * 3600,
+        "article": 7 * 24 * 3600,
+        "rendered": 24 * 3600,
+    }
+
+    def __init__(self, cache_dir=os.path.join("cache", "http"), ttls=None, max_bytes=2 * 1024 ** 3):
+        self.cache_dir = cache_dir
+        self.ttls = dict(self.DEFAULT_TTLS, **(ttls or {}))
+        self.max_bytes = max_bytes
+        self.meta_dir = os.path.join(cache_dir, "meta")
+        self.blob_dir = os.path.join(cache_dir, "blobs")
+        os.makedirs(self.meta_dir, exist_ok=True)
+        os.makedirs(self.blob_dir, exist_ok=True)
+
+    def _meta_path(self, url, namespace):
+        key = hashlib.sha256(f"{namespace}:{normalize_url(url)}".encode("utf-8")).hexdigest()
+        return os.path.join(self.meta_dir, key[:2], f"{key}.json")
+
+    def _blob_path(self, digest):
+        return os.path.join(self.blob_dir, digest[:2], digest)
+
+    def get(self, url, namespace="http"):
+        """
+        Return the cached entry for url (metadata plus 'body' bytes), or None.
+        """
+        meta_path = self._meta_path(url, namespace)
+        if not os.path.exists(meta_path):
+            return None
+        try:
+            with open(meta_path, "r", encoding="utf-8") as file:
+                entry = json.load(file)
+            with open(self._blob_path(entry["body_sha256"]), "rb") as file:
+                entry["body"] = file.read()
+            return entry
+        except (OSError, KeyError, json.JSONDecodeError) as e:
+            logging.warning(f"Ignoring corrupt cache entry for {url}: {e}")
+            return None
+
+    def put(self, url, body, headers=None, namespace="http", source="page", extra=None):
+        """
+        Store body and validators for url. extra holds namespace-specific fields (e.g. OCR text).
+        """
+        headers = dict(headers or {})
+        digest = hashlib.sha256(body).hexdigest()
+        blob_path = self._blob_path(digest)
+        if not os.path.exists(blob_path):
+            os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+            tmp_path = f"{blob_path}.tmp{os.getpid()}"
+            with open(tmp_path, "wb") as file:
+                file.write(body)
+            os.replace(tmp_path, blob_path)
+
+        lower_headers = {k.lower(): v for k, v in headers.items()}
+        entry = {
+            "url": url,
+            "source": source,
+            "fetched_at": time.time(),
+            "etag": lower_headers.get("etag"),
+            "last_modified": lower_headers.get("last-modified"),
+            "headers": headers,
+            "body_sha256": digest,
+            "extra": extra or {},
+        }
+        DataManager.atomic_write_json(self._meta_path(url, namespace), entry, indent=None)
+        return entry
+
+    def touch(self, url, entry, namespace="http"):
+        """
+        Mark an entry as freshly revalidated (e.g. after a 304).
+        """
+        entry = {k: v for k, v in entry.items() if k != "body"}
+        entry["fetched_at"] = time.time()
+        DataManager.atomic_write_json(self._meta_path(url, namespace), entry, indent=None)
+
+    def is_fresh(self, entry):
+        ttl = self.ttls.get(entry.get("source"), 0)
+        return time.time() - entry.get("fetched_at", 0) < ttl
+
+    def prune(self):
+        """
+        Delete entries, least recently fetched first, until the stored bodies fit in max_bytes,
+        then delete bodies no entry references. Returns (entries removed, bytes freed).
+        """
+        entries = []
+        references = {}
+        for directory, _, filenames in os.walk(self.meta_dir):
+            for filename in filenames:
+                meta_path = os.path.join(directory, filename)
+                try:
+                    with open(meta_path, "r", encoding="utf-8") as file:
+                        entry = json.load(file)
+                    digest = entry["body_sha256"]
+                    fetched_at = entry.get("fetched_at", 0)
+                except (OSError, KeyError, TypeError, json.JSONDecodeError):
+                    # Corrupt or torn metadata is never served, so drop it
+                    self._remove(meta_path)
+                    continue
+                entries.append((fetched_at, meta_path, digest))
+                references[digest] = references.get(digest, 0) + 1
+
+        blob_sizes = {}
+        for directory, _, filenames in os.walk(self.blob_dir):
+            for filename in filenames:
+                blob_path = os.path.join(directory, filename)
+                try:
+                    blob_sizes[filename] = os.path.getsize(blob_path)
+                except OSError:
+                    continue
+
+        total_bytes = sum(size for digest, size in blob_sizes.items() if digest in references)
+        removed = 0
+        entries.sort()
+        for _, meta_path, digest in entries:
+            if total_bytes <= self.max_bytes:
+                break
+            self._remove(meta_path)
+            removed += 1
+            references[digest] -= 1
+            if not references[digest]:
+                del references[digest]
+                total_bytes -= blob_sizes.get(digest, 0)
+
+        freed = 0
+        for digest, size in blob_sizes.items():
+            if digest not in references:
+                self._remove(self._blob_path(digest))
+                freed += size
+        if removed or freed:
+            logging.info(f"Pruned HTTP cache: removed {removed} entries and {freed / 2 ** 20:.1f} MB of bodies; "
+                         f"{total_bytes / 2 ** 20:.1f} MB kept")
+        return removed, freed
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except OSError as e:
+            logging.warning(f"Could not remove cache file {path}: {e}")
+
+    @staticmethod
+    def conditional_headers(entry):
+        """
+        Request headers that let the server answer 304 Not Modified for this entry.
+        """
+        headers = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
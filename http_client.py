@@ -0,0 +1,192 @@
+import asyncio
+import json
+import logging
+import aiohttp
+from multidict import CIMultiDict
+
+
+class HttpError(Exception):
+    """
+    Raised for transport failures and non-2xx responses.
+    """
+
+    def __init__(self, message, status=None, url=None, response=None):
+        super().__init__(message)
+        self.status = status
+        self.url = url
+        self.response = response
+
+
+class HttpResponse:
+    """
+    Fully read response, detached from the connection so it can be used after the pool reclaims it.
+    """
+
+    def __init__(self, status, headers, body, url, encoding=None, from_cache=False):
+        self.status = status
+        self.status_code = status
+        self.headers = headers
+        self.body = body
+        self.url = url
+        self.encoding = encoding or "utf-8"
+        self.from_cache = from_cache
+
+    @property
+    def text(self):
+        return self.body.decode(self.encoding, errors="replace")
+
+    def json(self):
+        return json.loads(self.text)
+
+    def raise_for_status(self):
+        if not 200 <= self.status < 300:
+            raise HttpError(f"HTTP {self.status} for {self.url}", status=self.status, url=self.url, response=self)
+
+
+class HttpClient:
+    """
+    Shared aiohttp session with a pooled, keep-alive connector for all non-browser fetches.
+    """
+
+    def __init__(self, total_connections=100, connections_per_host=8, keepalive_timeout=30, timeout=10,
+                 user_agent="Mozilla/5.0", cache=None, rate_limiter=None):
+        self.total_connections = total_connections
+        self.connections_per_host = connections_per_host
+        self.keepalive_timeout = keepalive_timeout
+        self.timeout = timeout
+        self.user_agent = user_agent
+        # Optional HttpCache used by GETs that pass cache_source
+        self.cache = cache
+        # Optional HostRateLimiter applied to GETs made with polite=True
+        self.rate_limiter = rate_limiter
+        self._session = None
+
+    def _get_session(self):
+        # Created lazily so the session binds to the running event loop
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.total_connections,
+                limit_per_host=self.connections_per_host,
+                keepalive_timeout=self.keepalive_timeout,
+                ttl_dns_cache=300,
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                headers={"User-Agent": self.user_agent},
+            )
+        return self._session
+
+    async def request(self, method, url, headers=None, params=None, json=None, timeout=None):
+        """
+        Send a request and return an HttpResponse with the body already read.
+        """
+        session = self._get_session()
+        client_timeout = aiohttp.ClientTimeout(total=timeout or self.timeout)
+        try:
+            async with session.request(method, url, headers=headers, params=params, json=json,
+                                       timeout=client_timeout) as response:
+                body = await response.read()
+                return HttpResponse(
+                    status=response.status,
+                    headers=response.headers,
+                    body=body,
+                    url=str(response.url),
+                    encoding=response.charset,
+                )
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            raise HttpError(f"{method} {url} failed: {e!r}", url=url) from e
+
+    async def get(self, url, headers=None, params=None, timeout=None, cache_source=None, polite=False):
+        """
+        GET a URL. With cache_source (e.g. "sitemap", "page") the response is served from the
+        on-disk cache while fresh, and revalidated with If-None-Match/If-Modified-Since once stale.
+        With polite=True, requests that reach the network wait on the per-host rate limiter.
+        """
+        if not cache_source or self.cache is None or params:
+            await self._wait_politely(url, polite)
+            return await self.request("GET", url, headers=headers, params=params, timeout=timeout)
+
+        entry = self.cache.get(url)
+        if entry and self.cache.is_fresh(entry):
+            return self._cached_response(entry)
+
+        request_headers = dict(headers or {})
+        if entry:
+            request_headers.update(self.cache.conditional_headers(entry))
+        await self._wait_politely(url, polite)
+        response = await self.request("GET", url, headers=request_headers, timeout=timeout)
+        if response.status == 304 and entry:
+            logging.debug(f"Revalidated cached copy of {url}")
+            self.cache.touch(url, entry)
+            return self._cached_response(entry)
+        if response.status == 200:
+            self.cache.put(url, response.body, headers=response.headers, source=cache_source,
+                           extra={"encoding": response.encoding})
+        return response
+
+    async def stream(self, url, headers=None, timeout=None, cache_source=None, chunk_size=64 * 1024,
+                     max_cached_bytes=32 * 1024 * 1024):
+        """
+        Yield the response body of a GET in chunks as it arrives. Fresh or revalidated cache
+        entries are replayed from disk; a body is only cached when the caller consumed all of it.
+        """
+        entry = self.cache.get(url) if cache_source and self.cache is not None else None
+        if entry and self.cache.is_fresh(entry):
+            for start in range(0, len(entry["body"]), chunk_size):
+                yield entry["body"][start:start + chunk_size]
+            return
+
+        request_headers = dict(headers or {})
+        if entry:
+            request_headers.update(self.cache.conditional_headers(entry))
+        session = self._get_session()
+        # Bound the wait between chunks rather than the whole (possibly large) download
+        client_timeout = aiohttp.ClientTimeout(total=None, sock_connect=timeout or self.timeout,
+                                               sock_read=timeout or self.timeout)
+        try:
+            async with session.get(url, headers=request_headers, timeout=client_timeout) as response:
+                if response.status == 304 and entry:
+                    self.cache.touch(url, entry)
+                    for start in range(0, len(entry["body"]), chunk_size):
+                        yield entry["body"][start:start + chunk_size]
+                    return
+                if response.status != 200:
+                    raise HttpError(f"HTTP {response.status} for {url}", status=response.status, url=url)
+
+                buffered = [] if cache_source and self.cache is not None else None
+                buffered_bytes = 0
+                async for chunk in response.content.iter_chunked(chunk_size):
+                    if buffered is not None:
+                        buffered.append(chunk)
+                        buffered_bytes += len(chunk)
+                        if buffered_bytes > max_cached_bytes:
+                            buffered = None
+                    yield chunk
+                if buffered is not None:
+                    self.cache.put(url, b"".join(buffered), headers=response.headers, source=cache_source)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            raise HttpError(f"GET {url} failed: {e!r}", url=url) from e
+
+    async def _wait_politely(self, url, polite):
+        if polite and self.rate_limiter is not None:
+            await self.rate_limiter.acquire(url)
+
+    @staticmethod
+    def _cached_response(entry):
+        return HttpResponse(
+            status=200,
+            headers=CIMultiDict(entry.get("headers", {})),
+            body=entry["body"],
+            url=entry["url"],
+            encoding=entry.get("extra", {}).get("encoding"),
+            from_cache=True,
+        )
+
+    async def post(self, url, headers=None, json=None, timeout=None):
+        return await self.request("POST", url, headers=headers, json=json, timeout=timeout)
+
+    async def close(self):
+        if self._session and not self._session.closed:
+            await self._session.close()
+            logging.info("HTTP client session closed.")
+        self._session = None
@@ -0,0 +1,141 @@
+import os
+import io
+import gzip
+import json
+import time
+import logging
+import tempfile
+
+
+def _open_text(filename, mode):
+    """
+    Open a JSONL file as text, transparently handling gzip when the name ends with .gz.
+    """
+    if filename.endswith(".gz"):
+        return gzip.open(filename, mode + "t", encoding="utf-8")
+    return open(filename, mode, encoding="utf-8", buffering=io.DEFAULT_BUFFER_SIZE * 16)
+
+
+class JsonlWriter:
+    """
+    Append-only JSONL writer. Records are buffered and flushed every flush_every
+    records; the file is fsynced at most every fsync_every records or fsync_interval seconds.
+    """
+
+    def __init__(self, filename, flush_every=20, fsync_every=100, fsync_interval=5.0):
+        self.filename = filename
+        self.flush_every = flush_every
+        self.fsync_every = fsync_every
+        self.fsync_interval = fsync_interval
+        os.makedirs(os.path.dirname(filename) or ".", exist_ok=True)
+        self._raw = open(filename, "ab")
+        # Appending a new gzip member keeps earlier members readable as one stream
+        self._gzip = gzip.GzipFile(fileobj=self._raw, mode="ab") if filename.endswith(".gz") else None
+        self._file = io.TextIOWrapper(self._gzip or self._raw, encoding="utf-8")
+        self._unflushed = 0
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def write(self, record):
+        self._file.write(json.dumps(record, ensure_ascii=False, separators=(",", ":")))
+        self._file.write("\n")
+        self._unflushed += 1
+        self._unsynced += 1
+        if self._unsynced >= self.fsync_every or time.monotonic() - self._last_sync >= self.fsync_interval:
+            self.flush(fsync=True)
+        elif self._unflushed >= self.flush_every:
+            self.flush()
+
+    def flush(self, fsync=False):
+        if self._file.closed:
+            return
+        self._file.flush()
+        if self._gzip:
+            self._gzip.flush()
+        self._raw.flush()
+        self._unflushed = 0
+        if fsync:
+            os.fsync(self._raw.fileno())
+            self._unsynced = 0
+            self._last_sync = time.monotonic()
+
+    def close(self):
+        if not self._file.closed:
+            self.flush(fsync=True)
+            self._file.close()
+            self._raw.close()
+
+
+class JsonlReader:
+    """
+    Lazily streams records from a JSONL file, optionally keeping only the latest record per key.
+    """
+
+    def __init__(self, filename):
+        self.filename = filename
+
+    def _iter_lines(self):
+        if not os.path.exists(self.filename):
+            return
+        with _open_text(self.filename, "r") as file:
+            line_number = 0
+            try:
+                for line_number, line in enumerate(file):
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        yield line_number, json.loads(line)
+                    except json.JSONDecodeError as e:
+                        # A crash can leave a torn last line; skip it rather than fail the read
+                        logging.warning(f"Skipping malformed line {line_number + 1} in {self.filename}: {e}")
+            except EOFError:
+                logging.warning(f"{self.filename} ends in a truncated gzip member after line {line_number + 1}")
+
+    def iter_records(self, dedupe_key=None):
+        """
+        Yield records in file order. With dedupe_key, only the last record for each key is
+        yielded (at the position of that last occurrence); memory stays bounded by the key set.
+        Records without the key are never deduplicated.
+        """
+        if dedupe_key is None:
+            for _, record in self._iter_lines():
+                yield record
+            return
+
+        latest_lines = {}
+        for line_number, record in self._iter_lines():
+            key = record.get(dedupe_key) if isinstance(record, dict) else None
+            if key is not None:
+                latest_lines[key] = line_number
+        keep = set(latest_lines.values())
+        for line_number, record in self._iter_lines():
+            key = record.get(dedupe_key) if isinstance(record, dict) else None
+            if key is None or line_number in keep:
+                yield record
+
+    def compact(self, key_field="url"):
+        """
+        Rewrite the file keeping only the latest record per key (records without the key are all
+        kept). Returns (records_before, records_after).
+        """
+        if not os.path.exists(self.filename):
+            return 0, 0
+        records_before = sum(1 for _ in self._iter_lines())
+        directory = os.path.dirname(self.filename) or "."
+        suffix = ".jsonl.gz" if self.filename.endswith(".gz") else ".jsonl"
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp_", suffix=suffix)
+        os.close(fd)
+        records_after = 0
+        try:
+            with _open_text(tmp_path, "w") as file:
+                for record in self.iter_records(dedupe_key=key_field):
+                    file.write(json.dumps(record, ensure_ascii=False, separators=(",", ":")))
+                    file.write("\n")
+                    records_after += 1
+            os.replace(tmp_path, self.filename)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return records_before, records_after
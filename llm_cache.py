@@ -0,0 +1,97 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import logging
+
+
+class LlmCache:
+    """
+    SQLite cache of LLM responses keyed by a hash of the endpoint, deployment/model, messages and
+    sampling parameters, so identical requests are answered locally. Least recently used entries
+    are evicted once the cache exceeds max_bytes; entries stored with a TTL (online models whose
+    answers go stale) expire.
+    """
+
+    def __init__(self, db_path=os.path.join("cache", "llm", "responses.sqlite3"), max_bytes=256 * 1024 * 1024):
+        self.db_path = db_path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT PRIMARY KEY,"
+            " response TEXT NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " created_at REAL NOT NULL,"
+            " last_used REAL NOT NULL,"
+            " expires_at REAL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used)")
+        self._conn.commit()
+
+    @staticmethod
+    def key(endpoint, model, messages, params=None):
+        """
+        Stable hash of everything that determines a completion.
+        """
+        request = {"endpoint": endpoint, "model": model, "messages": messages, "params": params or {}}
+        return hashlib.sha256(json.dumps(request, sort_keys=True, separators=(",", ":")).encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        now = time.time()
+        row = self._conn.execute("SELECT response, expires_at FROM responses WHERE key = ?", (key,)).fetchone()
+        if row and row[1] is not None and row[1] <= now:
+            self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            self._conn.commit()
+            row = None
+        if not row:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._conn.execute("UPDATE responses SET last_used = ? WHERE key = ?", (now, key))
+        self._conn.commit()
+        return row[0]
+
+    def put(self, key, response, ttl=None):
+        now = time.time()
+        self._conn.execute(
+            "INSERT OR REPLACE INTO responses (key, response, size, created_at, last_used, expires_at) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (key, response, len(response.encode("utf-8")), now, now, now + ttl if ttl else None),
+        )
+        self._conn.commit()
+        self._evict()
+
+    def _evict(self):
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        self._conn.execute("DELETE FROM responses WHERE expires_at IS NOT NULL AND expires_at <= ?", (time.time(),))
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        evicted = []
+        for key, size in self._conn.execute("SELECT key, size FROM responses ORDER BY last_used"):
+            if total <= self.max_bytes:
+                break
+            evicted.append((key,))
+            total -= size
+        self._conn.executemany("DELETE FROM responses WHERE key = ?", evicted)
+        self._conn.commit()
+        logging.info(f"Evicted {len(evicted)} least recently used LLM responses from {self.db_path}")
+
+    def stats(self):
+        entries, size = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+        return {"hits": self.hits, "misses": self.misses, "entries": entries, "bytes": size}
+
+    def close(self):
+        stats = self.stats()
+        logging.info(
+            f"LLM response cache: {stats['hits']} hits, {stats['misses']} misses, "
+            f"{stats['entries']} entries ({stats['bytes'] / (1024 * 1024):.1f} MB)"
+        )
+        self._conn.close()
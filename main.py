@@ -1,3 +1,4 @@
+import argparse
 import asyncio  
 import logging  
 import csv  
@@ -5,12 +6,87 @@ import time
 from logger_setup import LoggerSetup  
 from company_processor import CompanyProcessor  
 from data_manager import DataManager  
-  
-async def main():  
+
+
+def parse_args():
+    """
+    Parse command line options for the pipeline run.
+    """
+    parser = argparse.ArgumentParser(description="Competitive landscape pipeline")
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=4,
+        help="Number of companies processed concurrently (default: 4).",
+    )
+    parser.add_argument(
+        "--ocr-workers",
+        type=int,
+        default=None,
+        help="Number of OCR worker processes (default: half the CPU cores).",
+    )
+    parser.add_argument(
+        "--no-ocr",
+        action="store_true",
+        help="Skip screenshots and OCR of rendered pages (images are then not downloaded either).",
+    )
+    parser.add_argument(
+        "--dedup-threshold",
+        type=float,
+        default=0.8,
+        help="Similarity (0-1] at which scraped texts count as near-duplicates (default: 0.8).",
+    )
+    return parser.parse_args()
+
+
+async def process_single_company(company_processor, company, idx, total_companies, websites_dict, semaphore):
+    """
+    Process one company inside the worker pool, keeping the skip logic and timing logs per company.
+    """
+    company_name = company.get("name", "").strip()
+    if not company_name:
+        logging.warning("A company entry is missing the 'name' key. Skipping...")
+        return None
+
+    async with semaphore:
+        # Start timer for this company
+        company_start_time = time.time()
+        failed = None
+
+        try:
+            existing_analysis = DataManager.load_company_analysis("logs/competitive_analysis.json", company_name)
+            if existing_analysis:
+                existing_inquiries = set(existing_analysis.get("inquiry_answers", {}).keys())
+                all_inquiries = set([inq['question'] for inq in company_processor.inquiries])
+                new_inquiries = all_inquiries - existing_inquiries
+                if not new_inquiries:
+                    logging.info(f"Skipping {company_name}, inquiries are already up-to-date.")
+                    return None
+                logging.info(f"Processing new inquiries for {company_name}")
+            else:
+                logging.info(f"Processing company {company_name} ({idx}/{total_companies}).")
+
+            failed = await company_processor.process_company(
+                company_name,
+                company.get('website', '').strip(),
+                websites_dict,
+                existing_analysis=existing_analysis
+            )
+        except Exception as e:
+            logging.error(f"Unhandled error while processing {company_name}: {e}")
+
+        # Calculate the time taken for this company
+        company_end_time = time.time()
+        company_elapsed_time = company_end_time - company_start_time
+        logging.info(f"Processed {company_name} ({idx}/{total_companies}) in {company_elapsed_time:.2f} seconds.")
+        return failed
+
+
+async def main(concurrency=4, ocr_workers=None, ocr_enabled=True, dedup_threshold=0.8):  
     # Initialize logging  
     LoggerSetup.setup_logging()  
   
-    company_processor = CompanyProcessor()  
+    company_processor = CompanyProcessor(ocr_workers=ocr_workers, ocr_enabled=ocr_enabled, dedup_threshold=dedup_threshold)  
   
     # Read competitor_companies.csv and build competitor_data['companies'] and websites_dict  
     competitor_data = {'companies': []}  
@@ -30,51 +106,26 @@ async def main():
         return  
   
     total_companies = len(competitor_data['companies'])  
-    logging.info(f"Total companies to process: {total_companies}")  
+    concurrency = max(1, concurrency)
+    logging.info(f"Total companies to process: {total_companies} (concurrency: {concurrency})")
   
     # Start the total timer  
     total_start_time = time.time()  
   
-    # Process each company  
-    for idx, company in enumerate(competitor_data["companies"], start=1):  
-        company_name = company.get("name", "").strip()  
-        if not company_name:  
-            logging.warning("A company entry is missing the 'name' key. Skipping...")  
-            continue  
-        company_name_normalized = company_name.lower()  
-  
-        # Start timer for this company  
-        company_start_time = time.time()  
-  
-        existing_analysis = DataManager.load_company_analysis("logs/competitive_analysis.json", company_name)  
-        if existing_analysis:  
-            existing_inquiries = set(existing_analysis.get("inquiry_answers", {}).keys())  
-            all_inquiries = set([inq['question'] for inq in company_processor.inquiries])  
-            new_inquiries = all_inquiries - existing_inquiries  
-            if not new_inquiries:  
-                logging.info(f"Skipping {company_name}, inquiries are already up-to-date.")  
-                continue  
-            else:  
-                logging.info(f"Processing new inquiries for {company_name}")  
-                failed = await company_processor.process_company(  
-                    company_name,  
-                    company.get('website', '').strip(),  
-                    websites_dict,  
-                    existing_analysis=existing_analysis  
-                )  
-        else:  
-            logging.info(f"Processing company {company_name} ({idx}/{total_companies}).")  
-            failed = await company_processor.process_company(  
-                company_name,  
-                company.get('website', '').strip(),  
-                websites_dict,  
-                existing_analysis=None  
-            )  
-  
-        # Calculate the time taken for this company  
-        company_end_time = time.time()  
-        company_elapsed_time = company_end_time - company_start_time  
-        logging.info(f"Processed {company_name} ({idx}/{total_companies}) in {company_elapsed_time:.2f} seconds.")  
+    # Process companies as independent tasks, bounded by the semaphore
+    semaphore = asyncio.Semaphore(concurrency)
+    tasks = [
+        asyncio.create_task(
+            process_single_company(company_processor, company, idx, total_companies, websites_dict, semaphore)
+        )
+        for idx, company in enumerate(competitor_data["companies"], start=1)
+    ]
+    try:
+        await asyncio.gather(*tasks)
+    finally:
+        await company_processor.close()
+        DataManager.close_jsonl_files()
+        DataManager.export_results_files()
   
     # Calculate total elapsed time  
     total_end_time = time.time()  
@@ -82,4 +133,10 @@ async def main():
     logging.info(f"All companies processed in {total_elapsed_time:.2f} seconds.")  
   
 if __name__ == "__main__":  
-    asyncio.run(main())  
\ No newline at end of file
+    args = parse_args()
+    asyncio.run(main(
+        concurrency=args.concurrency,
+        ocr_workers=args.ocr_workers,
+        ocr_enabled=not args.no_ocr,
+        dedup_threshold=args.dedup_threshold,
+    ))
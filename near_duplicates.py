@@ -0,0 +1,194 @@
+import re
+import zlib
+import logging
+import numpy as np
+
+TOKEN_PATTERN = re.compile(r"\w+")
+MAX_HASH = np.iinfo(np.uint64).max
+
+
+class NearDuplicateFilter:
+    """
+    MinHash + LSH near-duplicate removal over a company's extracted records, run before chunking:
+    drops near-identical documents, paragraphs repeated across pages (shared headers/footers,
+    syndicated copy) and OCR lines the page text already covers.
+    """
+
+    def __init__(self, threshold=0.8, num_perm=128, shingle_size=3, min_paragraph_words=8,
+                 ocr_coverage=0.8, block_size=4096, seed=1):
+        if not 0 < threshold <= 1:
+            raise ValueError(f"threshold must be in (0, 1], got {threshold}")
+        # Estimated Jaccard similarity at or above which two texts count as duplicates
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        # Shorter paragraphs (headings, labels) are only removed when repeated exactly
+        self.min_paragraph_words = min_paragraph_words
+        # OCR lines whose words appear in the page text at this rate are dropped
+        self.ocr_coverage = ocr_coverage
+        # Shingles hashed per step, bounding the (num_perm x block_size) working array
+        self.block_size = block_size
+        rng = np.random.default_rng(seed)
+        # Multiply-shift hash family; odd multipliers, arithmetic wraps modulo 2**64
+        self._a = rng.integers(1, 2 ** 63, size=num_perm, dtype=np.uint64) | np.uint64(1)
+        self._b = rng.integers(0, 2 ** 63, size=num_perm, dtype=np.uint64)
+        self.bands, self.rows = self.lsh_params(threshold, num_perm)
+
+    @staticmethod
+    def lsh_params(threshold, num_perm):
+        """
+        Pick (bands, rows) with bands * rows == num_perm whose S-curve midpoint is closest to threshold.
+        """
+        candidates = [(bands, num_perm // bands) for bands in range(1, num_perm + 1) if num_perm % bands == 0]
+        return min(candidates, key=lambda params: abs((1 / params[0]) ** (1 / params[1]) - threshold))
+
+    @staticmethod
+    def tokens(text):
+        return TOKEN_PATTERN.findall((text or "").lower())
+
+    @staticmethod
+    def hash_strings(strings):
+        return np.fromiter((zlib.crc32(string.encode("utf-8")) for string in strings), dtype=np.uint64)
+
+    def shingle_hashes(self, text):
+        tokens = self.tokens(text)
+        size = self.shingle_size
+        if len(tokens) <= size:
+            shingles = {" ".join(tokens)} if tokens else set()
+        else:
+            shingles = {" ".join(tokens[i:i + size]) for i in range(len(tokens) - size + 1)}
+        return self.hash_strings(shingles)
+
+    def signatures(self, texts):
+        """
+        MinHash signature matrix (len(texts) x num_perm). Empty texts get an all-MAX_HASH row.
+        """
+        signatures = np.full((len(texts), self.num_perm), MAX_HASH, dtype=np.uint64)
+        for row, text in enumerate(texts):
+            hashes = self.shingle_hashes(text)
+            for start in range(0, hashes.size, self.block_size):
+                block = hashes[start:start + self.block_size]
+                permuted = (np.outer(self._a, block) + self._b[:, None]) >> np.uint64(32)
+                np.minimum(signatures[row], permuted.min(axis=1), out=signatures[row])
+        return signatures
+
+    def duplicate_of(self, signatures, valid):
+        """
+        For each row, the index of an earlier row it near-duplicates, or -1. LSH band buckets
+        propose candidates; the signature agreement rate confirms them against threshold.
+        """
+        duplicates = np.full(len(signatures), -1)
+        buckets = {}
+        for row in range(len(signatures)):
+            if not valid[row]:
+                continue
+            keys = [(band, signatures[row, band * self.rows:(band + 1) * self.rows].tobytes())
+                    for band in range(self.bands)]
+            candidates = set()
+            for key in keys:
+                candidates.update(buckets.get(key, ()))
+            if candidates:
+                candidates = np.fromiter(sorted(candidates), dtype=np.int64)
+                similarity = (signatures[candidates] == signatures[row]).mean(axis=1)
+                best = int(similarity.argmax())
+                if similarity[best] >= self.threshold:
+                    duplicates[row] = candidates[best]
+                    continue
+            # Only originals are indexed, so chains of duplicates resolve to the first copy
+            for key in keys:
+                buckets.setdefault(key, []).append(row)
+        return duplicates
+
+    def remove_duplicate_documents(self, records):
+        texts = [record.get("content") or record.get("ocr_text") or "" for record in records]
+        signatures = self.signatures(texts)
+        duplicates = self.duplicate_of(signatures, [bool(self.tokens(text)) for text in texts])
+        kept = []
+        for record, duplicate in zip(records, duplicates):
+            if duplicate >= 0:
+                logging.debug(f"Dropping {record.get('url')} as a near-duplicate of {records[duplicate].get('url')}")
+            else:
+                kept.append(record)
+        return kept, len(records) - len(kept)
+
+    def remove_repeated_paragraphs(self, records):
+        paragraphs = [
+            (index, paragraph)
+            for index, record in enumerate(records)
+            for paragraph in (record.get("content") or "").split("\n\n")
+        ]
+        keep = np.ones(len(paragraphs), dtype=bool)
+
+        # Exact repeats (after normalization) of any length, except headings which carry structure
+        seen = set()
+        for position, (_, paragraph) in enumerate(paragraphs):
+            if paragraph.startswith("#"):
+                continue
+            key = " ".join(self.tokens(paragraph))
+            if key in seen:
+                keep[position] = False
+            elif key:
+                seen.add(key)
+
+        # Near repeats among the remaining long paragraphs
+        long_positions = [
+            position for position, (_, paragraph) in enumerate(paragraphs)
+            if keep[position] and not paragraph.startswith("#")
+            and len(self.tokens(paragraph)) >= self.min_paragraph_words
+        ]
+        if long_positions:
+            signatures = self.signatures([paragraphs[position][1] for position in long_positions])
+            duplicates = self.duplicate_of(signatures, [True] * len(long_positions))
+            keep[np.asarray(long_positions)[duplicates >= 0]] = False
+
+        kept_paragraphs = [[] for _ in records]
+        for position, (index, paragraph) in enumerate(paragraphs):
+            if keep[position]:
+                kept_paragraphs[index].append(paragraph)
+        for record, kept in zip(records, kept_paragraphs):
+            record["content"] = "\n\n".join(kept)
+        return int((~keep).sum())
+
+    def remove_covered_ocr(self, records):
+        """
+        Drop OCR lines whose words already appear in the page text. Returns (records whose OCR
+        was dropped entirely, OCR lines removed).
+        """
+        dropped = lines_removed = 0
+        for record in records:
+            ocr_lines = (record.get("ocr_text") or "").splitlines()
+            page_tokens = self.hash_strings(set(self.tokens(record.get("content"))))
+            if not ocr_lines or not page_tokens.size:
+                continue
+            kept = []
+            for line in ocr_lines:
+                line_tokens = self.hash_strings(self.tokens(line))
+                if line_tokens.size and np.isin(line_tokens, page_tokens).mean() >= self.ocr_coverage:
+                    continue
+                kept.append(line)
+            lines_removed += len(ocr_lines) - len(kept)
+            record["ocr_text"] = "\n".join(kept)
+            dropped += not kept
+        return dropped, lines_removed
+
+    def filter_records(self, company_name, records):
+        """
+        Run all dedup passes over extracted {url, source, content, ocr_text} records and log
+        what was removed. Returns the filtered records; the input records are not modified.
+        """
+        records = [dict(record) for record in records]
+        chars_before = sum(len(record.get("content") or "") + len(record.get("ocr_text") or "") for record in records)
+
+        records, documents_removed = self.remove_duplicate_documents(records)
+        paragraphs_removed = self.remove_repeated_paragraphs(records)
+        ocr_dropped, ocr_lines_removed = self.remove_covered_ocr(records)
+        records = [record for record in records if record.get("content") or record.get("ocr_text")]
+
+        chars_after = sum(len(record.get("content") or "") + len(record.get("ocr_text") or "") for record in records)
+        removed_share = 1 - chars_after / chars_before if chars_before else 0
+        logging.info(
+            f"Deduplicated data for {company_name}: removed {documents_removed} near-duplicate documents, "
+            f"{paragraphs_removed} repeated paragraphs and {ocr_lines_removed} covered OCR lines "
+            f"({ocr_dropped} OCR texts dropped); {chars_before:,} -> {chars_after:,} chars ({removed_share:.0%} removed)"
+        )
+        return records
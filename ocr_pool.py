@@ -0,0 +1,67 @@
+import os
+import asyncio
+import logging
+from concurrent.futures import ProcessPoolExecutor
+
+
+class OcrPool:
+    """
+    Runs OCR in a dedicated process pool so tesseract never blocks the event loop.
+    Jobs go through a bounded queue: submit() waits when max_pending jobs are queued,
+    which throttles rendering when OCR falls behind.
+    """
+
+    def __init__(self, ocr_fn, workers=None, max_pending=8):
+        self.ocr_fn = ocr_fn
+        self.workers = workers or max(1, (os.cpu_count() or 2) // 2)
+        self.max_pending = max_pending
+        self._executor = None
+        self._queue = None
+        self._dispatchers = []
+
+    def _ensure_started(self):
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            self._queue = asyncio.Queue(maxsize=self.max_pending)
+            # One dispatcher per worker process keeps every process busy without oversubscribing
+            self._dispatchers = [asyncio.create_task(self._dispatch()) for _ in range(self.workers)]
+            logging.info(f"Started OCR pool with {self.workers} worker processes.")
+
+    async def submit(self, *args):
+        """
+        Queue an OCR job and return a future resolving to its text, or raising the job's error.
+        Waits while the queue is full.
+        """
+        self._ensure_started()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((args, future))
+        return future
+
+    async def ocr(self, *args):
+        return await (await self.submit(*args))
+
+    async def _dispatch(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            args, future = await self._queue.get()
+            try:
+                text = await loop.run_in_executor(self._executor, self.ocr_fn, *args)
+            except Exception as e:
+                # Covers a BrokenProcessPool too; callers must not mistake a failure for empty text
+                logging.error(f"OCR job failed for {args}: {e}")
+                if not future.done():
+                    future.set_exception(e)
+                continue
+            finally:
+                self._queue.task_done()
+            if not future.done():
+                future.set_result(text)
+
+    async def close(self):
+        for dispatcher in self._dispatchers:
+            dispatcher.cancel()
+        await asyncio.gather(*self._dispatchers, return_exceptions=True)
+        self._dispatchers = []
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
@@ -0,0 +1,109 @@
+import re
+import math
+from collections import Counter
+
+TOKEN_PATTERN = re.compile(r"\w+")
+# Words too common in questions and company text to help ranking
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "does", "do", "for", "from", "has", "have", "how",
+    "in", "is", "it", "its", "of", "on", "or", "that", "the", "their", "this", "to", "was", "what",
+    "when", "where", "which", "who", "why", "will", "with",
+}
+
+
+class PassageIndex:
+    """
+    BM25 index over a company's cleaned data, split into passages of a few hundred tokens, so each
+    inquiry is answered from its most relevant passages instead of the whole corpus. The index is
+    plain JSON (see to_dict) and is stored next to the company's results to be reused across runs.
+    """
+
+    VERSION = 1
+
+    def __init__(self, passages, k1=1.5, b=0.75):
+        # [{"url", "text", "tokens" (model tokens), "terms" ({term: count})}, ...]
+        self.passages = passages
+        self.k1 = k1
+        self.b = b
+        self.document_frequency = Counter(term for passage in passages for term in passage["terms"])
+        lengths = [sum(passage["terms"].values()) for passage in passages]
+        self.lengths = lengths
+        self.average_length = sum(lengths) / len(lengths) if lengths else 0
+
+    @staticmethod
+    def terms(text):
+        return [term for term in TOKEN_PATTERN.findall((text or "").lower()) if term not in STOPWORDS]
+
+    @staticmethod
+    def build(cleaned_data, chunker, passage_tokens=256):
+        """
+        Index cleaned {url, cleaned_content} entries, splitting each on paragraph boundaries into
+        passages of at most passage_tokens model tokens.
+        """
+        passages = []
+        for entry in cleaned_data:
+            if not isinstance(entry, dict):
+                continue
+            content = entry.get("cleaned_content")
+            if not isinstance(content, str):
+                content = str(content or "")
+            if not content.strip():
+                continue
+            for text in chunker.split_text(content, passage_tokens):
+                passages.append({
+                    "url": entry.get("url"),
+                    "text": text,
+                    "tokens": chunker.counter.count(text),
+                    "terms": dict(Counter(PassageIndex.terms(text))),
+                })
+        return PassageIndex(passages)
+
+    def to_dict(self):
+        return {"version": self.VERSION, "passages": self.passages}
+
+    @staticmethod
+    def from_dict(data):
+        if not isinstance(data, dict) or data.get("version") != PassageIndex.VERSION:
+            return None
+        return PassageIndex(data.get("passages", []))
+
+    def scores(self, query):
+        query_terms = set(self.terms(query))
+        count = len(self.passages)
+        idf = {
+            term: math.log(1 + (count - self.document_frequency[term] + 0.5) / (self.document_frequency[term] + 0.5))
+            for term in query_terms if self.document_frequency[term]
+        }
+        scores = []
+        for passage, length in zip(self.passages, self.lengths):
+            score = 0.0
+            norm = self.k1 * (1 - self.b + self.b * length / self.average_length) if self.average_length else self.k1
+            for term, weight in idf.items():
+                frequency = passage["terms"].get(term, 0)
+                if frequency:
+                    score += weight * frequency * (self.k1 + 1) / (frequency + norm)
+            scores.append(score)
+        return scores
+
+    def select(self, query, max_passages=8, token_budget=4000):
+        """
+        The highest-scoring passages for query, best first, stopping at max_passages or when the
+        next passage would exceed token_budget. Passages that match no query term are skipped,
+        unless none match (synonyms, another language): then passages are taken in corpus order.
+        """
+        scores = self.scores(query)
+        matched = any(score > 0 for score in scores)
+        if matched:
+            order = sorted(range(len(scores)), key=lambda index: scores[index], reverse=True)
+        else:
+            order = range(len(scores))
+        selected, used = [], 0
+        for index in order:
+            if len(selected) >= max_passages or (matched and scores[index] <= 0):
+                break
+            passage = self.passages[index]
+            if used + passage["tokens"] > token_budget:
+                continue
+            selected.append({"url": passage["url"], "text": passage["text"]})
+            used += passage["tokens"]
+        return selected
@@ -0,0 +1,116 @@
+import asyncio
+import logging
+import time
+from urllib.parse import urlparse
+
+
+class TokenBucket:
+    """
+    Token bucket for a single host. Waiters are served one at a time in arrival order.
+    """
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    async def take(self):
+        async with self.lock:
+            while True:
+                self._refill()
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class HostRateLimiter:
+    """
+    Per-host politeness: each host gets its own token bucket, so requests to
+    different hosts never wait on each other.
+    """
+
+    def __init__(self, requests_per_second=1.0, burst=2):
+        self.requests_per_second = requests_per_second
+        self.burst = burst
+        self._buckets = {}
+        self._crawl_delays = {}
+
+    @staticmethod
+    def host_of(url):
+        """
+        Return the bucket key for a URL (its lower-cased network location).
+        """
+        return urlparse(url).netloc.lower()
+
+    def set_crawl_delay(self, host, delay_seconds):
+        """
+        Honour a robots.txt Crawl-delay for host by slowing its bucket down.
+        """
+        if not delay_seconds or delay_seconds <= 0:
+            return
+        host = host.lower()
+        self._crawl_delays[host] = delay_seconds
+        bucket = self._buckets.get(host)
+        if bucket:
+            bucket.rate, bucket.capacity = self._limits_for(host)
+            bucket.tokens = min(bucket.tokens, bucket.capacity)
+        logging.info(f"Applying Crawl-delay of {delay_seconds}s for {host}")
+
+    async def acquire(self, url):
+        """
+        Wait until a request to the URL's host is allowed.
+        """
+        host = self.host_of(url)
+        bucket = self._buckets.get(host)
+        if bucket is None:
+            rate, capacity = self._limits_for(host)
+            bucket = self._buckets[host] = TokenBucket(rate, capacity)
+        await bucket.take()
+
+    def _limits_for(self, host):
+        rate = self.requests_per_second
+        capacity = self.burst
+        delay = self._crawl_delays.get(host)
+        if delay:
+            rate = min(rate, 1.0 / delay)
+            capacity = 1
+        return rate, max(1, capacity)
+
+    @staticmethod
+    def parse_crawl_delay(robots_txt, user_agent="*"):
+        """
+        Extract the Crawl-delay that applies to user_agent (falling back to '*') from robots.txt content.
+        """
+        delays = {}
+        agents = []
+        in_rules = False
+        for raw_line in robots_txt.splitlines():
+            line = raw_line.split('#', 1)[0].strip()
+            if ':' not in line:
+                continue
+            field, value = [part.strip() for part in line.split(':', 1)]
+            field = field.lower()
+            if field == 'user-agent':
+                # A new group starts once rules of the previous group were seen
+                if in_rules:
+                    agents = []
+                    in_rules = False
+                agents.append(value.lower())
+            else:
+                in_rules = True
+                if field == 'crawl-delay':
+                    try:
+                        delay = float(value)
+                    except ValueError:
+                        continue
+                    for agent in agents:
+                        delays[agent] = delay
+        return delays.get(user_agent.lower(), delays.get('*'))
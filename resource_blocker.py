@@ -0,0 +1,118 @@
+import logging
+from contextlib import asynccontextmanager
+from urllib.parse import urlparse
+
+try:
+    import tldextract
+    # Bundled public suffix list only; never fetch it over the network
+    _extract_domain = tldextract.TLDExtract(suffix_list_urls=())
+except ImportError:  # Falls back to COMMON_SECOND_LEVEL_SUFFIXES without tldextract
+    _extract_domain = None
+
+# Resource types that never contribute text to a render
+BLOCKED_RESOURCE_TYPES = {"font", "media", "texttrack", "manifest", "eventsource", "websocket"}
+
+# Analytics, ad, tag-manager, session-replay, consent and chat-widget hosts (subdomains included)
+BLOCKED_DOMAINS = {
+    "google-analytics.com", "googletagmanager.com", "googleadservices.com", "googlesyndication.com",
+    "doubleclick.net", "adservice.google.com", "facebook.net", "connect.facebook.net", "bat.bing.com",
+    "snap.licdn.com", "px.ads.linkedin.com", "ads-twitter.com", "analytics.twitter.com", "analytics.tiktok.com",
+    "hotjar.com", "hotjar.io", "clarity.ms", "fullstory.com", "mouseflow.com", "crazyegg.com", "luckyorange.com",
+    "segment.com", "segment.io", "mixpanel.com", "amplitude.com", "heapanalytics.com", "heap.io",
+    "hs-analytics.net", "hs-scripts.com", "hs-banner.com", "hsadspixel.net", "usemessages.com",
+    "pardot.com", "marketo.net", "mktoresp.com", "6sc.co", "bizible.com", "clearbit.com", "zoominfo.com",
+    "demandbase.com", "optimizely.com", "nr-data.net", "newrelic.com",
+    "intercom.io", "intercomcdn.com", "drift.com", "driftt.com", "zdassets.com", "zopim.com",
+    "livechatinc.com", "tawk.to", "crisp.chat", "olark.com", "qualified.com", "chatlio.com", "tidio.co",
+    "cookielaw.org", "onetrust.com", "cookiebot.com", "termly.io", "trustarc.com",
+    "taboola.com", "outbrain.com", "criteo.com", "adroll.com", "quantserve.com", "scorecardresearch.com",
+}
+
+# Typical transfer sizes used to estimate what a blocked request would have cost
+ESTIMATED_BYTES = {
+    "font": 40_000, "media": 500_000, "image": 60_000, "script": 35_000, "stylesheet": 20_000,
+    "xhr": 5_000, "fetch": 5_000, "document": 50_000, "texttrack": 5_000, "manifest": 1_000,
+}
+DEFAULT_ESTIMATED_BYTES = 10_000
+
+# Common public suffixes with two labels, used to find the registrable domain without tldextract
+COMMON_SECOND_LEVEL_SUFFIXES = {
+    "co.uk", "org.uk", "ac.uk", "gov.uk", "nhs.uk", "com.au", "net.au", "org.au", "co.nz", "org.nz",
+    "co.jp", "co.kr", "co.in", "co.il", "co.za", "com.br", "com.cn", "com.mx", "com.sg", "com.tr",
+    "com.hk", "com.tw", "com.ar", "com.co", "com.my", "com.ph",
+}
+
+
+class ResourceBlocker:
+    """
+    Aborts Playwright requests that cannot contribute text to a render: heavy resource types
+    and tracker/chat-widget hosts. Images are only blocked when OCR is off.
+    """
+
+    def __init__(self, blocked_resource_types=None, blocked_domains=None, allow_images=True):
+        self.blocked_resource_types = set(BLOCKED_RESOURCE_TYPES if blocked_resource_types is None
+                                          else blocked_resource_types)
+        if not allow_images:
+            self.blocked_resource_types.add("image")
+        self.blocked_domains = set(BLOCKED_DOMAINS if blocked_domains is None else blocked_domains)
+
+    @staticmethod
+    def site_of(host):
+        """
+        Registrable domain of host (e.g. "example.co.uk" for "www.example.co.uk").
+        """
+        if _extract_domain is not None:
+            parts = _extract_domain(host)
+            if parts.domain and parts.suffix:
+                return f"{parts.domain}.{parts.suffix}"
+            return host
+        labels = host.split(".")
+        size = 3 if ".".join(labels[-2:]) in COMMON_SECOND_LEVEL_SUFFIXES else 2
+        return ".".join(labels[-size:])
+
+    def block_reason(self, url, resource_type, page_url=None):
+        """
+        Return why the request should be blocked ("type:<resource type>" or "domain:<host>"), or None.
+        Hosts on the rendered page's own site are never blocked by domain, so a blocklisted
+        vendor's own website can still be crawled.
+        """
+        if resource_type in self.blocked_resource_types:
+            return f"type:{resource_type}"
+        host = (urlparse(url).hostname or "").lower()
+        if page_url and self.site_of(host) == self.site_of((urlparse(page_url).hostname or "").lower()):
+            return None
+        parts = host.split(".")
+        for index in range(len(parts) - 1):
+            if ".".join(parts[index:]) in self.blocked_domains:
+                return f"domain:{host}"
+        return None
+
+    @asynccontextmanager
+    async def blocking(self, page, page_url=None):
+        """
+        Block requests on page (rendering page_url) while the context is open. Yields per-page stats: requests seen,
+        requests blocked by reason, and an estimate of the bytes saved.
+        """
+        stats = {"requests": 0, "blocked_requests": 0, "blocked_bytes_estimate": 0, "blocked_by_reason": {}}
+
+        async def handle(route):
+            request = route.request
+            stats["requests"] += 1
+            reason = self.block_reason(request.url, request.resource_type, page_url)
+            if reason is None:
+                await route.continue_()
+                return
+            stats["blocked_requests"] += 1
+            stats["blocked_bytes_estimate"] += ESTIMATED_BYTES.get(request.resource_type, DEFAULT_ESTIMATED_BYTES)
+            stats["blocked_by_reason"][reason] = stats["blocked_by_reason"].get(reason, 0) + 1
+            await route.abort("blockedbyclient")
+
+        await page.route("**/*", handle)
+        try:
+            yield stats
+        finally:
+            try:
+                # Pages are reused from the pool, so the handler must not outlive this render
+                await page.unroute("**/*", handle)
+            except Exception as e:
+                logging.debug(f"Could not remove request routing: {e}")
@@ -0,0 +1,142 @@
+import os
+import json
+import time
+import sqlite3
+import logging
+
+
+class ResultsStore:
+    """
+    SQLite table of result entries keyed by normalized name, mirrored to a JSON file on export.
+    The JSON file stays the user-facing output: if it was edited or removed since the last
+    export, the table is re-synced from it on open. Derived per-entry data that does not belong
+    in the JSON (e.g. retrieval indexes) is kept as fingerprinted attachments.
+    """
+
+    def __init__(self, json_filename, key_field="company_name"):
+        self.json_filename = json_filename
+        self.key_field = key_field
+        self.db_path = os.path.splitext(json_filename)[0] + ".sqlite3"
+        os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS results ("
+            " name_key TEXT PRIMARY KEY,"
+            " position INTEGER NOT NULL,"
+            " data TEXT NOT NULL,"
+            " updated_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS attachments ("
+            " name_key TEXT NOT NULL,"
+            " kind TEXT NOT NULL,"
+            " fingerprint TEXT,"
+            " data TEXT NOT NULL,"
+            " updated_at REAL NOT NULL,"
+            " PRIMARY KEY (name_key, kind))"
+        )
+        self._conn.commit()
+        self.dirty = False
+        self._sync_from_json()
+
+    @staticmethod
+    def normalize_key(name):
+        return (name or "").lower().strip()
+
+    def get(self, name):
+        row = self._conn.execute(
+            "SELECT data FROM results WHERE name_key = ?", (self.normalize_key(name),)
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def upsert(self, entry):
+        """
+        Insert or replace an entry in place, keeping its original position for export.
+        """
+        self._conn.execute(
+            "INSERT INTO results (name_key, position, data, updated_at) "
+            "VALUES (?, (SELECT COALESCE(MAX(position), 0) + 1 FROM results), ?, ?) "
+            "ON CONFLICT(name_key) DO UPDATE SET data = excluded.data, updated_at = excluded.updated_at",
+            (self.normalize_key(entry.get(self.key_field, "")), json.dumps(entry), time.time()),
+        )
+        self._conn.commit()
+        self.dirty = True
+
+    def iter_entries(self):
+        for (data,) in self._conn.execute("SELECT data FROM results ORDER BY position"):
+            yield json.loads(data)
+
+    def get_attachment(self, name, kind, fingerprint=None):
+        """
+        Return the attachment of this kind for an entry, or None if missing or its fingerprint differs.
+        """
+        row = self._conn.execute(
+            "SELECT fingerprint, data FROM attachments WHERE name_key = ? AND kind = ?",
+            (self.normalize_key(name), kind),
+        ).fetchone()
+        if not row or (fingerprint is not None and row[0] != fingerprint):
+            return None
+        return json.loads(row[1])
+
+    def put_attachment(self, name, kind, data, fingerprint=None):
+        self._conn.execute(
+            "INSERT INTO attachments (name_key, kind, fingerprint, data, updated_at) VALUES (?, ?, ?, ?, ?) "
+            "ON CONFLICT(name_key, kind) DO UPDATE SET fingerprint = excluded.fingerprint, "
+            "data = excluded.data, updated_at = excluded.updated_at",
+            (self.normalize_key(name), kind, fingerprint, json.dumps(data), time.time()),
+        )
+        self._conn.commit()
+
+    def export_json(self, write_json):
+        """
+        Write all entries to the JSON file using write_json(filename, data).
+        """
+        write_json(self.json_filename, list(self.iter_entries()))
+        self._set_meta("json_mtime", str(os.path.getmtime(self.json_filename)))
+        self.dirty = False
+        logging.info(f"Exported results store to {self.json_filename}")
+
+    def close(self):
+        self._conn.close()
+
+    def _sync_from_json(self):
+        recorded_mtime = self._get_meta("json_mtime")
+        if not os.path.exists(self.json_filename):
+            if recorded_mtime is not None:
+                logging.info(f"{self.json_filename} was removed; clearing {self.db_path}")
+                self._conn.execute("DELETE FROM results")
+                self._conn.execute("DELETE FROM meta WHERE key = 'json_mtime'")
+                self._conn.commit()
+            return
+
+        json_mtime = str(os.path.getmtime(self.json_filename))
+        if json_mtime == recorded_mtime:
+            return
+        try:
+            with open(self.json_filename, "r", encoding="utf-8") as file:
+                entries = json.load(file)
+        except (json.JSONDecodeError, OSError) as e:
+            logging.error(f"Error importing {self.json_filename} into results store: {e}")
+            return
+
+        self._conn.execute("DELETE FROM results")
+        for entry in entries if isinstance(entries, list) else []:
+            if isinstance(entry, dict):
+                self.upsert(entry)
+        self._set_meta("json_mtime", json_mtime)
+        self.dirty = False
+        logging.info(f"Imported {self.json_filename} into results store {self.db_path}")
+
+    def _get_meta(self, key):
+        row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, key, value):
+        self._conn.execute(
+            "INSERT INTO meta (key, value) VALUES (?, ?) ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+            (key, value),
+        )
+        self._conn.commit()
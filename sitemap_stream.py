@@ -0,0 +1,72 @@
+import zlib
+import xml.etree.ElementTree as ET
+
+
+class SitemapStreamParser:
+    """
+    Incremental sitemap parser. Feed it raw bytes as they arrive (plain or gzip-compressed)
+    and it returns ('url', entry) and ('sitemap', loc) events as soon as each element closes.
+    Processed elements are discarded, so memory stays flat regardless of sitemap size.
+    """
+
+    ENTRY_FIELDS = ('loc', 'lastmod', 'changefreq', 'priority')
+
+    def __init__(self):
+        self._parser = ET.XMLPullParser(events=('start', 'end'))
+        self._decompressor = None
+        # Leading bytes held back until there are enough to sniff the gzip magic
+        self._head = b''
+        self._root = None
+
+    @staticmethod
+    def _local_name(tag):
+        return tag.rsplit('}', 1)[-1]
+
+    def feed(self, chunk):
+        if self._head is not None:
+            chunk = self._head + chunk
+            if len(chunk) < 2:
+                self._head = chunk
+                return []
+            self._head = None
+            # .xml.gz sitemaps are usually served without Content-Encoding, so sniff the gzip magic
+            if chunk[:2] == b'\x1f\x8b':
+                self._decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        if self._decompressor:
+            chunk = self._decompressor.decompress(chunk)
+        self._parser.feed(chunk)
+        return self._drain()
+
+    def close(self):
+        if self._head:
+            self._parser.feed(self._head)
+        if self._decompressor:
+            self._parser.feed(self._decompressor.flush())
+        self._parser.close()
+        return self._drain()
+
+    def _drain(self):
+        events = []
+        for event, element in self._parser.read_events():
+            if event == 'start':
+                if self._root is None:
+                    self._root = element
+                continue
+            name = self._local_name(element.tag)
+            if name == 'url':
+                entry = {field: None for field in self.ENTRY_FIELDS}
+                for child in element:
+                    field = self._local_name(child.tag)
+                    if field in entry and child.text:
+                        entry[field] = child.text.strip()
+                if entry['loc']:
+                    events.append(('url', entry))
+            elif name == 'sitemap':
+                for child in element:
+                    if self._local_name(child.tag) == 'loc' and child.text:
+                        events.append(('sitemap', child.text.strip()))
+            else:
+                continue
+            # Drop finished <url>/<sitemap> elements from the tree
+            self._root.clear()
+        return events
@@ -0,0 +1,21 @@
+import os
+import sys
+import pytest
+
+# Modules live flat at the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class FakeClock:
+    """Callable stand-in for time.time/time.monotonic that only moves when a test advances it."""
+
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def fake_clock():
+    return FakeClock()
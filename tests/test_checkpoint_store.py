@@ -0,0 +1,67 @@
+import json
+import os
+import pytest
+from checkpoint_store import CheckpointStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    return CheckpointStore("Acme, Inc.", base_dir=str(tmp_path))
+
+
+def rewrite(path, **changes):
+    with open(path, encoding="utf-8") as file:
+        envelope = json.load(file)
+    envelope.update(changes)
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump(envelope, file)
+
+
+def test_company_name_is_made_path_safe(store, tmp_path):
+    assert store.directory == os.path.join(str(tmp_path), "acme__inc_")
+
+
+def test_fingerprint_is_stable_and_input_sensitive():
+    assert CheckpointStore.fingerprint({"b": 1, "a": 2}, 3) == CheckpointStore.fingerprint({"a": 2, "b": 1}, 3)
+    assert CheckpointStore.fingerprint({"a": 2}, 3) != CheckpointStore.fingerprint({"a": 2}, 4)
+
+
+def test_round_trip_with_matching_fingerprint(store):
+    store.save("scrape", [{"url": "a"}], fingerprint="f1")
+    assert store.load("scrape", fingerprint="f1") == [{"url": "a"}]
+    assert store.load("scrape") == [{"url": "a"}]
+    assert store.load("clean") is None
+
+
+def test_rejects_stale_fingerprint(store):
+    store.save("scrape", [{"url": "a"}], fingerprint="f1")
+    assert store.load("scrape", fingerprint="f2") is None
+
+
+def test_rejects_wrong_version_or_stage(store):
+    store.save("scrape", [], fingerprint="f1")
+    rewrite(store.path("scrape"), version=CheckpointStore.VERSION + 1)
+    assert store.load("scrape", fingerprint="f1") is None
+
+    store.save("clean", [], fingerprint="f1")
+    rewrite(store.path("clean"), stage="scrape")
+    assert store.load("clean", fingerprint="f1") is None
+
+
+def test_rejects_torn_or_malformed_files(store):
+    store.save("scrape", [{"url": "a"}])
+    with open(store.path("scrape"), "r+", encoding="utf-8") as file:
+        file.truncate(10)
+    assert store.load("scrape") is None
+
+    with open(store.path("clean"), "w", encoding="utf-8") as file:
+        json.dump({"stage": "clean", "version": CheckpointStore.VERSION}, file)
+    assert store.load("clean") is None
+
+
+def test_clear_removes_all_stages(store):
+    store.save("scrape", [])
+    store.save("clean", [])
+    store.clear()
+    assert store.load("scrape") is None
+    assert not os.path.exists(store.directory)
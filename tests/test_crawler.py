@@ -0,0 +1,111 @@
+import asyncio
+import pytest
+from crawler import Crawler
+
+
+class StubScraper:
+    pass
+
+
+@pytest.fixture
+def new_crawler(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+
+    def make(**kwargs):
+        return Crawler("https://acme.com/", scraper=StubScraper(), **kwargs)
+
+    return make
+
+
+@pytest.fixture
+def make_crawler(new_crawler):
+    def make(entries, **kwargs):
+        crawler = new_crawler(**kwargs)
+        read = []
+
+        async def robots():
+            return []
+
+        async def iter_sitemap_entries(sitemap_urls):
+            for entry in entries:
+                read.append(entry["loc"])
+                yield entry
+
+        crawler.fetch_sitemap_urls_from_robots = robots
+        crawler.iter_sitemap_entries = iter_sitemap_entries
+        return crawler, read
+
+    return make
+
+
+def test_sitemap_keeps_best_scoring_in_domain_urls(make_crawler):
+    entries = [{"loc": f"https://acme.com/blog/post-{index}"} for index in range(50)] + [
+        {"loc": "https://acme.com/pricing", "lastmod": "2024-01-01"},
+        {"loc": "https://acme.com/products/a"},
+        {"loc": "https://acme.com/products/a#reviews"},
+        {"loc": "https://other.com/pricing"},
+        {"loc": "https://acme.com/brochure.pdf"},
+    ]
+    crawler, _ = make_crawler(entries, max_pages=1, sitemap_scan_limit=100)
+    urls = asyncio.run(crawler.fetch_sitemap_urls())
+    assert set(urls[:2]) == {"https://acme.com/pricing", "https://acme.com/products/a"}
+    assert len(urls) == 3
+    assert crawler.sitemap_entries["https://acme.com/pricing"]["lastmod"] == "2024-01-01"
+    assert set(crawler.sitemap_entries) == set(urls)
+
+
+def test_sitemap_reading_stops_at_scan_limit(make_crawler):
+    entries = [{"loc": f"https://acme.com/page-{index}"} for index in range(1000)]
+    crawler, read = make_crawler(entries, max_pages=2, sitemap_scan_limit=20)
+    urls = asyncio.run(crawler.fetch_sitemap_urls())
+    assert len(read) == 20
+    assert urls == [f"https://acme.com/page-{index}" for index in range(6)]
+
+
+def stub_sitemaps(crawler, sitemaps):
+    """Serve each sitemap URL's events from the sitemaps dict instead of the network."""
+
+    async def stream_sitemap(sitemap_url):
+        for event in sitemaps[sitemap_url]:
+            await asyncio.sleep(0)
+            yield event
+
+    crawler.stream_sitemap = stream_sitemap
+
+
+async def collect(generator):
+    return [entry["loc"] async for entry in generator]
+
+
+def test_sitemap_entries_follow_child_sitemaps_once(new_crawler):
+    crawler = new_crawler()
+    stub_sitemaps(crawler, {
+        "index.xml": [("sitemap", "pages.xml"), ("sitemap", "index.xml"), ("sitemap", "missing.xml")],
+        "pages.xml": [("url", {"loc": "https://acme.com/a"}), ("url", {"loc": "https://acme.com/b"})],
+    })
+    locs = asyncio.run(collect(crawler.iter_sitemap_entries(["index.xml", "pages.xml"])))
+    assert locs == ["https://acme.com/a", "https://acme.com/b"]
+
+
+def test_closing_sitemap_entries_early_cancels_workers_with_a_full_queue(new_crawler):
+    crawler = new_crawler(sitemap_concurrency=2)
+    big = [("url", {"loc": f"https://acme.com/{index}"}) for index in range(5000)]
+    stub_sitemaps(crawler, {"one.xml": big, "two.xml": big})
+
+    async def main():
+        generator = crawler.iter_sitemap_entries(["one.xml", "two.xml"])
+        locs = []
+        async for entry in generator:
+            locs.append(entry["loc"])
+            if len(locs) == 1:
+                # Let the workers fill the 1000-event queue before closing
+                for _ in range(3000):
+                    await asyncio.sleep(0)
+                break
+        # Cancelled workers used to block forever putting 'done' on the full queue
+        await asyncio.wait_for(generator.aclose(), timeout=5)
+        return locs, asyncio.all_tasks() - {asyncio.current_task()}
+
+    locs, leftover_tasks = asyncio.run(main())
+    assert locs == ["https://acme.com/0"]
+    assert not leftover_tasks
@@ -0,0 +1,63 @@
+import os
+import pytest
+import http_cache
+from http_cache import HttpCache
+
+
+@pytest.fixture
+def clock(monkeypatch, fake_clock):
+    monkeypatch.setattr(http_cache.time, "time", fake_clock)
+    return fake_clock
+
+
+@pytest.fixture
+def cache(tmp_path, clock):
+    return HttpCache(cache_dir=str(tmp_path / "http"))
+
+
+def blob_count(cache):
+    return sum(len(filenames) for _, _, filenames in os.walk(cache.blob_dir))
+
+
+def test_round_trip_and_identical_bodies_stored_once(cache):
+    cache.put("https://acme.com/a", b"same body", headers={"ETag": '"v1"'})
+    cache.put("https://acme.com/b", b"same body", namespace="rendered", source="rendered", extra={"ocr_text": "x"})
+    entry = cache.get("https://acme.com/a")
+    assert entry["body"] == b"same body"
+    assert HttpCache.conditional_headers(entry) == {"If-None-Match": '"v1"'}
+    assert cache.get("https://acme.com/b", namespace="rendered")["extra"] == {"ocr_text": "x"}
+    assert cache.get("https://acme.com/b") is None
+    assert blob_count(cache) == 1
+
+
+def test_freshness_follows_source_ttl_and_touch(cache, clock):
+    entry = cache.put("https://acme.com/sitemap.xml", b"<urlset/>", source="sitemap")
+    clock.now += HttpCache.DEFAULT_TTLS["sitemap"] + 1
+    assert not cache.is_fresh(cache.get("https://acme.com/sitemap.xml"))
+    cache.touch("https://acme.com/sitemap.xml", entry)
+    assert cache.is_fresh(cache.get("https://acme.com/sitemap.xml"))
+
+
+def test_prune_drops_least_recently_fetched_until_under_max_bytes(cache, clock):
+    cache.max_bytes = 25
+    for name in ("a", "b", "c"):
+        cache.put(f"https://acme.com/{name}", name.encode() * 10)
+        clock.now += 1
+    # Revalidating "a" makes "b" the least recently fetched entry
+    cache.touch("https://acme.com/a", cache.get("https://acme.com/a"))
+    assert cache.prune() == (1, 10)
+    assert cache.get("https://acme.com/b") is None
+    assert cache.get("https://acme.com/a")["body"] == b"a" * 10
+    assert cache.get("https://acme.com/c")["body"] == b"c" * 10
+    assert blob_count(cache) == 2
+
+
+def test_prune_keeps_shared_bodies_and_removes_orphans(cache):
+    cache.put("https://acme.com/a", b"shared")
+    cache.put("https://acme.com/b", b"shared")
+    cache.put("https://acme.com/c", b"old body")
+    cache.put("https://acme.com/c", b"new body")
+    assert cache.prune() == (0, len(b"old body"))
+    assert cache.get("https://acme.com/a")["body"] == b"shared"
+    assert cache.get("https://acme.com/c")["body"] == b"new body"
+    assert blob_count(cache) == 2
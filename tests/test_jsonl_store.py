@@ -0,0 +1,79 @@
+import json
+import pytest
+from data_manager import DataManager
+from jsonl_store import JsonlWriter, JsonlReader
+
+
+def write_records(filename, records):
+    writer = JsonlWriter(filename)
+    for record in records:
+        writer.write(record)
+    writer.close()
+
+
+@pytest.fixture
+def jsonl_file(tmp_path):
+    return str(tmp_path / "records.jsonl")
+
+
+@pytest.fixture(autouse=True)
+def close_open_writers():
+    yield
+    DataManager.close_jsonl_files()
+    DataManager._jsonl_compact_keys.clear()
+
+
+def test_round_trip(jsonl_file):
+    records = [{"url": "a", "text": "é"}, {"url": "b", "text": "x"}]
+    write_records(jsonl_file, records)
+    assert list(JsonlReader(jsonl_file).iter_records()) == records
+
+
+def test_gzip_appends_from_separate_writers_read_as_one_stream(tmp_path):
+    filename = str(tmp_path / "records.jsonl.gz")
+    write_records(filename, [{"url": "a"}])
+    write_records(filename, [{"url": "b"}])
+    assert [record["url"] for record in JsonlReader(filename).iter_records()] == ["a", "b"]
+
+
+def test_missing_file_yields_nothing(tmp_path):
+    assert list(JsonlReader(str(tmp_path / "missing.jsonl")).iter_records()) == []
+
+
+def test_torn_last_line_is_skipped(jsonl_file):
+    write_records(jsonl_file, [{"url": "a"}, {"url": "b"}])
+    with open(jsonl_file, "a", encoding="utf-8") as file:
+        file.write('{"url": "c", "html_con')
+    assert [record["url"] for record in JsonlReader(jsonl_file).iter_records()] == ["a", "b"]
+
+
+def test_dedupe_keeps_last_record_per_key_at_its_position(jsonl_file):
+    write_records(jsonl_file, [{"url": "a", "v": 1}, {"url": "b", "v": 1}, {"url": "a", "v": 2}])
+    assert list(JsonlReader(jsonl_file).iter_records(dedupe_key="url")) == [{"url": "b", "v": 1}, {"url": "a", "v": 2}]
+
+
+def test_dedupe_keeps_every_record_without_the_key(jsonl_file):
+    write_records(jsonl_file, [{"x": 1}, {"url": "a", "v": 1}, {"x": 2}, {"url": None}, {"url": "a", "v": 2}])
+    assert list(JsonlReader(jsonl_file).iter_records(dedupe_key="url")) == [
+        {"x": 1}, {"x": 2}, {"url": None}, {"url": "a", "v": 2},
+    ]
+
+
+def test_compact_rewrites_file_with_latest_records(jsonl_file):
+    write_records(jsonl_file, [{"url": "a", "v": 1}, {"x": 1}, {"url": "a", "v": 2}])
+    with open(jsonl_file, "a", encoding="utf-8") as file:
+        file.write('{"torn"')
+    assert JsonlReader(jsonl_file).compact(key_field="url") == (3, 2)
+    with open(jsonl_file, encoding="utf-8") as file:
+        assert [json.loads(line) for line in file] == [{"x": 1}, {"url": "a", "v": 2}]
+
+
+def test_close_compacts_only_files_appended_with_a_compact_key(tmp_path):
+    keyed = str(tmp_path / "crawl.jsonl")
+    unkeyed = str(tmp_path / "stats.jsonl")
+    for version in (1, 2):
+        DataManager.append_to_jsonl_file(keyed, {"url": "a", "v": version}, compact_key="url")
+        DataManager.append_to_jsonl_file(unkeyed, {"url": "a", "v": version})
+    DataManager.close_jsonl_files()
+    assert list(JsonlReader(keyed).iter_records()) == [{"url": "a", "v": 2}]
+    assert len(list(JsonlReader(unkeyed).iter_records())) == 2
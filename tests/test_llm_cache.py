@@ -0,0 +1,91 @@
+import pytest
+import llm_cache
+from llm_cache import LlmCache
+
+
+@pytest.fixture
+def clock(monkeypatch, fake_clock):
+    monkeypatch.setattr(llm_cache.time, "time", fake_clock)
+    return fake_clock
+
+
+@pytest.fixture
+def make_cache(tmp_path):
+    caches = []
+
+    def make(**kwargs):
+        cache = LlmCache(db_path=str(tmp_path / "responses.sqlite3"), **kwargs)
+        caches.append(cache)
+        return cache
+
+    yield make
+    for cache in caches:
+        cache.close()
+
+
+def test_key_is_stable_and_covers_every_input():
+    messages = [{"role": "user", "content": "hi"}]
+    key = LlmCache.key("https://endpoint", "gpt-4o", messages, {"temperature": 0, "max_tokens": 10})
+    assert key == LlmCache.key("https://endpoint", "gpt-4o", messages, {"max_tokens": 10, "temperature": 0})
+    assert key != LlmCache.key("https://endpoint", "gpt-4o-mini", messages, {"temperature": 0, "max_tokens": 10})
+    assert key != LlmCache.key("https://endpoint", "gpt-4o", messages, {"temperature": 0.5, "max_tokens": 10})
+    assert key != LlmCache.key("https://other", "gpt-4o", messages, {"temperature": 0, "max_tokens": 10})
+    assert LlmCache.key("e", "m", messages) == LlmCache.key("e", "m", messages, {})
+
+
+def test_get_counts_hits_and_misses(make_cache, clock):
+    cache = make_cache()
+    assert cache.get("k") is None
+    cache.put("k", "response")
+    assert cache.get("k") == "response"
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+    assert cache.stats()["entries"] == 1
+
+
+def test_entries_persist_across_instances(make_cache, clock):
+    make_cache().put("k", "response")
+    assert make_cache().get("k") == "response"
+
+
+def test_ttl_entries_expire(make_cache, clock):
+    cache = make_cache()
+    cache.put("online", "answer", ttl=60)
+    cache.put("forever", "answer")
+    clock.now += 59
+    assert cache.get("online") == "answer"
+    clock.now += 2
+    assert cache.get("online") is None
+    assert cache.get("forever") == "answer"
+    assert cache.stats()["entries"] == 1
+
+
+def test_evicts_least_recently_used_past_max_bytes(make_cache, clock):
+    cache = make_cache(max_bytes=30)
+    cache.put("a", "x" * 10)
+    clock.now += 1
+    cache.put("b", "x" * 10)
+    clock.now += 1
+    cache.put("c", "x" * 10)
+    clock.now += 1
+    # Reading "a" makes "b" the least recently used entry
+    assert cache.get("a") is not None
+    clock.now += 1
+    cache.put("d", "x" * 10)
+    assert cache.get("b") is None
+    assert all(cache.get(key) is not None for key in ("a", "c", "d"))
+    assert cache.stats()["bytes"] <= 30
+
+
+def test_eviction_drops_expired_entries_before_live_ones(make_cache, clock):
+    cache = make_cache(max_bytes=30)
+    cache.put("old", "x" * 10)
+    clock.now += 1
+    cache.put("stale", "x" * 10, ttl=5)
+    clock.now += 1
+    cache.put("live", "x" * 10)
+    clock.now += 10
+    cache.put("new", "x" * 10)
+    assert cache.get("old") == "x" * 10
+    assert cache.get("stale") is None
+    assert cache.stats()["entries"] == 3
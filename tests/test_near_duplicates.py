@@ -0,0 +1,70 @@
+import pytest
+from near_duplicates import NearDuplicateFilter
+
+ARTICLE = (
+    "Acme builds remote patient monitoring software that lets clinics track blood pressure, "
+    "glucose and weight readings between visits and alerts care teams when a reading is out of range."
+)
+FOOTER = "Copyright Acme Health Incorporated. All rights reserved. Privacy policy and terms of service apply."
+
+
+def test_rejects_invalid_threshold():
+    with pytest.raises(ValueError):
+        NearDuplicateFilter(threshold=0)
+
+
+def test_lsh_params_factor_num_perm():
+    bands, rows = NearDuplicateFilter.lsh_params(0.8, 128)
+    assert bands * rows == 128
+
+
+def test_signatures_are_deterministic_and_empty_text_never_matches():
+    dedup = NearDuplicateFilter()
+    first, second, empty = dedup.signatures([ARTICLE, ARTICLE.upper(), ""])
+    assert (first == second).all()
+    assert not (first == empty).any()
+
+
+def test_drops_near_duplicate_documents_keeping_the_first():
+    records = [
+        {"url": "a", "content": ARTICLE},
+        {"url": "a?utm_source=x", "content": ARTICLE + " Updated."},
+        {"url": "b", "content": "Pricing starts at ninety nine dollars per clinician per month, billed annually."},
+        {"url": "empty-1", "content": ""},
+        {"url": "empty-2", "content": ""},
+    ]
+    kept, removed = NearDuplicateFilter().remove_duplicate_documents(records)
+    assert [record["url"] for record in kept] == ["a", "b", "empty-1", "empty-2"]
+    assert removed == 1
+
+
+def test_removes_paragraphs_repeated_across_pages_but_keeps_headings():
+    records = [
+        {"url": "a", "content": f"# Overview\n\n{ARTICLE}\n\n{FOOTER}"},
+        {"url": "b", "content": f"# Overview\n\nPricing is per clinician per month.\n\n{FOOTER}"},
+    ]
+    assert NearDuplicateFilter().remove_repeated_paragraphs(records) == 1
+    assert records[0]["content"] == f"# Overview\n\n{ARTICLE}\n\n{FOOTER}"
+    assert records[1]["content"] == "# Overview\n\nPricing is per clinician per month."
+
+
+def test_drops_ocr_lines_covered_by_page_text():
+    records = [
+        {"url": "a", "content": ARTICLE, "ocr_text": "Acme remote patient monitoring\nTrusted by 500 clinics"},
+        {"url": "b", "content": ARTICLE, "ocr_text": "remote patient monitoring software"},
+        {"url": "c", "content": "", "ocr_text": "Only screenshot text"},
+    ]
+    assert NearDuplicateFilter().remove_covered_ocr(records) == (1, 2)
+    assert records[0]["ocr_text"] == "Trusted by 500 clinics"
+    assert records[1]["ocr_text"] == ""
+    assert records[2]["ocr_text"] == "Only screenshot text"
+
+
+def test_filter_records_leaves_input_untouched_and_drops_emptied_records():
+    records = [
+        {"url": "a", "content": ARTICLE, "ocr_text": ""},
+        {"url": "b", "content": ARTICLE, "ocr_text": ""},
+    ]
+    filtered = NearDuplicateFilter().filter_records("Acme", records)
+    assert [record["url"] for record in filtered] == ["a"]
+    assert records[1]["content"] == ARTICLE
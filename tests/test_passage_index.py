@@ -0,0 +1,44 @@
+from passage_index import PassageIndex
+from token_chunker import TokenChunker
+
+
+class WordCounter:
+    def count(self, text):
+        return len((text or "").split())
+
+
+CLEANED_DATA = [
+    {"url": "home", "cleaned_content": "Acme builds remote patient monitoring software for clinics."},
+    {"url": "pricing", "cleaned_content": "Acme pricing starts at 99 dollars per seat per month."},
+    {"url": "news", "cleaned_content": "Acme raised a Series B funding round led by Example Ventures."},
+    {"url": "empty", "cleaned_content": ""},
+]
+
+
+def build():
+    return PassageIndex.build(CLEANED_DATA, TokenChunker(counter=WordCounter()), passage_tokens=50)
+
+
+def test_ranks_matching_passages_first():
+    selected = build().select("What is the pricing per seat?", max_passages=2)
+    assert selected[0]["url"] == "pricing"
+    assert [passage["url"] for passage in build().select("funding round")] == ["news"]
+
+
+def test_respects_passage_count_and_token_budget():
+    index = build()
+    assert len(index.select("Acme", max_passages=2)) == 2
+    # Every passage is about ten words, so a 15 token budget fits one
+    assert len(index.select("Acme", token_budget=15)) == 1
+
+
+def test_falls_back_to_corpus_order_when_nothing_matches():
+    selected = build().select("Quels sont les tarifs ?", max_passages=2)
+    assert [passage["url"] for passage in selected] == ["home", "pricing"]
+
+
+def test_round_trips_through_dict():
+    index = build()
+    restored = PassageIndex.from_dict(index.to_dict())
+    assert restored.select("pricing") == index.select("pricing")
+    assert PassageIndex.from_dict({"version": 0, "passages": []}) is None
@@ -0,0 +1,38 @@
+import asyncio
+import rate_limiter
+from rate_limiter import TokenBucket
+
+
+def test_bucket_refills_at_rate_up_to_capacity(monkeypatch, fake_clock):
+    clock = fake_clock
+    monkeypatch.setattr(rate_limiter.time, "monotonic", clock)
+    bucket = TokenBucket(rate=2, capacity=3)
+    bucket.tokens = 0
+    clock.now += 1
+    bucket._refill()
+    assert bucket.tokens == 2
+    clock.now += 9
+    bucket._refill()
+    assert bucket.tokens == 3
+
+
+def test_take_spends_burst_then_waits_for_refill(monkeypatch, fake_clock):
+    clock = fake_clock
+    start = clock.now
+    monkeypatch.setattr(rate_limiter.time, "monotonic", clock)
+    sleeps = []
+
+    async def fake_sleep(seconds):
+        sleeps.append(seconds)
+        clock.now += seconds
+
+    monkeypatch.setattr(rate_limiter.asyncio, "sleep", fake_sleep)
+    bucket = TokenBucket(rate=4, capacity=2)
+
+    async def take(count):
+        for _ in range(count):
+            await bucket.take()
+
+    asyncio.run(take(3))
+    assert sleeps == [0.25]
+    assert clock.now - start == 0.25
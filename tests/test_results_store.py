@@ -0,0 +1,90 @@
+import json
+import os
+import pytest
+from results_store import ResultsStore
+
+
+def write_json(filename, data):
+    with open(filename, "w", encoding="utf-8") as file:
+        json.dump(data, file)
+
+
+@pytest.fixture
+def json_file(tmp_path):
+    return str(tmp_path / "competitive_analysis.json")
+
+
+def test_upsert_keeps_position_and_normalizes_keys(json_file):
+    store = ResultsStore(json_file)
+    store.upsert({"company_name": "Acme", "v": 1})
+    store.upsert({"company_name": "Beta", "v": 1})
+    store.upsert({"company_name": " ACME ", "v": 2})
+    assert store.get("acme") == {"company_name": " ACME ", "v": 2}
+    assert [entry["v"] for entry in store.iter_entries()] == [2, 1]
+    assert store.dirty
+    store.close()
+
+
+def test_export_round_trips_without_reimport(json_file):
+    store = ResultsStore(json_file)
+    store.upsert({"company_name": "Acme", "v": 1})
+    store.export_json(write_json)
+    assert not store.dirty
+    store.close()
+    with open(json_file, encoding="utf-8") as file:
+        assert json.load(file) == [{"company_name": "Acme", "v": 1}]
+    store = ResultsStore(json_file)
+    assert store.get("Acme") == {"company_name": "Acme", "v": 1}
+    assert not store.dirty
+    store.close()
+
+
+def test_reimports_json_edited_since_export(json_file):
+    store = ResultsStore(json_file)
+    store.upsert({"company_name": "Acme", "v": 1})
+    store.upsert({"company_name": "Beta", "v": 1})
+    store.export_json(write_json)
+    store.close()
+
+    write_json(json_file, [{"company_name": "Beta", "v": 5}, "not an entry"])
+    mtime = os.path.getmtime(json_file) + 10
+    os.utime(json_file, (mtime, mtime))
+    store = ResultsStore(json_file)
+    assert store.get("Acme") is None
+    assert list(store.iter_entries()) == [{"company_name": "Beta", "v": 5}]
+    store.close()
+
+
+def test_unreadable_json_keeps_the_table(json_file):
+    store = ResultsStore(json_file)
+    store.upsert({"company_name": "Acme", "v": 1})
+    store.export_json(write_json)
+    store.close()
+
+    with open(json_file, "w", encoding="utf-8") as file:
+        file.write("[{")
+    store = ResultsStore(json_file)
+    assert store.get("Acme") == {"company_name": "Acme", "v": 1}
+    store.close()
+
+
+def test_clears_table_after_json_is_deleted(json_file):
+    store = ResultsStore(json_file)
+    store.upsert({"company_name": "Acme", "v": 1})
+    store.export_json(write_json)
+    store.close()
+
+    os.remove(json_file)
+    store = ResultsStore(json_file)
+    assert list(store.iter_entries()) == []
+    store.close()
+
+
+def test_attachments_are_checked_against_fingerprint(json_file):
+    store = ResultsStore(json_file)
+    store.put_attachment("Acme", "passage_index", {"passages": []}, fingerprint="abc")
+    assert store.get_attachment("acme", "passage_index", "abc") == {"passages": []}
+    assert store.get_attachment("acme", "passage_index") == {"passages": []}
+    assert store.get_attachment("acme", "passage_index", "def") is None
+    assert store.get_attachment("acme", "other") is None
+    store.close()
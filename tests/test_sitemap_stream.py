@@ -0,0 +1,52 @@
+import gzip
+from sitemap_stream import SitemapStreamParser
+
+URLSET = b"""<?xml version="1.0" encoding="UTF-8"?>
+<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">
+  <url><loc> https://acme.com/ </loc><lastmod>2024-01-01</lastmod><priority>1.0</priority></url>
+  <url><lastmod>2024-01-02</lastmod></url>
+  <url><loc>https://acme.com/pricing</loc><changefreq>weekly</changefreq></url>
+</urlset>"""
+
+SITEMAP_INDEX = b"""<?xml version="1.0" encoding="UTF-8"?>
+<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">
+  <sitemap><loc>https://acme.com/sitemap-pages.xml</loc></sitemap>
+  <sitemap><loc>https://acme.com/sitemap-blog.xml.gz</loc><lastmod>2024-01-01</lastmod></sitemap>
+</sitemapindex>"""
+
+EXPECTED_URLS = [
+    ('url', {'loc': 'https://acme.com/', 'lastmod': '2024-01-01', 'changefreq': None, 'priority': '1.0'}),
+    ('url', {'loc': 'https://acme.com/pricing', 'lastmod': None, 'changefreq': 'weekly', 'priority': None}),
+]
+
+
+def parse_in_chunks(data, size):
+    parser = SitemapStreamParser()
+    events = []
+    for start in range(0, len(data), size):
+        events += parser.feed(data[start:start + size])
+    return events + parser.close()
+
+
+def test_plain_sitemap_parsed_across_chunk_boundaries():
+    for size in (1, 7, 64, len(URLSET)):
+        assert parse_in_chunks(URLSET, size) == EXPECTED_URLS
+
+
+def test_gzip_sitemap_detected_and_parsed_across_chunk_boundaries():
+    data = gzip.compress(URLSET)
+    for size in (1, 5, 32, len(data)):
+        assert parse_in_chunks(data, size) == EXPECTED_URLS
+
+
+def test_sitemap_index_yields_child_sitemaps():
+    assert parse_in_chunks(SITEMAP_INDEX, 16) == [
+        ('sitemap', 'https://acme.com/sitemap-pages.xml'),
+        ('sitemap', 'https://acme.com/sitemap-blog.xml.gz'),
+    ]
+
+
+def test_entries_are_emitted_as_soon_as_they_close():
+    parser = SitemapStreamParser()
+    first_url_end = URLSET.index(b"</url>") + len(b"</url>")
+    assert [event[1]['loc'] for event in parser.feed(URLSET[:first_url_end])] == ['https://acme.com/']
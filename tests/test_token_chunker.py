@@ -0,0 +1,49 @@
+import pytest
+from token_chunker import TokenChunker
+
+
+class CharCounter:
+    """One token per character, so budgets are easy to reason about."""
+
+    def count(self, text):
+        return len(text or "")
+
+
+def make_chunker(max_chunk_tokens):
+    return TokenChunker(counter=CharCounter(), max_chunk_tokens=max_chunk_tokens)
+
+
+def test_serialize_drops_empty_fields():
+    assert TokenChunker.serialize([{"url": "a", "content": "x", "ocr_text": ""}]) == '[{"url":"a","content":"x"}]'
+
+
+def test_input_budget_rejects_prompts_that_fill_the_context():
+    chunker = TokenChunker(counter=CharCounter(), context_tokens=1000, max_output_tokens=500)
+    assert chunker.input_budget(100) == 400
+    with pytest.raises(ValueError):
+        chunker.input_budget(600)
+
+
+def test_chunks_fit_budget_and_keep_record_order():
+    chunker = make_chunker(100)
+    records = [{"url": str(index), "content": "x" * size} for index, size in enumerate([60, 10, 30, 50, 20, 5])]
+    chunks = chunker.chunk(records)
+    assert sorted(record["url"] for chunk in chunks for record in chunk) == sorted(record["url"] for record in records)
+    for chunk in chunks:
+        assert len(TokenChunker.serialize(chunk)) <= 100
+        urls = [int(record["url"]) for record in chunk]
+        assert urls == sorted(urls)
+    # Small records share chunks instead of getting one each
+    assert len(chunks) < len(records)
+
+
+def test_oversized_record_is_split_on_paragraphs():
+    chunker = make_chunker(120)
+    paragraphs = [f"paragraph {index} " + "y" * 30 for index in range(6)]
+    record = {"url": "big", "content": "\n\n".join(paragraphs), "ocr_text": ""}
+    chunks = chunker.chunk([record])
+    parts = [part for chunk in chunks for part in chunk]
+    assert len(parts) > 1
+    assert all(part["url"] == "big" and part["part"].endswith(f"/{len(parts)}") for part in parts)
+    assert all(len(TokenChunker.serialize(chunk)) <= 120 for chunk in chunks)
+    assert "\n\n".join(part["content"] for part in parts) == record["content"]
@@ -0,0 +1,142 @@
+import re
+import logging
+from bs4 import BeautifulSoup, Comment
+
+# Markup that never carries main content
+NOISE_TAGS = ['script', 'style', 'noscript', 'template', 'svg', 'canvas', 'iframe', 'object', 'embed',
+              'input', 'select', 'textarea', 'head']
+# Page chrome, dropped only outside <main>/<article> (an article's own header holds its title and byline)
+CHROME_TAGS = ['nav', 'header', 'footer', 'aside']
+NOISE_ROLES = {'navigation', 'banner', 'contentinfo', 'complementary', 'search', 'dialog', 'alertdialog'}
+# Matched against each class name and the id: overlays and widgets anywhere on the page...
+NOISE_PATTERN = re.compile(
+    r'(^|[-_])(cookies?|consent|gdpr|newsletter|subscribe|popup|breadcrumbs?)([-_]|$)'
+    r'|^(share|sharing|social|modal|sidebar)([-_]|$)',
+    re.IGNORECASE,
+)
+# ...and chrome, which like CHROME_TAGS only counts outside the main content
+CHROME_PATTERN = re.compile(r'(^|[-_])(nav|navbar|navigation|menu|footer|header|masthead|banner)([-_]|$)',
+                            re.IGNORECASE)
+HEADING_TAGS = ['h1', 'h2', 'h3', 'h4', 'h5', 'h6']
+BLOCK_TAGS = ['p', 'div', 'section', 'article', 'main', 'li', 'ul', 'ol', 'table', 'tr',
+              'blockquote', 'pre', 'dl', 'dt', 'dd', 'figcaption', 'br', 'hr']
+# Paragraph separator used to mark block boundaries before whitespace is collapsed
+BLOCK_BREAK = '\u2029'
+
+
+class TextExtractor:
+    """
+    Turns crawled HTML into compact main-content text before it is sent to the LLM: scripts,
+    styles, SVG, navigation and other boilerplate are dropped, headings are kept as '#' lines
+    and every block becomes its own paragraph.
+    """
+
+    def __init__(self, min_main_ratio=0.25, min_ocr_line_chars=3):
+        # A <main>/<article> root is only trusted if it holds this share of the body text
+        self.min_main_ratio = min_main_ratio
+        self.min_ocr_line_chars = min_ocr_line_chars
+
+    def extract_text(self, html):
+        """
+        Return the main text of an HTML document, paragraphs separated by blank lines.
+        """
+        if not html:
+            return ""
+        soup = BeautifulSoup(html, 'html.parser')
+        for comment in soup.find_all(string=lambda text: isinstance(text, Comment)):
+            comment.extract()
+        for tag in soup.find_all(NOISE_TAGS):
+            tag.decompose()
+        for tag in soup.find_all(CHROME_TAGS):
+            if not self._in_content(tag):
+                tag.decompose()
+        for tag in soup.find_all(self._is_boilerplate):
+            tag.decompose()
+
+        root = self._main_root(soup)
+        for heading in root.find_all(HEADING_TAGS):
+            heading_text = heading.get_text(" ", strip=True)
+            marker = '#' * int(heading.name[1])
+            heading.replace_with(f"{BLOCK_BREAK}{marker} {heading_text}{BLOCK_BREAK}" if heading_text else "")
+        for item in root.find_all('li'):
+            item.insert(0, "- ")
+        for cell in root.find_all(['td', 'th']):
+            cell.insert_after(" | ")
+        for block in root.find_all(BLOCK_TAGS):
+            block.insert_before(BLOCK_BREAK)
+            block.insert_after(BLOCK_BREAK)
+
+        paragraphs = (" ".join(piece.split()).strip(" |") for piece in root.get_text().split(BLOCK_BREAK))
+        return "\n\n".join(paragraph for paragraph in paragraphs if paragraph and paragraph != "-")
+
+    @staticmethod
+    def _in_content(tag):
+        return tag.find_parent(['main', 'article']) is not None or tag.find_parent(attrs={'role': 'main'}) is not None
+
+    @staticmethod
+    def _is_boilerplate(tag):
+        if tag.attrs is None:
+            return False
+        if tag.get('aria-hidden') == 'true' or tag.get('role') in NOISE_ROLES or tag.has_attr('hidden'):
+            return True
+        if tag.name in ('body', 'main', 'article', 'html'):
+            return False
+        identifiers = [name for name in tag.get('class', []) + [tag.get('id') or ""] if name]
+        if any(NOISE_PATTERN.search(name) for name in identifiers):
+            return True
+        return any(CHROME_PATTERN.search(name) for name in identifiers) and not TextExtractor._in_content(tag)
+
+    def _main_root(self, soup):
+        body = soup.body or soup
+        body_chars = len(body.get_text(" ", strip=True))
+        for candidate in (soup.find('main'), soup.find(attrs={'role': 'main'}), soup.find('article')):
+            if candidate is not None and len(candidate.get_text(" ", strip=True)) >= body_chars * self.min_main_ratio:
+                return candidate
+        return body
+
+    def clean_ocr_text(self, ocr_text):
+        """
+        Collapse whitespace in OCR output and drop lines that are mostly recognition noise.
+        """
+        lines = (" ".join(line.split()) for line in (ocr_text or "").splitlines())
+        return "\n".join(
+            line for line in lines
+            if sum(char.isalnum() for char in line) >= self.min_ocr_line_chars
+        )
+
+    def extract_records(self, records, source):
+        """
+        Convert crawled {url, html_content, ocr_text} records into {url, source, content, ocr_text}.
+        Returns (extracted_records, raw_chars, extracted_chars).
+        """
+        extracted = []
+        raw_chars = extracted_chars = 0
+        for record in records:
+            raw_chars += len(record.get("html_content") or "") + len(record.get("ocr_text") or "")
+            try:
+                content = self.extract_text(record.get("html_content"))
+            except Exception as e:
+                logging.warning(f"Text extraction failed for {record.get('url')}: {e}")
+                content = ""
+            ocr_text = self.clean_ocr_text(record.get("ocr_text"))
+            if not content and not ocr_text:
+                continue
+            extracted.append({"url": record.get("url"), "source": source, "content": content, "ocr_text": ocr_text})
+            extracted_chars += len(content) + len(ocr_text)
+        return extracted, raw_chars, extracted_chars
+
+    def extract_sources(self, company_name, sources):
+        """
+        Extract every source in {source_name: records} and log the compression ratio per source.
+        Returns the combined extracted records in source order.
+        """
+        combined = []
+        for source, records in sources.items():
+            extracted, raw_chars, extracted_chars = self.extract_records(records or [], source)
+            ratio = raw_chars / extracted_chars if extracted_chars else 0
+            logging.info(
+                f"Extracted {source} text for {company_name}: {len(extracted)}/{len(records or [])} records, "
+                f"{raw_chars:,} -> {extracted_chars:,} chars ({ratio:.1f}x)"
+            )
+            combined.extend(extracted)
+        return combined
@@ -0,0 +1,176 @@
+import re
+import json
+import math
+import logging
+
+try:
+    import tiktoken
+except ImportError:  # Token counts fall back to a character estimate without tiktoken
+    tiktoken = None
+
+SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?])\s+|\n")
+
+
+class TokenCounter:
+    """
+    Counts model tokens with tiktoken, or estimates them from characters when tiktoken or its
+    encoding files are unavailable.
+    """
+
+    def __init__(self, model="gpt-4o-mini", fallback_encoding="o200k_base", chars_per_token=3.5):
+        self.chars_per_token = chars_per_token
+        self._encoding = None
+        if tiktoken is not None:
+            try:
+                self._encoding = tiktoken.encoding_for_model(model)
+            except KeyError:
+                self._encoding = self._load_encoding(fallback_encoding)
+            except Exception as e:
+                logging.warning(f"Could not load tiktoken encoding for {model}: {e}")
+        if self._encoding is None:
+            logging.info("Estimating token counts from text length.")
+
+    @staticmethod
+    def _load_encoding(name):
+        try:
+            return tiktoken.get_encoding(name)
+        except Exception as e:
+            logging.warning(f"Could not load tiktoken encoding {name}: {e}")
+            return None
+
+    def count(self, text):
+        if not text:
+            return 0
+        if self._encoding is not None:
+            return len(self._encoding.encode(text, disallowed_special=()))
+        # Deliberately pessimistic so estimated chunks still fit the context window
+        return math.ceil(len(text) / self.chars_per_token)
+
+
+class TokenChunker:
+    """
+    Packs records into as few prompt-sized chunks as possible. Each chunk's serialized records
+    fit in the input budget left after the prompt and the expected output. Records that are too
+    large alone are split on paragraph (then sentence) boundaries.
+    """
+
+    def __init__(self, counter=None, context_tokens=128000, max_output_tokens=16384, output_ratio=0.6,
+                 max_chunk_tokens=None, text_fields=("content", "ocr_text")):
+        self.counter = counter or TokenCounter()
+        self.context_tokens = context_tokens
+        self.max_output_tokens = max_output_tokens
+        # Expected output tokens per input token (cleaned text is shorter than its input)
+        self.output_ratio = output_ratio
+        self.max_chunk_tokens = max_chunk_tokens
+        self.text_fields = text_fields
+
+    @staticmethod
+    def serialize(records):
+        """
+        Compact JSON used in prompts: no indentation and no empty fields.
+        """
+        return json.dumps(
+            [{key: value for key, value in record.items() if value not in ("", None)} for record in records],
+            ensure_ascii=False, separators=(",", ":"),
+        )
+
+    def input_budget(self, prompt_tokens):
+        """
+        Tokens available for records once the prompt and the expected output are reserved.
+        """
+        budget = min(
+            self.context_tokens - prompt_tokens - self.max_output_tokens,
+            int(self.max_output_tokens / self.output_ratio),
+        )
+        if self.max_chunk_tokens:
+            budget = min(budget, self.max_chunk_tokens)
+        if budget <= 0:
+            raise ValueError(f"Prompt of {prompt_tokens} tokens leaves no room for data in the context window")
+        return budget
+
+    def record_tokens(self, record):
+        # A record costs what it adds inside the serialized array: its JSON plus a separator
+        return self.counter.count(self.serialize([record])) - 1
+
+    def split_record(self, record, budget):
+        """
+        Split an oversized record into parts that each fit the budget, cutting its text fields
+        on paragraph boundaries first and sentence boundaries for oversized paragraphs.
+        """
+        overhead = self.record_tokens({key: value for key, value in record.items() if key not in self.text_fields})
+        # Room for text in each part, leaving space for the part label and JSON escaping
+        text_budget = max(1, int((budget - overhead - 16) * 0.9))
+        parts = []
+        for field in self.text_fields:
+            if not record.get(field):
+                continue
+            for piece in self.split_text(record[field], text_budget):
+                parts.append({**{key: value for key, value in record.items() if key not in self.text_fields},
+                              field: piece})
+        for number, part in enumerate(parts, start=1):
+            part["part"] = f"{number}/{len(parts)}"
+        return parts
+
+    def split_text(self, text, budget):
+        pieces, current, current_tokens = [], [], 0
+        for paragraph in self._units(text, budget):
+            tokens = self.counter.count(paragraph) + 1
+            if current and current_tokens + tokens > budget:
+                pieces.append("\n\n".join(current))
+                current, current_tokens = [], 0
+            current.append(paragraph)
+            current_tokens += tokens
+        if current:
+            pieces.append("\n\n".join(current))
+        return pieces
+
+    def _units(self, text, budget):
+        """
+        Paragraphs of text, with any paragraph over budget broken into sentences and any
+        sentence over budget cut by characters.
+        """
+        for paragraph in text.split("\n\n"):
+            if not paragraph.strip():
+                continue
+            if self.counter.count(paragraph) <= budget:
+                yield paragraph
+                continue
+            for sentence in SENTENCE_BOUNDARY.split(paragraph):
+                if self.counter.count(sentence) <= budget:
+                    yield sentence
+                    continue
+                step = max(1, int(len(sentence) * budget / self.counter.count(sentence)))
+                for start in range(0, len(sentence), step):
+                    yield sentence[start:start + step]
+
+    def chunk(self, records, prompt_tokens=0):
+        """
+        Bin-pack records into chunks (first-fit decreasing) within the input budget. Records keep
+        their original order inside each chunk.
+        """
+        budget = self.input_budget(prompt_tokens)
+        items = []
+        for record in records:
+            tokens = self.record_tokens(record)
+            if tokens + 2 > budget:
+                parts = self.split_record(record, budget - 2)
+                logging.info(f"Split {record.get('url')} ({tokens:,} tokens) into {len(parts)} parts.")
+                items.extend((self.record_tokens(part), part) for part in parts)
+            else:
+                items.append((tokens, record))
+
+        bins = []  # [remaining tokens, [(order, record), ...]]
+        for order in sorted(range(len(items)), key=lambda index: items[index][0], reverse=True):
+            tokens, record = items[order]
+            for packed in bins:
+                if tokens <= packed[0]:
+                    packed[0] -= tokens
+                    packed[1].append((order, record))
+                    break
+            else:
+                # The brackets of the JSON array take two tokens
+                bins.append([budget - 2 - tokens, [(order, record)]])
+
+        ordered_bins = sorted((sorted(packed[1], key=lambda item: item[0]) for packed in bins),
+                              key=lambda packed: packed[0][0])
+        return [[record for _, record in packed] for packed in ordered_bins]
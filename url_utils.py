@@ -0,0 +1,37 @@
+from urllib.parse import urlparse, urlunparse, parse_qsl, urlencode
+
+
+def normalize_url(url):
+    """
+    Normalize a URL for use as a cache or dedupe key: lower-case scheme and host,
+    drop default ports and the fragment, sort query parameters.
+    """
+    parsed = urlparse(url.strip())
+    scheme = parsed.scheme.lower()
+    netloc = parsed.netloc.lower()
+    if (scheme == "http" and netloc.endswith(":80")) or (scheme == "https" and netloc.endswith(":443")):
+        netloc = netloc.rsplit(":", 1)[0]
+    path = parsed.path or "/"
+    query = urlencode(sorted(parse_qsl(parsed.query, keep_blank_values=True)))
+    return urlunparse((scheme, netloc, path, parsed.params, query, ""))
+
+
+# Query parameters that only carry tracking/session state
+TRACKING_PARAMS = {"gclid", "fbclid", "msclkid", "dclid", "yclid", "mc_cid", "mc_eid", "_hsenc", "_hsmi", "ref", "ref_src"}
+TRACKING_PREFIXES = ("utm_", "hsa_", "pk_", "mtm_")
+
+
+def canonicalize_url(url):
+    """
+    Canonical form used to decide whether two links point at the same page: normalize_url
+    plus lower-cased path, no tracking parameters and no trailing slash (except the root).
+    """
+    parsed = urlparse(normalize_url(url))
+    query = [
+        (key, value) for key, value in parse_qsl(parsed.query, keep_blank_values=True)
+        if key.lower() not in TRACKING_PARAMS and not key.lower().startswith(TRACKING_PREFIXES)
+    ]
+    path = parsed.path.lower()
+    if len(path) > 1:
+        path = path.rstrip("/") or "/"
+    return urlunparse((parsed.scheme, parsed.netloc, path, parsed.params, urlencode(query), ""))
@@ -1,20 +1,118 @@
 import os  
+import time
 import logging  
-import requests  
 import asyncio  
 import json  
 from urllib.parse import urljoin, urlparse  
 from PIL import Image  
 import pytesseract  
-from playwright.async_api import async_playwright  
+from bs4 import BeautifulSoup
+from browser_pool import BrowserPool
+from http_client import HttpClient
+from http_cache import HttpCache
+from rate_limiter import HostRateLimiter
+from ocr_pool import OcrPool
+from resource_blocker import ResourceBlocker
+from data_manager import DataManager
+
+# Runs inside the page: steps through it once to trigger lazy loading, then waits until the DOM
+# has gone quiet_ms without mutations. Everything is bounded by deadline_ms.
+SETTLE_SCRIPT = """
+async ({quietMs, deadlineMs, scrollStepMs, maxScroll}) => {
+    const start = performance.now();
+    const sleep = ms => new Promise(resolve => setTimeout(resolve, ms));
+    const height = () => document.documentElement.scrollHeight;
+    let lastMutation = start, mutations = 0;
+    const observer = new MutationObserver(records => { mutations += records.length; lastMutation = performance.now(); });
+    observer.observe(document.documentElement, {childList: true, subtree: true, attributes: true, characterData: true});
+
+    const heightBefore = height();
+    for (let y = window.innerHeight; y < Math.min(height(), maxScroll) + window.innerHeight; y += window.innerHeight) {
+        if (performance.now() - start > deadlineMs) break;
+        window.scrollTo(0, y);
+        await sleep(scrollStepMs);
+    }
+    window.scrollTo(0, 0);
+    const lazyLoadMs = performance.now() - start;
+    const mutationsBeforeQuiet = mutations;
+
+    while (performance.now() - lastMutation < quietMs && performance.now() - start < deadlineMs) {
+        await sleep(50);
+    }
+    observer.disconnect();
+    const end = performance.now();
+    return {
+        settle_ms: Math.round(end - start),
+        lazy_load_ms: Math.round(lazyLoadMs),
+        quiet_wait_ms: Math.round(end - start - lazyLoadMs),
+        mutations: mutations,
+        mutations_while_waiting: mutations - mutationsBeforeQuiet,
+        height_before: heightBefore,
+        height_after: height(),
+        hit_deadline: end - lastMutation < quietMs,
+    };
+}
+"""
   
 class WebScraper:  
-    def __init__(self):  
+    def __init__(self, max_tabs=4, max_tabs_per_domain=2, recycle_after_pages=200, max_browser_memory_mb=2048,
+                 requests_per_second=1.0, burst=2, total_connections=100, connections_per_host=8,
+                 ocr_workers=None, ocr_queue_size=8, max_screenshot_height=20000,
+                 page_deadline=30, settle_quiet_ms=500, settle_timeout=10, scroll_step_ms=150,
+                 settle_stats_file=os.path.join("logs", "settle_stats.jsonl"), ocr_enabled=True,
+                 blocked_resource_types=None, blocked_domains=None, http_cache_max_mb=2048):
         self.bing_api_key = os.getenv("BING_SEARCH_API_KEY")  
         if not self.bing_api_key:  
             raise ValueError("BING_SEARCH_API_KEY is not set in environment variables.")  
+        # Shared Chromium used for every Playwright render
+        self.browser_pool = BrowserPool(
+            max_tabs=max_tabs,
+            max_tabs_per_domain=max_tabs_per_domain,
+            recycle_after_pages=recycle_after_pages,
+            max_memory_mb=max_browser_memory_mb,
+        )
+        # Per-host politeness shared by every crawl and scrape
+        self.rate_limiter = HostRateLimiter(requests_per_second=requests_per_second, burst=burst)
+        # On-disk cache of fetched and rendered pages, revalidated with ETag/Last-Modified;
+        # pruned back to http_cache_max_mb on close
+        self.http_cache = HttpCache(max_bytes=http_cache_max_mb * 1024 * 1024)
+        # Pooled keep-alive transport for every non-browser fetch
+        self.http = HttpClient(
+            total_connections=total_connections,
+            connections_per_host=connections_per_host,
+            cache=self.http_cache,
+            rate_limiter=self.rate_limiter,
+        )
+        # Per-domain rendering decision for hybrid crawls: "static" or "playwright"
+        self.rendering_decisions = {}
+        # Screenshot OCR runs in worker processes so it overlaps with rendering the next page
+        self.ocr_pool = OcrPool(WebScraper.perform_ocr_on_image, workers=ocr_workers, max_pending=ocr_queue_size)
+        # Screenshots are taken as viewport-height tiles down to this many pixels
+        self.max_screenshot_height = max_screenshot_height
+        # Page readiness: a render never takes longer than page_deadline seconds in total
+        self.page_deadline = page_deadline
+        self.settle_quiet_ms = settle_quiet_ms
+        self.settle_timeout = settle_timeout
+        self.scroll_step_ms = scroll_step_ms
+        self.settle_stats_file = settle_stats_file
+        # Screenshots and OCR are skipped entirely when disabled, and images are then blocked too
+        self.ocr_enabled = ocr_enabled
+        self.resource_blocker = ResourceBlocker(
+            blocked_resource_types=blocked_resource_types,
+            blocked_domains=blocked_domains,
+            allow_images=ocr_enabled,
+        )
+
+    async def close(self):
+        """
+        Release the shared browser pool, OCR workers and HTTP session, then prune the HTTP cache.
+        """
+        await self.browser_pool.close()
+        await self.ocr_pool.close()
+        await self.http.close()
+        self.http_cache.prune()
   
-    def fetch_or_search_company_website(self, company_name, websites_dict):  
+    async def fetch_or_search_company_website(self, company_name, websites_dict):
         """  
         Fetch company website from a dictionary or perform a Bing search.  
         """  
@@ -23,7 +121,7 @@ class WebScraper:
   
         if not website:  
             logging.info(f"Website not found in provided data for {company_name}. Performing Bing search.")  
-            website = self.search_company_website(company_name)  
+            website = await self.search_company_website(company_name)
   
         website = self.sanitize_url(website)  
         if not self.is_valid_url(website):  
@@ -33,7 +131,7 @@ class WebScraper:
         logging.info(f"Found website for {company_name}: {website}")  
         return website  
   
-    def search_company_website(self, company_name):  
+    async def search_company_website(self, company_name):
         """  
         Use Bing Search API to find the company's official website.  
         """  
@@ -41,7 +139,7 @@ class WebScraper:
             endpoint = "https://api.bing.microsoft.com/v7.0/search"  
             headers = {"Ocp-Apim-Subscription-Key": self.bing_api_key}  
             params = {"q": f"{company_name} official website", "count": 1}  
-            response = requests.get(endpoint, headers=headers, params=params, timeout=10)  
+            response = await self.http.get(endpoint, headers=headers, params=params, timeout=10)
             response.raise_for_status()  
             search_results = response.json()  
             if "webPages" in search_results and search_results["webPages"]["value"]:  
@@ -76,73 +174,200 @@ class WebScraper:
         except ValueError:  
             return False  
   
+    @staticmethod
+    def looks_client_rendered(html, min_visible_chars=500):
+        """
+        Guess whether a statically fetched page needs a browser to show its content.
+        Returns (needs_rendering, reason).
+        """
+        lowered = html.lower()
+        spa_markers = ('id="root"></div>', 'id="app"></div>', 'id="__next"></div>', "id='root'></div>",
+                       'ng-app', 'data-reactroot', '__nuxt__', 'data-server-rendered="false"')
+        soup = BeautifulSoup(html, 'html.parser')
+        noscript_text = " ".join(tag.get_text(" ", strip=True) for tag in soup.find_all('noscript')).lower()
+        for tag in soup(['script', 'style', 'noscript', 'template', 'svg']):
+            tag.decompose()
+        body = soup.body or soup
+        visible_chars = len(" ".join(body.get_text(" ", strip=True).split()))
+
+        if visible_chars < min_visible_chars:
+            return True, f"only {visible_chars} visible characters"
+        if 'javascript' in noscript_text and ('enable' in noscript_text or 'requires' in noscript_text):
+            if visible_chars < min_visible_chars * 4:
+                return True, "<noscript> asks for JavaScript"
+        for marker in spa_markers:
+            if marker in lowered and visible_chars < min_visible_chars * 4:
+                return True, f"SPA root marker {marker!r}"
+        return False, f"{visible_chars} visible characters"
+
     @staticmethod  
     def perform_ocr_on_image(image_path):  
         """  
-        Perform OCR on the given image and return the extracted text.  
+        Perform OCR on the given image and return the extracted text. Raises RuntimeError on failure.
         """  
         try:  
-            image = Image.open(image_path)  
-            text = pytesseract.image_to_string(image)  
+            with Image.open(image_path) as image:
+                text = pytesseract.image_to_string(image)  
             logging.info(f"OCR text extracted from {image_path}")  
             return text  
         except Exception as e:  
             logging.error(f"Error performing OCR on {image_path}: {e}")  
-            return ""  
+            # Re-raised as a plain RuntimeError: some pytesseract errors can't be unpickled
+            # across the process pool
+            raise RuntimeError(f"OCR failed for {image_path}: {e}") from None
   
-    async def extract_dynamic_content_with_playwright_async(self, url, screenshot_dir, delay_seconds=5):  
+    async def get_cached_render(self, url):
+        """
+        Return (content, ocr_text) from the rendered-page cache if the entry is still fresh or the
+        server confirms with a 304 that the page has not changed; otherwise None. Renders stored
+        without OCR (OCR disabled or failed) are misses while OCR is enabled.
+        """
+        entry = self.http_cache.get(url, namespace="rendered")
+        if not entry:
+            return None
+        if self.ocr_enabled and not entry["extra"].get("ocr_complete", True):
+            return None
+        unchanged = self.http_cache.is_fresh(entry)
+        if not unchanged:
+            conditional_headers = self.http_cache.conditional_headers(entry)
+            if not conditional_headers:
+                return None
+            try:
+                await self.rate_limiter.acquire(url)
+                response = await self.http.request("GET", url, headers=conditional_headers)
+                unchanged = response.status == 304
+            except Exception as e:
+                logging.warning(f"Could not revalidate cached render of {url}: {e}")
+                return None
+            if unchanged:
+                self.http_cache.touch(url, entry, namespace="rendered")
+        if not unchanged:
+            return None
+        logging.info(f"Using cached render of {url}")
+        return entry["body"].decode("utf-8"), entry["extra"].get("ocr_text", "")
+
+    async def extract_dynamic_content_with_playwright_async(self, url, screenshot_dir, defer_ocr=False):  
         """  
         Extract full HTML content from JavaScript-rendered pages using Playwright Async API.  
-        Scrolls the page to ensure all elements are loaded, then takes a screenshot and performs OCR.  
+        Waits for the page to settle (see wait_for_settle), then screenshots it in tiles and OCRs them.  
+        Unchanged pages are served from the rendered-page cache, skipping both rendering and OCR.
+        With defer_ocr=True the OCR result is returned as a task instead of text, so the caller can
+        render the next page while this screenshot is still in the OCR pool.
         """  
+        cached = await self.get_cached_render(url)
+        if cached:
+            return cached
+
         logging.info(f"Extracting dynamic content from {url}")  
         try:  
-            async with async_playwright() as p:  
-                browser = await p.chromium.launch(headless=True)  
-                context = await browser.new_context(  
-                    user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko)"  
-                )  
-                page = await context.new_page()  
-                await page.goto(url, wait_until='networkidle', timeout=120000)  
-  
-                # Scroll down the page incrementally  
-                previous_height = None  
-                while True:  
-                    current_height = await page.evaluate('() => document.body.scrollHeight')  
-                    if previous_height == current_height:  
-                        break  
-                    previous_height = current_height  
-                    await page.evaluate('window.scrollTo(0, document.body.scrollHeight)')  
-                    # Wait for new content to load  
-                    await asyncio.sleep(1)  
-  
-                # Wait for additional seconds to allow dynamic content to load  
-                await asyncio.sleep(delay_seconds)  
+            await self.rate_limiter.acquire(url)
+            async with self.browser_pool.page(url) as page, self.resource_blocker.blocking(page, url) as block_stats:
+                started = time.monotonic()
+                response = await page.goto(url, wait_until='domcontentloaded', timeout=self.page_deadline * 1000)
+                response_headers = response.headers if response else {}
+                navigation_seconds = time.monotonic() - started
   
-                content = await page.content()  
-  
-                # Take screenshot  
-                parsed_url = urlparse(url)  
-                safe_path = parsed_url.path.replace('/', '_').strip('_') or 'home'  
-                screenshot_filename = f"{parsed_url.netloc}_{safe_path}.png"  
-                screenshot_path = os.path.join(screenshot_dir, screenshot_filename)  
-                await page.screenshot(path=screenshot_path, full_page=True)  
-                logging.info(f"Screenshot saved to {screenshot_path}")  
+                # Trigger lazy loading and wait for the DOM to go quiet, within what is left of the deadline
+                render_stats = await self.wait_for_settle(page, url, navigation_seconds,
+                                                          min(self.settle_timeout, self.page_deadline - navigation_seconds))
   
-                await context.close()  
-                await browser.close()  
+                content = await page.content()  
   
-                # Perform OCR on the screenshot  
-                ocr_text = self.perform_ocr_on_image(screenshot_path)  
-                logging.info(f"OCR text extracted from screenshot of {url}")  
+                # Take screenshot tiles  
+                tile_paths = []
+                if self.ocr_enabled:
+                    parsed_url = urlparse(url)  
+                    safe_path = parsed_url.path.replace('/', '_').strip('_') or 'home'  
+                    tile_paths = await self.capture_screenshot_tiles(page, screenshot_dir, f"{parsed_url.netloc}_{safe_path}")
+                    logging.info(f"Saved {len(tile_paths)} screenshot tiles of {url} to {screenshot_dir}")
+
+            logging.info(
+                f"Blocked {block_stats['blocked_requests']} of {block_stats['requests']} requests on {url} "
+                f"(~{block_stats['blocked_bytes_estimate'] / 1024:.0f} KB saved)"
+            )
+            DataManager.append_to_jsonl_file(self.settle_stats_file, {**render_stats, **block_stats})
   
-                return content, ocr_text  
+            # Queue tile OCR once the tab is back in the pool; waits here only if the OCR queue is full
+            ocr_futures = [await self.ocr_pool.submit(tile_path) for tile_path in tile_paths]
+            validators = {k: v for k, v in response_headers.items() if k.lower() in ("etag", "last-modified")}
+            ocr_job = asyncio.ensure_future(self.finish_render(url, content, ocr_futures, validators))
+            if defer_ocr:
+                return content, ocr_job
+            return content, await ocr_job
   
         except Exception as e:  
             logging.error(f"Error processing {url} with Playwright: {e}")  
             return "", ""  
+
+    async def wait_for_settle(self, page, url, navigation_seconds, timeout):
+        """
+        Wait until the rendered page is ready: scroll through it once to trigger lazy-loaded
+        content, then wait for settle_quiet_ms without DOM mutations, for at most timeout seconds.
+        Returns the settle timings; they are logged to settle_stats_file so unnecessary waits can be spotted.
+        """
+        timeout = max(timeout, 0.5)
+        args = {
+            "quietMs": self.settle_quiet_ms,
+            "deadlineMs": timeout * 1000,
+            "scrollStepMs": self.scroll_step_ms,
+            "maxScroll": self.max_screenshot_height,
+        }
+        try:
+            # The script enforces the deadline itself; the outer timeout covers a hung page
+            stats = await asyncio.wait_for(page.evaluate(SETTLE_SCRIPT, args), timeout + 5)
+        except Exception as e:
+            logging.warning(f"Settle detection failed for {url}: {e}")
+            stats = {"settle_ms": round(timeout * 1000), "hit_deadline": True, "error": str(e)}
+
+        stats = {"url": url, "navigation_ms": round(navigation_seconds * 1000), **stats, "recorded_at": time.time()}
+        if stats.get("hit_deadline"):
+            logging.info(f"{url} was still changing after {stats['settle_ms']} ms; continuing at the deadline.")
+        else:
+            logging.info(f"{url} settled after {stats['settle_ms']} ms.")
+        return stats
+
+    async def capture_screenshot_tiles(self, page, screenshot_dir, base_name):
+        """
+        Screenshot the page as viewport-height tiles from the top down, stopping at
+        max_screenshot_height, so no single image grows with the page length.
+        Returns the tile paths in page order.
+        """
+        viewport = page.viewport_size or {"width": 1280, "height": 720}
+        page_height = await page.evaluate(
+            '() => Math.max(document.documentElement.scrollHeight, document.body ? document.body.scrollHeight : 0)'
+        )
+        capture_height = max(1, min(page_height, self.max_screenshot_height))
+        if page_height > capture_height:
+            logging.info(f"Page is {page_height}px tall; capturing the first {capture_height}px.")
+
+        tile_paths = []
+        for index, top in enumerate(range(0, capture_height, viewport["height"])):
+            tile_path = os.path.join(screenshot_dir, f"{base_name}_{index:03d}.png")
+            clip = {"x": 0, "y": top, "width": viewport["width"], "height": min(viewport["height"], capture_height - top)}
+            await page.screenshot(path=tile_path, full_page=True, clip=clip)
+            tile_paths.append(tile_path)
+        return tile_paths
+
+    async def finish_render(self, url, content, ocr_futures, validators):
+        """
+        Wait for the OCR of every screenshot tile of a rendered page, merge the text in page
+        order, then store the render in the cache. Returns the OCR text of the tiles that
+        succeeded; the render is cached as OCR-incomplete if any tile failed.
+        """
+        tile_texts = await asyncio.gather(*ocr_futures, return_exceptions=True)
+        failures = [text for text in tile_texts if isinstance(text, Exception)]
+        ocr_complete = self.ocr_enabled and not failures
+        ocr_text = "\n".join(text.strip() for text in tile_texts if isinstance(text, str) and text.strip())
+        if failures:
+            logging.error(f"OCR failed for {len(failures)} of {len(tile_texts)} screenshot tiles of {url}: {failures[0]}")
+        else:
+            logging.info(f"OCR text extracted from screenshot of {url}")
+        if content:
+            self.http_cache.put(url, content.encode("utf-8"), headers=validators, namespace="rendered",
+                                source="rendered", extra={"ocr_text": ocr_text, "ocr_complete": ocr_complete})
+        return ocr_text
   
-    def search_bing_web(self, query):  
+    async def search_bing_web(self, query):
         """  
         Perform a web search using Bing Search API and return the search results snippets.  
         """  
@@ -153,10 +378,10 @@ class WebScraper:
             params = {  
                 "q": query,  
                 "count": 5,  # Number of results to fetch  
-                "textDecorations": False,  
+                "textDecorations": "false",  # aiohttp only accepts str/int query values
                 "textFormat": "Raw",  
             }  
-            response = requests.get(endpoint, headers=headers, params=params, timeout=10)  
+            response = await self.http.get(endpoint, headers=headers, params=params, timeout=10)
             response.raise_for_status()  
             search_results = response.json()  
             snippets = []  